@@ -0,0 +1,63 @@
+"""
+Time ``import pydal`` and the first connection in fresh interpreters.
+
+Runs each snippet under ``-X importtime`` and reports the time spent
+importing (``pydal`` itself and everything loaded lazily afterwards)
+and the heaviest modules, best of ``--repeat`` runs::
+
+    python benchmarks/import_time.py --repeat 5 --top 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SNIPPETS = {
+    "import": "import pydal",
+    "connect": "from pydal import DAL; DAL('sqlite:memory').close()",
+}
+
+
+def importtime(code):
+    """Return ({module: cumulative us}, total us) for one fresh run."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    times, total = {}, 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+        # top-level imports are indented by a single space
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return times, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    for label, code in SNIPPETS.items():
+        runs = [importtime(code) for _ in range(args.repeat)]
+        best, total = min(runs, key=lambda run: run[1])
+        print(
+            "%s: %.1fms importing, pydal %.1fms, %i modules"
+            % (label, total / 1e3, best.get("pydal", 0) / 1e3, len(best))
+        )
+        heaviest = sorted(best.items(), key=lambda item: -item[1])
+        for name, us in heaviest[: args.top]:
+            print("  %-40s %8.1fms" % (name, us / 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Time a bulk import of users through the validators.
+
+Compares ``validate_and_insert`` one row at a time with
+``validate_and_bulk_insert``, in-process and with the CPU-bound
+validators (``IS_STRONG``, ``CRYPT``) running in a process pool::
+
+    python benchmarks/import_users.py --users 10000 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydal import DAL, Field  # noqa: E402
+from pydal.validators import CRYPT, IS_EMAIL, IS_NOT_IN_DB, IS_STRONG  # noqa: E402
+
+
+def define(db):
+    return db.define_table(
+        "auth_user",
+        Field("email", requires=[IS_EMAIL(), IS_NOT_IN_DB(db, "auth_user.email")]),
+        Field("password", "password", requires=[IS_STRONG(), CRYPT()]),
+    )
+
+
+def users(count):
+    return [
+        dict(email="user%s@example.com" % n, password="Secret-%06d!" % n)
+        for n in range(count)
+    ]
+
+
+def one_by_one(items, workers):
+    db = DAL("sqlite:memory")
+    table = define(db)
+    for item in items:
+        assert table.validate_and_insert(**item)["id"]
+    return db
+
+
+def batched(items, workers):
+    db = DAL("sqlite:memory")
+    assert define(db).validate_and_bulk_insert(items)["success"]
+    return db
+
+
+def pooled(items, workers):
+    db = DAL("sqlite:memory")
+    table = define(db)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        assert table.validate_and_bulk_insert(items, executor=executor)["success"]
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    items = users(args.users)
+    for run in (one_by_one, batched, pooled):
+        start = time.perf_counter()
+        db = run(items, args.workers)
+        elapsed = time.perf_counter() - start
+        assert db(db.auth_user).count() == args.users
+        print(
+            "%-12s %8.2fs %10.0f users/s"
+            % (run.__name__, elapsed, args.users / elapsed)
+        )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
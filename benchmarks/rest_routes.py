@@ -0,0 +1,77 @@
+"""
+Time ``db.parse_as_rest`` with ``patterns="auto"`` on a wide schema.
+
+Reports the cost of compiling the pattern list (paid once per pattern
+list and schema) and of dispatching requests through the cached routes::
+
+    python benchmarks/rest_routes.py --tables 200 --number 200
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydal import DAL, Field  # noqa: E402
+from pydal.helpers.rest import RestParser  # noqa: E402
+
+
+def define(db, tables):
+    for n in range(tables):
+        fields = [
+            Field("name"),
+            Field("size", "integer"),
+            Field("created_on", "datetime"),
+        ]
+        if n:
+            fields.append(Field("parent", "reference t%i" % (n - 1)))
+        db.define_table("t%i" % n, *fields)
+        db["t%i" % n].insert(
+            name="row", size=n, created_on=datetime.datetime(2024, 1, 2, 3, 4, 5)
+        )
+
+
+def requests(tables):
+    last = "t%i" % (tables - 1)
+    return {
+        "table": [last],
+        "range": [last, "size", "0", "1000"],
+        "range field": [last, "size", "0", "1000", "name"],
+        "date": [last, "created-on", "2024", "1", "2"],
+        "no match": [last, "nope", "row"],
+        "patterns": ["patterns"],
+    }
+
+
+def timed(db, args, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        result = db.parse_as_rest("auto", args, {})
+    return (time.perf_counter() - start) / number * 1e3, result.status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+    db = DAL("sqlite:memory")
+    define(db, args.tables)
+    start = time.perf_counter()
+    # the first request compiles the patterns, the others reuse them
+    routes = RestParser(db).routes("auto")
+    print(
+        "%i tables, %i patterns, compiled in %.1fms"
+        % (args.tables, len(routes.patterns), (time.perf_counter() - start) * 1e3)
+    )
+    print("%-14s %10s %8s" % ("request", "ms/req", "status"))
+    for name, path in requests(args.tables).items():
+        print("%-14s %10.3f %8i" % ((name,) + timed(db, path, args.number)))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure the sustained throughput of the Scheduler on SQLite.
+
+Enqueues N no-op runs, starts one scheduler and reports runs/sec until
+they have all completed, with the scheduler metrics::
+
+    python benchmarks/scheduler_bench.py --runs 1000 --concurrency 8
+    python benchmarks/scheduler_bench.py --runs 1000 --mode pool
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydal import DAL  # noqa: E402
+from pydal.tools.scheduler import Scheduler  # noqa: E402
+
+
+def noop():
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=Scheduler.modes, default="fork")
+    args = parser.parse_args()
+    logger = logging.getLogger("scheduler_bench")
+    logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as folder:
+        db = DAL("sqlite://bench.sqlite", folder=folder)
+        scheduler = Scheduler(
+            db,
+            max_concurrent_runs=args.concurrency,
+            folder=folder,
+            logger=logger,
+            mode=args.mode,
+        )
+        scheduler.register_task("noop", noop)
+        for _ in range(args.runs):
+            scheduler.enqueue_run(name="noop")
+        start = time.perf_counter()
+        scheduler.start()
+        # poll the metrics, not the database: a child forked while this
+        # thread holds a sqlite lock would inherit it
+        counters = scheduler.metrics.counters
+        while sum(counters[f"runs_{status}"] for status in Scheduler.statuses) < (
+            args.runs
+        ):
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        scheduler.stop()
+        metrics = scheduler.metrics.snapshot()
+        completed = db(db.task_run.status == "completed").count()
+        db.close()
+    print(
+        "%s mode, %i runs, concurrency %i: %.2fs, %.1f runs/s, %i completed"
+        % (
+            args.mode,
+            args.runs,
+            args.concurrency,
+            elapsed,
+            args.runs / elapsed,
+            completed,
+        )
+    )
+    for name, value in sorted(metrics["counters"].items()):
+        print("%-22s %10i" % (name, value))
+    print("%-22s %10s %10s %10s" % ("histogram (s)", "p50", "p95", "max"))
+    for name, histogram in sorted(metrics["histograms"].items()):
+        print(
+            "%-22s %10.3f %10.3f %10.3f"
+            % (name, histogram["p50"], histogram["p95"], histogram["max"])
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Time per-request setup of a wide schema, defined vs copied from a template.
+
+Compares running ``define_table`` for every table on each request with
+``DAL.from_template``, touching a couple of tables or walking the
+back-references of the root table::
+
+    python benchmarks/template_schema.py --tables 200 --number 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydal import DAL, Field  # noqa: E402
+
+
+def define(db, tables):
+    for n in range(tables):
+        fields = [Field("f%i" % k) for k in range(8)]
+        fields.append(Field("parent", "reference t%i" % (n - 1 if n else 0)))
+        db.define_table("t%i" % n, *fields)
+
+
+def timed(setup, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        setup().close()
+    return (time.perf_counter() - start) / number * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+    last = "t%i" % (args.tables - 1)
+    template = DAL("sqlite:memory", migrate=False)
+    define(template, args.tables)
+    template.freeze_schema()
+
+    def defined():
+        db = DAL("sqlite:memory", migrate=False)
+        define(db, args.tables)
+        db.t1.parent, db.t0.f0
+        return db
+
+    def copied():
+        db = DAL.from_template(template, migrate=False)
+        db.t1.parent, db.t0.f0
+        return db
+
+    def copied_all():
+        db = DAL.from_template(template, migrate=False)
+        db[last].parent, list(db.t0._referenced_by)
+        return db
+
+    print("%i tables" % args.tables)
+    print("%-14s %10s" % ("setup", "ms/req"))
+    for name, setup in (
+        ("define", defined),
+        ("template", copied),
+        ("template all", copied_all),
+    ):
+        print("%-14s %10.3f" % (name, timed(setup, args.number)))
+    template.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Time every validator in pydal.validators, called the way Field.validate
+calls it and through compile_validators (without and with its cache)::
+
+    python benchmarks/validators.py
+    python benchmarks/validators.py --number 2000 IS_EMAIL IS_URL
+
+Each case validates a few valid and invalid samples, repeatedly, so the
+"cached" column shows the best case of repeated values. The run fails if
+a validator class has no case here or a compiled chain disagrees with
+Field.validate.
+"""
+
+import argparse
+import datetime
+import inspect
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydal import DAL, Field  # noqa: E402
+from pydal import validators  # noqa: E402
+from pydal.validators import (  # noqa: E402
+    ANY_OF,
+    CLEANUP,
+    CRYPT,
+    IS_ALPHANUMERIC,
+    IS_DATE,
+    IS_DATE_IN_RANGE,
+    IS_DATETIME,
+    IS_DATETIME_IN_RANGE,
+    IS_DECIMAL_IN_RANGE,
+    IS_EMAIL,
+    IS_EMPTY_OR,
+    IS_EQUAL_TO,
+    IS_EXPR,
+    IS_FILE,
+    IS_FLOAT_IN_RANGE,
+    IS_GENERIC_URL,
+    IS_HTTP_URL,
+    IS_IMAGE,
+    IS_IN_DB,
+    IS_IN_SET,
+    IS_INT_IN_RANGE,
+    IS_IPADDRESS,
+    IS_IPV4,
+    IS_IPV6,
+    IS_JSON,
+    IS_LENGTH,
+    IS_LIST_OF,
+    IS_LIST_OF_EMAILS,
+    IS_LIST_OF_INTS,
+    IS_LIST_OF_STRINGS,
+    IS_LOWER,
+    IS_MATCH,
+    IS_NOT_EMPTY,
+    IS_NOT_IN_DB,
+    IS_SAFE,
+    IS_SLUG,
+    IS_STRONG,
+    IS_TIME,
+    IS_UPLOAD_FILENAME,
+    IS_UPPER,
+    IS_URL,
+    LazyCrypt,
+    Validator,
+    compile_validators,
+)
+
+PNG = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x10\x00\x00\x00\x10"
+
+
+class Upload(object):
+    def __init__(self, filename, content=PNG):
+        self.filename = filename
+        self.file = io.BytesIO(content)
+
+
+def cases(db):
+    return {
+        "IS_MATCH": (IS_MATCH(r"^\w+$"), ["hello", "hello world"]),
+        "IS_EQUAL_TO": (IS_EQUAL_TO("secret"), ["secret", "other"]),
+        "IS_EXPR": (IS_EXPR("int(value) < 10"), ["5", "50"]),
+        "IS_LENGTH": (IS_LENGTH(10, 2), ["hello", "x", "far too long"]),
+        "IS_JSON": (IS_JSON(), ['{"a": 1}', "{a"]),
+        "IS_IN_SET": (IS_IN_SET(["red", "green", "blue"]), ["red", "pink"]),
+        "IS_IN_DB": (IS_IN_DB(db, "thing.name"), ["chair", "sofa"]),
+        "IS_NOT_IN_DB": (IS_NOT_IN_DB(db, "thing.name"), ["sofa", "chair"]),
+        "IS_INT_IN_RANGE": (IS_INT_IN_RANGE(0, 100), ["42", 7, "-3", "x"]),
+        "IS_FLOAT_IN_RANGE": (IS_FLOAT_IN_RANGE(0, 100), ["4.2", 7.5, "x"]),
+        "IS_DECIMAL_IN_RANGE": (IS_DECIMAL_IN_RANGE(0, 100), ["4.20", "x"]),
+        "IS_NOT_EMPTY": (IS_NOT_EMPTY(), ["hello", "  "]),
+        "IS_SAFE": (IS_SAFE(), ["<b>hi</b>", "<script>x</script>"]),
+        "IS_ALPHANUMERIC": (IS_ALPHANUMERIC(), ["abc123", "abc-123"]),
+        "IS_EMAIL": (
+            IS_EMAIL(),
+            ["user@example.com", "first.last@mail.example.org", "nope@", "a@b"],
+        ),
+        "IS_LIST_OF_STRINGS": (IS_LIST_OF_STRINGS(), ["a, b, c"]),
+        "IS_LIST_OF_INTS": (IS_LIST_OF_INTS(), ["1, 2, 3", "1, x"]),
+        "IS_LIST_OF_EMAILS": (IS_LIST_OF_EMAILS(), ["a@example.com, b@x"]),
+        "IS_GENERIC_URL": (
+            IS_GENERIC_URL(),
+            ["http://example.com/a?b=c", "ftp://example.com", "bad url"],
+        ),
+        "IS_HTTP_URL": (
+            IS_HTTP_URL(),
+            ["http://example.com/a?b=c", "https://10.0.0.1/", "http://bad_host"],
+        ),
+        "IS_URL": (
+            IS_URL(),
+            ["http://example.com/a?b=c", "example.com", "http://bücher.de", "a b"],
+        ),
+        "IS_TIME": (IS_TIME(), ["21:30", "9:30 pm", "25:00"]),
+        "IS_DATE": (IS_DATE(), ["2024-02-29", "2023-02-29"]),
+        "IS_DATETIME": (
+            IS_DATETIME(),
+            ["2024-02-29 12:30:00", "2024-02-29T12:30", "yesterday"],
+        ),
+        "IS_DATE_IN_RANGE": (
+            IS_DATE_IN_RANGE(datetime.date(2000, 1, 1), datetime.date(2030, 1, 1)),
+            ["2024-02-29", "1999-12-31"],
+        ),
+        "IS_DATETIME_IN_RANGE": (
+            IS_DATETIME_IN_RANGE(
+                datetime.datetime(2000, 1, 1), datetime.datetime(2030, 1, 1)
+            ),
+            ["2024-02-29 12:30:00", "1999-12-31 23:59:59"],
+        ),
+        "IS_LIST_OF": (IS_LIST_OF(IS_INT_IN_RANGE(0, 10)), [["1", "2"], ["1", "20"]]),
+        "IS_LOWER": (IS_LOWER(), ["Hello World"]),
+        "IS_UPPER": (IS_UPPER(), ["Hello World"]),
+        "IS_SLUG": (IS_SLUG(), ["hello-world", "Hello World!"]),
+        "ANY_OF": (ANY_OF([IS_EMAIL(), IS_ALPHANUMERIC()]), ["a@example.com", "-"]),
+        "IS_EMPTY_OR": (IS_EMPTY_OR(IS_EMAIL()), ["", "a@example.com", "x"]),
+        "CLEANUP": (CLEANUP(), ["hello\x00 world"]),
+        "CRYPT": (CRYPT(), ["secret"]),
+        "IS_STRONG": (IS_STRONG(), ["Secret-123!", "weak"]),
+        "IS_IMAGE": (IS_IMAGE(), [Upload("a.png"), Upload("a.txt")]),
+        "IS_FILE": (IS_FILE(extension="png"), [Upload("a.png"), Upload("a.txt")]),
+        "IS_UPLOAD_FILENAME": (
+            IS_UPLOAD_FILENAME(extension="png"),
+            [Upload("a.png"), Upload("a.txt")],
+        ),
+        "IS_IPV4": (IS_IPV4(), ["192.168.1.1", "256.1.1.1"]),
+        "IS_IPV6": (IS_IPV6(), ["fe80::1", "fe80::zz"]),
+        "IS_IPADDRESS": (IS_IPADDRESS(), ["192.168.1.1", "fe80::1", "nope"]),
+    }
+
+
+def validator_names():
+    # IS_NULL_OR is an alias of IS_EMPTY_OR
+    return sorted(
+        name
+        for name, obj in vars(validators).items()
+        if inspect.isclass(obj)
+        and issubclass(obj, Validator)
+        and obj.__module__ == validators.__name__
+        and obj.__name__ == name
+        and name not in ("Validator", "DefaultValidatorProxy")
+    )
+
+
+def timed(validate, samples, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        for value in samples:
+            if isinstance(value, Upload):
+                value.file.seek(0)
+            validate(value)
+    return (time.perf_counter() - start) / (number * len(samples)) * 1e6
+
+
+def check(field, validate, samples):
+    for value in samples:
+        expected = field.validate(value)
+        got = validate(value)
+        if isinstance(value, Upload):
+            value.file.seek(0)
+        if str(expected[1]) != str(got[1]) or (
+            expected[1] is None and repr(expected[0]) != repr(got[0])
+        ):
+            if not isinstance(expected[0], LazyCrypt):
+                raise AssertionError((field.name, value, expected, got))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=500)
+    parser.add_argument("names", nargs="*")
+    args = parser.parse_args()
+    db = DAL("sqlite:memory")
+    db.define_table("thing", Field("name"))
+    db.thing.insert(name="chair")
+    table = cases(db)
+    missing = set(validator_names()) - set(table)
+    if missing:
+        sys.exit("no benchmark case for: %s" % ", ".join(sorted(missing)))
+    print("%-22s %10s %10s %10s" % ("validator (us/value)", "validate", "fused", "cached"))
+    for name in args.names or sorted(table):
+        validator, samples = table[name]
+        field = Field(name.lower(), requires=validator)
+        fused = compile_validators(field, cache_size=0)
+        cached = compile_validators(field)
+        check(field, fused, samples)
+        check(field, cached, samples)
+        print(
+            "%-22s %10.2f %10.2f %10.2f"
+            % (
+                name,
+                timed(field.validate, samples, args.number),
+                timed(fused, samples, args.number),
+                timed(cached, samples, args.number),
+            )
+        )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
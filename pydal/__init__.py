@@ -5,6 +5,7 @@ Public API exposed at the package root:
 
 * ``DAL`` — the database connection / schema container.
 * ``Field`` — a column descriptor used with ``DAL.define_table``.
+* ``Index`` — an index declared with ``DAL.define_table(indexes=...)``.
 * ``SQLCustomType`` — descriptor for backend-specific column types.
 * ``QueryBuilder`` — natural-language → ``Query`` parser.
 * ``QueryParseError`` — raised by ``QueryBuilder`` on parse failure.
@@ -18,12 +19,13 @@ __version__ = "1.20260520.0"
 from .base import DAL
 from .helpers.classes import SQLCustomType
 from .helpers.methods import geoLine, geoPoint, geoPolygon
-from .objects import Field
+from .objects import Field, Index
 from .querybuilder import QueryBuilder, QueryParseError
 
 __all__ = [
     "DAL",
     "Field",
+    "Index",
     "SQLCustomType",
     "QueryBuilder",
     "QueryParseError",
@@ -3,6 +3,7 @@ Process-wide globals.
 
 * ``GLOBAL_LOCKER`` — reentrant lock used by the connection pool and a
   few schema-creation paths to serialize side-effects across threads.
+  It is held across ``os.fork`` so a child never inherits it locked.
 * ``THREAD_LOCAL`` — per-thread scratch namespace; adapters store
   their current connection here.
 * ``DEFAULT`` — sentinel-as-callable used as a default parameter value
@@ -13,11 +14,21 @@ Process-wide globals.
   ``functools.reduce`` to combine a list of subqueries.
 """
 
+import os
 import threading
 
 GLOBAL_LOCKER: threading.RLock = threading.RLock()
 THREAD_LOCAL: threading.local = threading.local()
 
+if hasattr(os, "register_at_fork"):
+    # a child forked while another thread holds the lock could never
+    # take it (e.g. the scheduler's runs, to connect)
+    os.register_at_fork(
+        before=GLOBAL_LOCKER.acquire,
+        after_in_parent=GLOBAL_LOCKER.release,
+        after_in_child=GLOBAL_LOCKER.release,
+    )
+
 # Sentinel marking "no value supplied" for Field defaults. Implemented
 # as a callable so ``DEFAULT()`` returns ``None`` — matches the legacy
 # behavior of Field's "compute default lazily" path.
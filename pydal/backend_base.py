@@ -22,6 +22,7 @@ Per-backend code lives in ``pydal.backends.<name>``; each backend file imports
 from this module and registers its concrete classes with the four dispatchers.
 """
 
+import importlib
 import json
 import re
 import sys
@@ -94,8 +95,21 @@ class Adapters(Dispatcher):
     (``"postgres"``, ``"postgres:psycopg2"``, ``"sqlite:memory"``,
     ...), and ``get_for`` takes the URI prefix rather than walking
     the class MRO.
+
+    Backend modules can also be announced with ``register_lazy``:
+    the module is only imported the first time one of its URIs is
+    looked up, which keeps ``import pydal`` from loading every backend.
     """
 
+    def __init__(self, namespace=None):
+        super().__init__(namespace)
+        self._lazy_ = {}
+
+    def register_lazy(self, module, *uris):
+        """Announce that importing ``module`` registers ``uris``."""
+        for uri in uris:
+            self._lazy_[uri] = module
+
     def register_for(self, *uris):
         """Decorator: register a class for one or more URI prefixes."""
 
@@ -108,6 +122,8 @@ class Adapters(Dispatcher):
 
     def get_for(self, uri):
         """Look up an adapter class by URI prefix; raises ``SyntaxError`` if missing."""
+        if uri not in self._registry_ and uri in self._lazy_:
+            importlib.import_module(self._lazy_[uri])
         try:
             return self._registry_[uri]
         except KeyError:
@@ -2465,12 +2481,58 @@ class SQLDialect(CommonDialect):
         if_exists = "IF EXISTS " if if_exists else ""
         return "DROP INDEX %s%s;" % (if_exists, self.quote(name))
 
+    def declared_index(
+        self, name, table, columns, unique=False, where=None, concurrently=False
+    ):
+        """
+        ``CREATE INDEX`` for a declared ``Index``; ``columns`` and
+        ``where`` are already compiled SQL.
+        """
+        return "CREATE%s INDEX %s ON %s (%s)%s;" % (
+            " UNIQUE" if unique else "",
+            self.quote(name),
+            table._rname,
+            ",".join(columns),
+            " WHERE %s" % where if where else "",
+        )
+
     def constraint_name(self, table, fieldname):
         return "%s_%s__constraint" % (table, fieldname)
 
     def concat_add(self, tablename):
         return ", ADD "
 
+    def rename_column(self, table_rname, old_rname, new_rname):
+        """Native column rename, or None when the backend has none."""
+        return None
+
+    def alter_column_type(self, table_rname, rname, type_sql):
+        """Native in-place column type change, or None when unsupported."""
+        return None
+
+    def lock_table(self, table_rname):
+        """
+        Statement blocking writes to a table (not reads) until the end of
+        the transaction, or None when the backend has none to offer.
+        """
+        return None
+
+    def column_differs(self, target, source, type_sql, cast=False):
+        """
+        Condition true on the rows where column ``target`` (of type
+        ``type_sql``) doesn't hold the value of ``source``, NULLs
+        included; ``cast`` when ``source`` has another type.
+        """
+        return (
+            "(%(t)s <> %(s)s OR (%(t)s IS NULL AND %(s)s IS NOT NULL)"
+            " OR (%(t)s IS NOT NULL AND %(s)s IS NULL))" % dict(t=target, s=source)
+        )
+
+    def window_count(self):
+        """``COUNT(*) OVER ()`` (total rows before LIMIT), or None when
+        the backend has no window functions."""
+        return None
+
     def writing_alias(self, table):
         return table.sql_fullref
 
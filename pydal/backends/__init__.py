@@ -1,26 +1,17 @@
 """
 Per-backend modules — adapter + dialect + parser + representer for each
-supported database. Importing this package triggers registration of every
-backend with the four dispatchers exposed in ``pydal.backend_base``.
+supported database. Backends are registered lazily: importing this
+package only tells the ``adapters`` dispatcher which module provides
+which URI, and the module itself is imported (registering its classes
+with the four dispatchers in ``pydal.backend_base``) the first time a
+``DAL`` connects to one of its URIs.
+
+The concrete adapter classes and the backend submodules are still
+reachable as attributes (``from pydal.backends import Postgres``);
+they're imported on first access.
 """
 
-from . import (
-    couchdb,
-    db2,
-    firebird,
-    google,
-    informix,
-    ingres,
-    mongo,
-    mssql,
-    mysql,
-    oracle,
-    postgres,
-    sap,
-    snowflake,
-    sqlite,
-    teradata,
-)
+import importlib
 
 # Re-export the dispatchers and most-commonly-referenced concrete adapters
 # for backwards compatibility with code that did ``from pydal.adapters import``.
@@ -30,18 +21,101 @@ from ..backend_base import (
     parsers,
     representers,
 )
-from .couchdb import CouchDB
-from .db2 import DB2
-from .firebird import FireBird
-from .google import GoogleSQL
-from .informix import Informix
-from .ingres import Ingres
-from .mongo import Mongo
-from .mssql import MSSQL
-from .mysql import MySQL
-from .oracle import Oracle
-from .postgres import Postgres, PostgresPsyco
-from .sap import SAPDB
-from .snowflake import Snowflake
-from .sqlite import SQLite
-from .teradata import Teradata
+
+#: backend submodule -> URI prefixes it registers with ``adapters``.
+BACKEND_URIS = {
+    "couchdb": ("couchdb",),
+    "db2": ("db2:ibm_db_dbi", "db2:pyodbc"),
+    "firebird": ("firebird", "firebird_embedded"),
+    "google": ("google:sql", "google:MySQLdb", "google:psycopg2", "firestore"),
+    "informix": ("informix", "informix-se"),
+    "ingres": ("ingres", "ingresu"),
+    "mongo": ("mongodb",),
+    "mssql": (
+        "mssql",
+        "mssql3",
+        "mssql4",
+        "mssqln",
+        "mssql2",
+        "mssql3n",
+        "mssql4n",
+        "pytds",
+        "vertica",
+        "sybase",
+        "pymssql",
+        "mssqlpython",
+    ),
+    "mysql": (
+        "mysql:mysqlconnector",
+        "mysql:pymysql",
+        "mysql:MySQLdb",
+        "mysql",
+        "cubrid",
+    ),
+    "oracle": ("oracle",),
+    "postgres": (
+        "postgres",
+        "postgres:psycopg2",
+        "postgres2",
+        "postgres2:psycopg2",
+        "postgres3",
+        "postgres3:psycopg2",
+        "jdbc:postgres",
+    ),
+    "sap": ("sapdb",),
+    "snowflake": ("snowflake",),
+    "sqlite": (
+        "sqlite",
+        "sqlite:memory",
+        "spatialite",
+        "spatialite:memory",
+        "jdbc:sqlite",
+        "jdbc:sqlite:memory",
+    ),
+    "teradata": ("teradata",),
+}
+
+for _module, _uris in BACKEND_URIS.items():
+    adapters.register_lazy(__name__ + "." + _module, *_uris)
+del _module, _uris
+
+#: re-exported adapter class -> submodule defining it.
+_ADAPTER_MODULES = {
+    "CouchDB": "couchdb",
+    "DB2": "db2",
+    "FireBird": "firebird",
+    "GoogleSQL": "google",
+    "Informix": "informix",
+    "Ingres": "ingres",
+    "Mongo": "mongo",
+    "MSSQL": "mssql",
+    "MySQL": "mysql",
+    "Oracle": "oracle",
+    "Postgres": "postgres",
+    "PostgresPsyco": "postgres",
+    "SAPDB": "sap",
+    "Snowflake": "snowflake",
+    "SQLite": "sqlite",
+    "Teradata": "teradata",
+}
+
+
+def load_all():
+    """Import every backend module (the old eager behaviour)."""
+    for name in BACKEND_URIS:
+        importlib.import_module(__name__ + "." + name)
+
+
+def __getattr__(name):
+    if name in BACKEND_URIS:
+        return importlib.import_module(__name__ + "." + name)
+    if name in _ADAPTER_MODULES:
+        module = importlib.import_module(__name__ + "." + _ADAPTER_MODULES[name])
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(BACKEND_URIS) | set(_ADAPTER_MODULES))
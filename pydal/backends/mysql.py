@@ -261,6 +261,33 @@ class MySQLDialect(SQLDialect):
     def drop_index(self, name, table, if_exists=False):
         return "DROP INDEX %s ON %s;" % (self.quote(name), table._rname)
 
+    def declared_index(
+        self, name, table, columns, unique=False, where=None, concurrently=False
+    ):
+        if where:
+            raise SyntaxError("MySQL does not support partial indexes")
+        return super(MySQLDialect, self).declared_index(
+            name, table, columns, unique=unique
+        )
+
+    def window_count(self):
+        # window functions appeared in MySQL 8.0 and MariaDB 10.2
+        try:
+            connection = self.adapter.connection
+            info = getattr(connection, "server_version", None)
+            if not isinstance(info, str):
+                info = connection.get_server_info()
+        except Exception:
+            return None
+        # MariaDB may report itself as "5.5.5-10.6.12-MariaDB"
+        numbers = [int(n) for n in re.findall(r"\d+", info.split("-MariaDB")[0])]
+        if "mariadb" in info.lower():
+            version, minimum = tuple(numbers[-3:-1]), (10, 2)
+        else:
+            version, minimum = tuple(numbers[:2]), (8, 0)
+        return "COUNT(*) OVER ()" if version >= minimum else None
+
+
 # ============================================================
 # Representer
 # ============================================================
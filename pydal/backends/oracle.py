@@ -372,6 +372,18 @@ class OracleDialect(SQLDialect):
             return "TO_CHAR(%s)" % self.expand(first, query_env=query_env)
         return "CAST(%s)" % self._as(first, second, query_env)
 
+    def column_differs(self, target, source, type_sql, cast=False):
+        if type_sql != "CLOB":
+            return super(OracleDialect, self).column_differs(
+                target, source, type_sql, cast
+            )
+        # CLOBs can't be compared with <>
+        return (
+            "(DBMS_LOB.COMPARE(%(t)s, %(s)s) <> 0"
+            " OR (%(t)s IS NULL AND %(s)s IS NOT NULL)"
+            " OR (%(t)s IS NOT NULL AND %(s)s IS NULL))" % dict(t=target, s=source)
+        )
+
     def mod(self, first, second, query_env={}):
         return "MOD(%s,%s)" % (
             self.expand(first, query_env=query_env),
@@ -478,6 +478,45 @@ class PostgresDialect(SQLDialect):
             )
         return rv
 
+    def declared_index(
+        self, name, table, columns, unique=False, where=None, concurrently=False
+    ):
+        return "CREATE%s INDEX%s %s ON %s (%s)%s;" % (
+            " UNIQUE" if unique else "",
+            " CONCURRENTLY" if concurrently else "",
+            self.quote(name),
+            table._rname,
+            ",".join(columns),
+            " WHERE %s" % where if where else "",
+        )
+
+    def rename_column(self, table_rname, old_rname, new_rname):
+        return "ALTER TABLE %s RENAME COLUMN %s TO %s;" % (
+            table_rname,
+            old_rname,
+            new_rname,
+        )
+
+    def window_count(self):
+        return "COUNT(*) OVER ()"
+
+    def lock_table(self, table_rname):
+        return "LOCK TABLE %s IN SHARE ROW EXCLUSIVE MODE;" % table_rname
+
+    def column_differs(self, target, source, type_sql, cast=False):
+        if cast:
+            source = "CAST(%s AS %s)" % (source, type_sql)
+        return "%s IS DISTINCT FROM %s" % (target, source)
+
+    def alter_column_type(self, table_rname, rname, type_sql):
+        return "ALTER TABLE %s ALTER COLUMN %s TYPE %s USING %s::%s;" % (
+            table_rname,
+            rname,
+            type_sql,
+            rname,
+            type_sql,
+        )
+
     def st_asgeojson(self, first, second, query_env={}):
         return "ST_AsGeoJSON(%s,%s,%s)" % (
             self.expand(first, query_env=query_env),
@@ -4,15 +4,56 @@
 # Adapter
 # ============================================================
 
+import functools
+import os
 import platform
 import re
+import threading
 import uuid
 from datetime import date, datetime
 from os.path import join as pjoin
 from time import mktime
 
+from .._globals import GLOBAL_LOCKER, THREAD_LOCAL
 from ..backend_base import adapters
 from ..backend_base import SQLAdapter
+from ..connection import ConnectionPool
+
+# Statements that never need the writer lane. Anything else (DML, DDL,
+# ``BEGIN IMMEDIATE`` from ``for_update`` selects) is routed through it.
+REGEX_SQLITE_READ = re.compile(r"^\s*(SELECT|PRAGMA|EXPLAIN)\b", re.IGNORECASE)
+
+# ``strftime`` formats for the native EXTRACT replacement. ``epoch``
+# keeps the local-time reading of the old ``mktime``-based function via
+# the ``utc`` modifier.
+SQLITE_EXTRACT_FORMATS = {
+    "year": "%Y",
+    "month": "%m",
+    "day": "%d",
+    "hour": "%H",
+    "minute": "%M",
+    "second": "%S",
+}
+
+
+def sqlite_extract(what, operand):
+    """
+    Render ``extract``/``epoch`` with SQLite's native ``strftime``.
+
+    ``+ 0`` turns the text result into an INTEGER (a ``CAST(... AS
+    INTEGER)`` would trip the ``AS <alias>`` colname parser). Unknown
+    units still go through the ``web2py_extract`` user function.
+    """
+    if what == "epoch":
+        return "(strftime('%%s', %s, 'utc') + 0)" % operand
+    if what in SQLITE_EXTRACT_FORMATS:
+        return "(strftime('%s', %s) + 0)" % (SQLITE_EXTRACT_FORMATS[what], operand)
+    return "web2py_extract('%s', %s)" % (what, operand)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_regexp(expression):
+    return re.compile(expression)
 
 
 def convert_date(val):
@@ -34,17 +75,25 @@ class SQLite(SQLAdapter):
     (stdlib). ``sqlite:memory`` uses a per-DAL shared in-memory
     database via the ``file:<uuid>?mode=memory&cache=shared`` URI.
 
-    Pool size is forced to 0 — SQLite connections aren't pool-safe
-    across threads.
+    Pooling is disabled for ``sqlite:memory``. For file databases a
+    ``pool_size > 0`` switches the file to WAL mode and splits the pool
+    into two lanes: up to ``pool_size`` idle reader connections, and a
+    single writer connection guarded by a per-database lock. A thread
+    starts on a reader and moves to the writer on its first write
+    statement; ``commit``/``rollback`` hand the writer back.
     """
 
     dbengine = "sqlite"
     drivers = ("sqlite2", "sqlite3")
 
+    cascade_batch_size = 1000
+
+    WRITER_LOCKS = {}
+
     def _initialize_(self):
-        self.pool_size = 0
         super(SQLite, self)._initialize_()
         if ":memory" in self.uri.split("://", 1)[0]:
+            self.pool_size = 0
             self.dbpath = "file:%s?mode=memory&cache=shared" % uuid.uuid4()
             self.driver_args["uri"] = True
         else:
@@ -67,6 +116,127 @@ class SQLite(SQLAdapter):
     def connector(self):
         return self.driver.Connection(self.dbpath, **self.driver_args)
 
+    @property
+    def _lane_uname_(self):
+        return "_pydal_sqlite_lane_%s_%s" % (id(self), os.getpid())
+
+    @property
+    def _pool_key_(self):
+        # a relative URI names a different file in every folder
+        return os.path.abspath(self.dbpath)
+
+    @property
+    def _writer_pool_key_(self):
+        return "%s#writer" % self._pool_key_
+
+    @property
+    def _writer_lock(self):
+        key = "%s#%s" % (self._pool_key_, os.getpid())
+        lock = SQLite.WRITER_LOCKS.get(key)
+        if lock is None:
+            with GLOBAL_LOCKER:
+                lock = SQLite.WRITER_LOCKS.setdefault(key, threading.Lock())
+        return lock
+
+    def _in_writer_lane(self):
+        return getattr(THREAD_LOCAL, self._lane_uname_, False)
+
+    def _acquire_writer(self):
+        """
+        Move the current thread onto the writer lane.
+
+        The reader connection (if any) goes back to the reader pool,
+        then the thread blocks on the writer lock for at most the
+        driver's busy ``timeout`` and binds the pooled writer
+        connection (opening it on first use).
+        """
+        reader = getattr(THREAD_LOCAL, self._connection_uname_, None)
+        if reader is not None:
+            self.cursor.close()
+            with GLOBAL_LOCKER:
+                pool = ConnectionPool.POOLS.setdefault(self._pool_key_, [])
+                if len(pool) < int(self.pool_size):
+                    pool.append(reader)
+                    reader = None
+            if reader is not None:
+                reader.close()
+            self.set_connection(None)
+        timeout = self.driver_args.get("timeout", 5.0)
+        if not self._writer_lock.acquire(timeout=timeout):
+            raise self.driver.OperationalError("database is locked")
+        setattr(THREAD_LOCAL, self._lane_uname_, True)
+        with GLOBAL_LOCKER:
+            pool = ConnectionPool.POOLS.setdefault(self._writer_pool_key_, [])
+            writer = pool.pop() if pool else None
+        try:
+            if writer is not None:
+                self.set_connection(writer, run_hooks=False)
+            else:
+                self.set_connection(self.connector(), run_hooks=True)
+        except Exception:
+            self._release_writer(broken=True)
+            raise
+
+    def _release_writer(self, broken=False):
+        """Hand the writer connection back to its lane and unlock it."""
+        writer = getattr(THREAD_LOCAL, self._connection_uname_, None)
+        if writer is not None:
+            try:
+                self.cursor.close()
+            except Exception:
+                broken = True
+            if not broken:
+                with GLOBAL_LOCKER:
+                    pool = ConnectionPool.POOLS.setdefault(self._writer_pool_key_, [])
+                    if not pool:
+                        pool.append(writer)
+                        writer = None
+            if writer is not None:
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+        self.set_connection(None)
+        setattr(THREAD_LOCAL, self._lane_uname_, False)
+        self._writer_lock.release()
+
+    def execute(self, *args, **kwargs):
+        if (
+            self.pool_size
+            and not self._in_writer_lane()
+            and not REGEX_SQLITE_READ.match(args[0])
+        ):
+            self._acquire_writer()
+        return super(SQLite, self).execute(*args, **kwargs)
+
+    def commit(self):
+        rv = super(SQLite, self).commit()
+        if self._in_writer_lane():
+            self._release_writer()
+        return rv
+
+    def rollback(self):
+        rv = super(SQLite, self).rollback()
+        if self._in_writer_lane():
+            self._release_writer()
+        return rv
+
+    def close(self, action="commit", really=True):
+        if self._in_writer_lane():
+            # Ending the transaction releases the writer; if the action
+            # fails, the writer connection is dropped instead.
+            try:
+                if callable(action):
+                    action(self)
+                elif action:
+                    getattr(self, action)()
+            except Exception:
+                pass
+            if self._in_writer_lane():
+                self._release_writer(broken=True)
+            return
+        super(SQLite, self).close(action, really)
+
     @staticmethod
     def web2py_extract(lookup, s):
         table = {
@@ -90,13 +260,28 @@ class SQLite(SQLAdapter):
     def web2py_regexp(expression, item):
         if item is None:
             return False
-        return re.compile(expression).search(item) is not None
+        return _compile_regexp(expression).search(item) is not None
+
+    def _create_function(self, name, num_params, func):
+        # deterministic=True lets SQLite use the function in indexes on
+        # expressions; older drivers/libraries don't know the flag.
+        try:
+            self.connection.create_function(
+                name, num_params, func, deterministic=True
+            )
+        except (TypeError, getattr(self.driver, "NotSupportedError", TypeError)):
+            self.connection.create_function(name, num_params, func)
 
     def _register_extract(self):
-        self.connection.create_function("web2py_extract", 2, self.web2py_extract)
+        self._create_function("web2py_extract", 2, self.web2py_extract)
 
     def _register_regexp(self):
-        self.connection.create_function("REGEXP", 2, self.web2py_regexp)
+        self._create_function("REGEXP", 2, self.web2py_regexp)
+
+    def _after_first_connection(self):
+        if self.pool_size:
+            # WAL lets the pooled readers run alongside the writer.
+            self.execute("PRAGMA journal_mode=WAL;")
 
     def after_connection(self):
         self._register_extract()
@@ -109,18 +294,93 @@ class SQLite(SQLAdapter):
             self.execute("BEGIN IMMEDIATE TRANSACTION;")
         return super(SQLite, self).select(query, fields, attributes)
 
+    def _schema_cascades(self, table, field):
+        """True when the child table's own FOREIGN KEY cascades ``field``."""
+        self.execute("PRAGMA foreign_key_list(%s);" % field.table._rname)
+        parent = table._raw_rname.lower()
+        for row in self.cursor.fetchall():
+            if (
+                row[2].lower() == parent
+                and row[3].lower() == field._raw_rname.lower()
+                and row[6].upper() == "CASCADE"
+            ):
+                return True
+        return False
+
+    def _cascade_fields(self, table):
+        """
+        CASCADE references to ``table`` that pydal has to apply itself,
+        i.e. the ones SQLite won't (``foreign_keys`` off, or a schema
+        created without ``ON DELETE CASCADE``).
+        """
+        fields = [
+            field
+            for field in table._referenced_by
+            if field.type == "reference " + table._dalname
+            and field.ondelete == "CASCADE"
+        ]
+        if fields:
+            self.execute("PRAGMA foreign_keys;")
+            if self.cursor.fetchone()[0]:
+                fields = [f for f in fields if not self._schema_cascades(table, f)]
+        return fields
+
+    def _cascades_cyclic(self, table):
+        """True if ``table`` can reach itself through pydal-side cascades."""
+        seen, stack = set(), [table]
+        while stack:
+            for field in self._cascade_fields(stack.pop()):
+                if field.table is table:
+                    return True
+                if field.tablename not in seen:
+                    seen.add(field.tablename)
+                    stack.append(field.table)
+        return False
+
     def delete(self, table, query):
+        cascades = self._cascade_fields(table)
+        if not cascades:
+            return super(SQLite, self).delete(table, query)
         db = self.db
-        deleted = [x[table._id.name] for x in db(query).select(table._id)]
-        counter = super(SQLite, self).delete(table, query)
-        if counter:
-            for field in table._referenced_by:
-                if (
-                    field.type == "reference " + table._dalname
-                    and field.ondelete == "CASCADE"
-                ):
+        if self._cascades_cyclic(table):
+            # A subquery chain never bottoms out on cyclic data: fall
+            # back to deleting by materialized ids.
+            deleted = [x[table._id.name] for x in db(query).select(table._id)]
+            counter = super(SQLite, self).delete(table, query)
+            if counter:
+                for field in cascades:
                     db(field.belongs(deleted)).delete()
-        return counter
+            return counter
+        # Each batch's ids are frozen in a temp table before any child
+        # is deleted: ``query`` may depend on the children, so it must
+        # not be evaluated again once they start going. The ids never
+        # leave the database.
+        batch_size = self.adapter_args.get(
+            "cascade_batch_size", self.cascade_batch_size
+        )
+        ids = self.dialect.quote("pydal_cascade_%s" % table._dalname)
+        self.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS %s (id INTEGER PRIMARY KEY);" % ids
+        )
+        batch = "SELECT id FROM %s;" % ids
+        counter = 0
+        try:
+            while True:
+                self.execute("DELETE FROM %s;" % ids)
+                sql = db(query)._select(
+                    table._id, orderby=table._id, limitby=(0, batch_size)
+                )
+                self.execute("INSERT INTO %s (id) %s" % (ids, sql))
+                selected = self.cursor.rowcount
+                for field in cascades:
+                    db(field.belongs(batch)).delete()
+                counter += super(SQLite, self).delete(
+                    table, table._id.belongs(batch)
+                )
+                if selected < batch_size:
+                    return counter
+        finally:
+            self.execute("DELETE FROM %s;" % ids)
 
 
 @adapters.register_for("spatialite", "spatialite:memory")
@@ -177,8 +437,8 @@ class SQLiteDialect(SQLDialect):
 
     SQLite is dynamically typed at the value level — most column types
     map to broad affinities (``CHAR``, ``DOUBLE``, ``INTEGER``, ...).
-    Regexp is routed through a user function (``web2py_extract`` for
-    EXTRACT, ``REGEXP`` operator for matching).
+    EXTRACT maps onto native ``strftime``; regexp matching is routed
+    through the ``REGEXP`` user function.
     """
 
     @sqltype_for("string")
@@ -199,10 +459,7 @@ class SQLiteDialect(SQLDialect):
         return self.types["float"]
 
     def extract(self, field, what, query_env={}):
-        return "web2py_extract('%s', %s)" % (
-            what,
-            self.expand(field, query_env=query_env),
-        )
+        return sqlite_extract(what, self.expand(field, query_env=query_env))
 
     def regexp(self, first, second, match_parameter=None, query_env={}):
         return "(%s REGEXP %s)" % (
@@ -245,6 +502,24 @@ class SQLiteDialect(SQLDialect):
             "DELETE FROM sqlite_sequence WHERE name=%s" % tablename,
         ]
 
+    def rename_column(self, table_rname, old_rname, new_rname):
+        # RENAME COLUMN appeared in SQLite 3.25.0
+        version = getattr(self.adapter.driver, "sqlite_version_info", (0,))
+        if version < (3, 25, 0):
+            return None
+        return "ALTER TABLE %s RENAME COLUMN %s TO %s;" % (
+            table_rname,
+            old_rname,
+            new_rname,
+        )
+
+    def window_count(self):
+        # window functions appeared in SQLite 3.25.0
+        version = getattr(self.adapter.driver, "sqlite_version_info", (0,))
+        if version < (3, 25, 0):
+            return None
+        return "COUNT(*) OVER ()"
+
     def writing_alias(self, table):
         if table._dalname != table._tablename:
             raise SyntaxError("SQLite does not support UPDATE/DELETE on aliased table")
@@ -43,6 +43,7 @@ connection that succeeds — useful for replication / failover.
 """
 
 import contextlib
+import functools
 import glob
 import logging
 import os
@@ -64,6 +65,7 @@ from .backend_base import BaseAdapter, NullAdapter
 from .default_validators import default_validators
 from .helpers.classes import (
     BasicStorage,
+    LazyList,
     RecordDeleter,
     RecordUpdater,
     Serializable,
@@ -80,7 +82,7 @@ from .helpers.methods import (
 from .helpers.regex import REGEX_DBNAME, REGEX_PYTHON_KEYWORDS
 from .helpers.rest import RestParser
 from .helpers.serializers import serializers
-from .objects import Field, Row, Rows, Set, Table
+from .objects import Field, Row, Rows, Set, Table, get_default_validator
 
 TABLE_ARGS = set(
     (
@@ -98,6 +100,7 @@ TABLE_ARGS = set(
         "table_class",
         "on_define",
         "rname",
+        "indexes",
     )
 )
 
@@ -262,9 +265,15 @@ class DAL(Serializable, BasicStorage, metaclass=MetaDAL):
                     dbstats=[(row[0], row[1]) for row in db._timings],
                     dbtables={
                         "defined": sorted(
-                            list(set(db.tables) - set(db._LAZY_TABLES.keys()))
+                            list(
+                                set(db.tables)
+                                - set(db._LAZY_TABLES)
+                                - set(db._TEMPLATE_TABLES)
+                            )
+                        ),
+                        "lazy": sorted(
+                            set(db._LAZY_TABLES) | set(db._TEMPLATE_TABLES)
                         ),
-                        "lazy": sorted(db._LAZY_TABLES.keys()),
                     },
                 )
         return infos
@@ -419,6 +428,14 @@ class DAL(Serializable, BasicStorage, metaclass=MetaDAL):
         self._migrated = []
         self._LAZY_TABLES = {}
         self._lazy_tables = lazy_tables
+        self._TEMPLATE_TABLES = {}
+        self._schema_frozen = False
+        # tablename -> count of writes through this DAL, and the
+        # IS_IN_DB option sets checked against it
+        self._table_versions = {}
+        self._options_cache = {}
+        # pattern key -> RestRoutes compiled by parse_as_rest
+        self._rest_routes = {}
         self._tables = SQLCallableList()
         self._aliased_tables = threading.local()
         self._driver_args = driver_args
@@ -557,6 +574,7 @@ class DAL(Serializable, BasicStorage, metaclass=MetaDAL):
                 tfile = self._adapter.migrator.file_open(filename, "rb")
                 try:
                     sql_fields = pickle.load(tfile)
+                    sql_fields.pop("_indexes", None)
                     name = filename[len(pattern) - 7 : -6]
                     mf = [
                         (
@@ -610,7 +628,7 @@ class DAL(Serializable, BasicStorage, metaclass=MetaDAL):
         ``fake_migrate``, ``primarykey``, ``format``, ``redefine``,
         ``singular``, ``plural``, ``trigger_name``, ``sequence_name``,
         ``fields``, ``common_filter``, ``table_class``, ``on_define``,
-        ``rname``).
+        ``rname``, ``indexes``).
 
         Returns the new ``Table`` (or ``None`` when ``lazy_tables`` is
         enabled and the table hasn't been materialized yet).
@@ -624,9 +642,14 @@ class DAL(Serializable, BasicStorage, metaclass=MetaDAL):
             fields = kwargs.get("fields", ())
         if not isinstance(tablename, str):
             raise SyntaxError("missing table name")
+        if self._schema_frozen:
+            raise RuntimeError(
+                "cannot define %s: the schema of this DAL is frozen" % tablename
+            )
         redefine = kwargs.get("redefine", False)
         if tablename in self.tables:
             if redefine:
+                self._TEMPLATE_TABLES.pop(tablename, None)
                 try:
                     delattr(self, tablename)
                 except AttributeError:
@@ -674,11 +697,22 @@ class DAL(Serializable, BasicStorage, metaclass=MetaDAL):
         self[tablename] = table
         # must follow above line to handle self references
         table._create_references()
+        # reference fields whose validators/represent are derived here
+        # point at this DAL; from_template re-derives them per copy
+        table._auto_references = []
         for field in table:
-            if field.requires is DEFAULT:
+            auto_requires = field.requires is DEFAULT
+            if auto_requires:
                 field.requires = auto_validators(field)
-            if field.represent is None:
+            auto_represent_ = field.represent is None
+            if auto_represent_:
                 field.represent = auto_represent(field)
+            if (auto_requires or auto_represent_) and isinstance(
+                field.type, str
+            ) and field.type.startswith(("reference", "list:reference")):
+                table._auto_references.append(
+                    (field.name, auto_requires, auto_represent_)
+                )
 
         if self._adapter.dbengine == "firestore" or self._uri in (None, "None"):
             migrate = False
@@ -704,6 +738,113 @@ class DAL(Serializable, BasicStorage, metaclass=MetaDAL):
             on_define(table)
         return table
 
+    def freeze_schema(self):
+        """
+        Turn this DAL into a schema template for ``DAL.from_template``.
+
+        Lazy tables are materialized and any later ``define_table``
+        raises ``RuntimeError``, so the ``Table``/``Field`` objects can
+        be shared safely by every DAL built from the template. Returns
+        ``self``.
+        """
+        for tablename in list(self._LAZY_TABLES):
+            self[tablename]
+        self._schema_frozen = True
+        return self
+
+    @classmethod
+    def from_template(cls, template_db, uri=DEFAULT, **kwargs):
+        """
+        Build a DAL whose tables are copy-on-write views of the frozen
+        ``template_db``'s tables.
+
+        Nothing is defined or migrated: each template table is copied
+        and bound to the new DAL on first access, which is much cheaper
+        than running ``define_table`` again. ``uri`` and the connection
+        settings (``pool_size``, ``folder``, ...) default to the
+        template's; other kwargs are passed to ``DAL``. Tables defined
+        on the new DAL (or redefined with ``redefine=True``) are its own.
+
+        Run migrations once, on the template, since the copies skip
+        them. pydal's upload and record-versioning hooks, and
+        ``IS_IN_DB``/``IS_NOT_IN_DB`` validators built on the template,
+        are rebound to the new DAL; other table callbacks and validators
+        are shared with the template.
+
+        Raises:
+            RuntimeError: if ``template_db`` hasn't been frozen.
+            ValueError: if the new DAL uses another dialect.
+        """
+        if not template_db._schema_frozen:
+            raise RuntimeError("call freeze_schema() on the template DAL first")
+        for key in (
+            "pool_size",
+            "folder",
+            "db_codec",
+            "check_reserved",
+            "decode_credentials",
+            "driver_args",
+            "adapter_args",
+            "attempts",
+            "bigint_id",
+            "ignore_field_case",
+        ):
+            kwargs.setdefault(key, getattr(template_db, "_" + key))
+        kwargs.setdefault("table_hash", template_db._uri_hash)
+        db = cls(template_db._uri if uri is DEFAULT else uri, **kwargs)
+        if type(db._adapter.dialect) is not type(template_db._adapter.dialect):
+            raise ValueError(
+                "template uses %s, cannot bind it to %s"
+                % (
+                    type(template_db._adapter.dialect).__name__,
+                    type(db._adapter.dialect).__name__,
+                )
+            )
+        for tablename in template_db.tables:
+            db._TEMPLATE_TABLES[tablename] = template_db[tablename]
+            db.tables.append(tablename)
+        return db
+
+    def _table_from_template(self, template):
+        table = template._copy_for(self)
+        tablename = table._tablename
+        self[tablename] = table
+        # must follow above line: references may lead back to this table
+        for field in table:
+            referent = getattr(field, "referent", None)
+            if referent is not None and referent.tablename in self:
+                field.referent = self[referent.tablename][referent.name]
+                if field.has_default_validator():
+                    field.requires = get_default_validator(field)
+        table._references = [
+            table[field.name] for field in getattr(template, "_references", [])
+        ]
+        # back-references are resolved on first use, so touching a
+        # table doesn't copy every table that references it
+        for name in ("_referenced_by", "_referenced_by_list"):
+            table[name] = LazyList(
+                functools.partial(
+                    self._fields_from_template, getattr(template, name, [])
+                )
+            )
+        for name, auto_requires, auto_represent_ in getattr(
+            template, "_auto_references", ()
+        ):
+            field = table[name]
+            if auto_requires:
+                field.requires = auto_validators(field)
+            if auto_represent_:
+                field.represent = None
+                field.represent = auto_represent(field)
+        return table
+
+    def _fields_from_template(self, template_fields):
+        return [
+            self[field.tablename][field.name]
+            for field in template_fields
+            if field.tablename in self
+        ]
+
     def as_dict(self, flat=False, sanitize=True):
         db_uid = uri = None
         if not sanitize:
@@ -759,6 +900,9 @@ class DAL(Serializable, BasicStorage, metaclass=MetaDAL):
         ) and key in object.__getattribute__(self, "_LAZY_TABLES"):
             tablename, fields, kwargs = self._LAZY_TABLES.pop(key)
             return self.lazy_define_table(tablename, *fields, **kwargs)
+        template_tables = self.__dict__.get("_TEMPLATE_TABLES")
+        if template_tables and key in template_tables:
+            return self._table_from_template(template_tables.pop(key))
         aliased_tables = object.__getattribute__(self, "_aliased_tables")
         aliased = getattr(aliased_tables, key, None)
         if aliased:
@@ -162,6 +162,9 @@ class SQLCompiler:
         # ``belongs(set.subselect(...))``). Lets correlated subqueries
         # prune outer-scoped tables from their own FROM clause.
         self._scope_stack: list = []
+        # Set while compiling an index key or predicate: columns render
+        # unqualified, as CREATE INDEX requires.
+        self._index_columns: bool = False
 
     # ------------------------------------------------------------------ entry
 
@@ -192,6 +195,18 @@ class SQLCompiler:
             self._ctx = None
         return ParamSQL(sql, ctx.params) if ctx is not None else sql
 
+    def compile_index_expression(self, node: ast.Node) -> str:
+        """
+        Compile an index key or partial-index predicate. DDL takes no
+        bound parameters, so literals are always inlined, and columns
+        render as bare (unqualified) names.
+        """
+        self._index_columns = True
+        try:
+            return self.visit(node)
+        finally:
+            self._index_columns = False
+
     # ----- statement entry points (Layer 2c) -----
 
     def compile_select(self, n: ast.Select):
@@ -509,6 +524,12 @@ class SQLCompiler:
         # Translator usually bakes the pre-formatted SQL identifier
         # into the node (it knows about rname + table aliasing). For
         # hand-built nodes in unit tests, fall back to default quoting.
+        if self._index_columns:
+            if self.adapter is not None:
+                t = self.adapter.db.get(n.table)
+                if t is not None and n.name in t.fields:
+                    return t[n.name]._rname
+            return self.q(n.name)
         if n.sqlsafe is not None:
             return n.sqlsafe
         if self.adapter is not None:
@@ -554,8 +575,11 @@ class SQLCompiler:
         * ``time`` -> ``"HH:MM:SS"`` (with truncation matching the legacy
           slice ``[:10]`` — preserved for bug-for-bug compatibility)
         * ``datetime`` -> ``"YYYY-MM-DD<sep>HH:MM:SS"``
+        * ``password`` -> ``str(value)`` (hashes a ``CRYPT`` ``LazyCrypt``)
         * everything else: passthrough (driver handles native types).
         """
+        if type_ == "password":
+            return value if value is None else str(value)
         if type_ == "boolean":
             if value and str(value)[:1].upper() not in "0F":
                 return self.true_token
@@ -891,7 +915,7 @@ class SQLCompiler:
         return "LENGTH(%s)" % self.visit(x)
 
     def un_epoch(self, x, _):
-        """Render ``EXTRACT(epoch FROM operand)`` — SQLite overrides via ``web2py_extract``."""
+        """Render ``EXTRACT(epoch FROM operand)`` — SQLite overrides with ``strftime``."""
         return "EXTRACT(epoch FROM %s)" % self.visit(x)
 
     def un_coalesce_zero(self, x, _):
@@ -918,7 +942,7 @@ class SQLCompiler:
         return "CAST(%s AS %s)" % (self.visit(args[0]), opts.get("to", ""))
 
     def fn_extract(self, args, opts):
-        """Render ``EXTRACT(<unit> FROM arg)`` — SQLite overrides for ``web2py_extract``."""
+        """Render ``EXTRACT(<unit> FROM arg)`` — SQLite overrides with ``strftime``."""
         return "EXTRACT(%s FROM %s)" % (opts.get("unit", ""), self.visit(args[0]))
 
     def fn_replace(self, args, _):
@@ -3,8 +3,8 @@ SQLiteCompiler: SQLite-specific overrides.
 
 Mirrors the deltas in pydal/dialects/sqlite.py:
 
-* ``extract`` uses the ``web2py_extract`` user function instead of the
-  ANSI ``EXTRACT`` syntax.
+* ``extract`` / ``epoch`` use native ``strftime`` instead of the ANSI
+  ``EXTRACT`` syntax.
 * ``regexp`` emits a plain ``(left REGEXP right)`` (no ESCAPE clause).
 
 Everything else inherits from SQLCompiler unchanged.
@@ -12,7 +12,7 @@ Everything else inherits from SQLCompiler unchanged.
 
 from __future__ import annotations
 
-from ..backends.sqlite import SQLite
+from ..backends.sqlite import SQLite, sqlite_extract
 from . import compilers
 from .sql import SQLCompiler
 
@@ -21,8 +21,8 @@ from .sql import SQLCompiler
 class SQLiteCompiler(SQLCompiler):
     """
     SQLite-specific compiler. Defaults to parameterized SQL with
-    ``?`` placeholders; rejects ``DISTINCT ON``; routes date extraction
-    through the ``web2py_extract`` user function.
+    ``?`` placeholders; rejects ``DISTINCT ON``; renders date extraction
+    with native ``strftime``.
     """
 
     # Parameterize by default on SQLite: ``?`` placeholders are
@@ -42,15 +42,12 @@ class SQLiteCompiler(SQLCompiler):
         return super()._compile_select_body(n)
 
     def fn_extract(self, args, opts):
-        """SQLite extract via the ``web2py_extract`` user function."""
-        return "web2py_extract('%s', %s)" % (
-            opts.get("unit", ""),
-            self.visit(args[0]),
-        )
+        """SQLite extract via ``strftime(<fmt>, arg)``."""
+        return sqlite_extract(opts.get("unit", ""), self.visit(args[0]))
 
     def un_epoch(self, x, _):
-        """SQLite epoch via ``web2py_extract('epoch', ...)``."""
-        return "web2py_extract('epoch', %s)" % self.visit(x)
+        """SQLite epoch via ``strftime('%s', ..., 'utc')``."""
+        return sqlite_extract("epoch", self.visit(x))
 
     def op_regexp(self, l, r, _):
         """Render ``(left REGEXP right)`` — SQLite uses no ESCAPE clause."""
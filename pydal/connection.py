@@ -6,9 +6,10 @@ DB-API connection pool mixed into ``BaseAdapter``.
 
 Connection state (the connection object and its cursor) is kept on
 ``THREAD_LOCAL`` so multiple threads sharing an adapter don't trample
-each other. The class-level ``POOLS`` dict maps a connection URI to
-a free-list of reusable connections; pulling from the free-list
-amortizes connect cost across requests.
+each other. The class-level ``POOLS`` dict maps a pool key (the
+connection URI, unless the adapter resolves it further) to a free-list
+of reusable connections; pulling from the free-list amortizes connect
+cost across requests.
 
 Public surface (all consumed via composition into adapters):
 
@@ -52,6 +53,11 @@ class ConnectionPool:
         """Per-pid, per-instance key for storing the cursor on THREAD_LOCAL."""
         return "_pydal_cursor_%s_%s" % (id(self), os.getpid())
 
+    @property
+    def _pool_key_(self) -> str:
+        """Key of the ``POOLS`` free-list this adapter's connections go to."""
+        return self.uri
+
     @staticmethod
     def set_folder(folder: str) -> None:
         """
@@ -88,8 +94,8 @@ class ConnectionPool:
         if use_pool and self.pool_size:
             try:
                 GLOBAL_LOCKER.acquire()
-                pool = ConnectionPool.POOLS.get(self.uri, [])
-                ConnectionPool.POOLS[self.uri] = pool
+                pool = ConnectionPool.POOLS.get(self._pool_key_, [])
+                ConnectionPool.POOLS[self._pool_key_] = pool
                 # Pop until we find a usable connection (or exhaust pool).
                 while connection is None and pool:
                     connection = pool.pop()
@@ -183,7 +189,7 @@ class ConnectionPool:
         if self.pool_size and succeeded:
             try:
                 GLOBAL_LOCKER.acquire()
-                pool = ConnectionPool.POOLS[self.uri]
+                pool = ConnectionPool.POOLS[self._pool_key_]
                 if len(pool) < int(self.pool_size):
                     pool.append(self.connection)
                     really = False
@@ -15,8 +15,6 @@ corresponding range/format validators.
 
 from typing import Any, List, Optional, Union
 
-from . import validators
-
 
 def default_validators(db, field) -> Optional[Union[Any, List[Any]]]:
     """
@@ -33,6 +31,8 @@ def default_validators(db, field) -> Optional[Union[Any, List[Any]]]:
     ``field.length`` and the field's type. References point at the
     referenced table via ``IS_IN_DB``.
     """
+    from . import validators
+
     field_type = field.type
     field_unique = field.unique
     field_notnull = field.notnull
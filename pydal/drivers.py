@@ -1,11 +1,13 @@
 """
 Registry of available DB-API Python drivers.
 
-Each backend's driver module is probed by ``try / except ImportError``
-at module load time. Whatever's importable is added to ``DRIVERS`` so
-``find_driver()`` in the adapter base can pick it up later.
+Drivers are probed lazily: ``DRIVERS`` is a dict that imports a driver
+module the first time its name is looked up (``name in DRIVERS``,
+``DRIVERS[name]``, ``DRIVERS.get(name)``), so ``import pydal`` never
+pays for drivers that the chosen URI doesn't use. Whatever's importable
+ends up in the dict; iterating it probes every known driver.
 
-Module-level constants exposed for adapters:
+Module-level names exposed for adapters, resolved on first access:
 
 * ``DRIVERS`` — ``{driver_name: module}`` mapping of installed drivers.
 * ``is_jdbc`` — True when the zxJDBC driver is importable (Jython).
@@ -13,214 +15,162 @@ Module-level constants exposed for adapters:
 * ``cx_Oracle`` — the cx_Oracle module, or None.
 * ``pyodbc`` — pyodbc (or pypyodbc fallback) module, or None.
 * ``couchdb`` — couchdb module, or None.
-
-The unconditional ``None`` assignments at the top guarantee the names
-exist regardless of which drivers are present — a previous version
-only set them inside one ``try`` branch, leaving them unbound when
-that branch's import failed.
+* ``snowflakeconnector`` — snowflake.connector module, or None.
 """
 
-from typing import Any, Dict, Optional
+import importlib
+import threading
+from typing import Any, Callable, Dict
 
-DRIVERS: Dict[str, Any] = {}
 
-# Default sentinels — overwritten below if the relevant driver is
-# present. Keeping them defined unconditionally avoids NameError when
-# adapters do ``from ..drivers import psycopg2_adapt`` etc. on systems
-# where the driver isn't installed.
-psycopg2_adapt: Optional[Any] = None
-cx_Oracle: Optional[Any] = None
-pyodbc: Optional[Any] = None
-couchdb: Optional[Any] = None
-is_jdbc: bool = False
+def _module(name: str) -> Callable[[], Any]:
+    return lambda: importlib.import_module(name)
 
 
-try:
+def _firestore() -> Any:
     from google.cloud import firestore
     from google.cloud.firestore_v1.base_query import FieldFilter  # noqa: F401
 
-    DRIVERS["firestore"] = firestore
-except ImportError:
-    pass
-
-try:
-    from pysqlite2 import dbapi2 as sqlite2
-
-    DRIVERS["sqlite2"] = sqlite2
-except ImportError:
-    pass
-
-try:
-    from sqlite3 import dbapi2 as sqlite3
-
-    DRIVERS["sqlite3"] = sqlite3
-except ImportError:
-    pass
-
-try:
-    import pymysql
-
-    DRIVERS["pymysql"] = pymysql
-except ImportError:
-    pass
-
-try:
-    import snowflake.connector as snowflakeconnector
-
-    DRIVERS["snowflakeconnector"] = snowflakeconnector
-except ImportError:
-    pass
-
-try:
-    import MySQLdb
-
-    DRIVERS["MySQLdb"] = MySQLdb
-except ImportError:
-    pass
-
-try:
-    import mysql.connector as mysqlconnector
+    return firestore
 
-    DRIVERS["mysqlconnector"] = mysqlconnector
-except ImportError:
-    pass
 
-try:
-    import psycopg2
-    from psycopg2.extensions import adapt as psycopg2_adapt
-
-    DRIVERS["psycopg2"] = psycopg2
-except ImportError:
-    pass
-
-try:
-    import cx_Oracle  # noqa: F811
-
-    DRIVERS["cx_Oracle"] = cx_Oracle
-except ImportError:
-    pass
-
-try:
-    import pyodbc  # noqa: F811
-
-    DRIVERS["pyodbc"] = pyodbc
-except ImportError:
-    pyodbc = None
+def _pyodbc() -> Any:
     try:
-        import pypyodbc as pyodbc  # noqa: F811
-
-        DRIVERS["pyodbc"] = pyodbc
+        return importlib.import_module("pyodbc")
     except ImportError:
-        pass
-
-try:
-    import ibm_db_dbi
-
-    DRIVERS["ibm_db_dbi"] = ibm_db_dbi
-except ImportError:
-    pass
-
-try:
-    import Sybase
-
-    DRIVERS["Sybase"] = Sybase
-except ImportError:
-    pass
-
-try:
-    import kinterbasdb
+        return importlib.import_module("pypyodbc")
 
-    DRIVERS["kinterbasdb"] = kinterbasdb
-except ImportError:
-    pass
 
-try:
-    import fdb
-
-    DRIVERS["fdb"] = fdb
-except ImportError:
-    pass
-
-try:
-    import firebirdsql
-
-    DRIVERS["firebirdsql"] = firebirdsql
-except ImportError:
-    pass
-
-try:
-    import informixdb
-
-    DRIVERS["informixdb"] = informixdb
-except ImportError:
-    pass
-
-try:
-    import sapdb
-
-    DRIVERS["sapdb"] = sapdb
-except ImportError:
-    pass
-
-try:
-    import cubriddb
-
-    DRIVERS["cubriddb"] = cubriddb
-except ImportError:
-    pass
-
-try:
-    import java.sql
+def _zxJDBC() -> Any:
+    import java.sql  # noqa: F401
     from com.ziclix.python.sql import zxJDBC
 
     # The org.sqlite Jython driver is needed by java.sql for sqlite
     # over JDBC; the side-effect import is intentional.
     from org.sqlite import JDBC  # noqa: F401
 
-    zxJDBC_sqlite = java.sql.DriverManager
-    DRIVERS["zxJDBC"] = zxJDBC
-    is_jdbc = True
-except ImportError:
-    pass
-
-try:
-    import couchdb  # noqa: F811
-
-    DRIVERS["couchdb"] = couchdb
-except ImportError:
-    pass
-
-try:
-    import pymongo
-
-    DRIVERS["pymongo"] = pymongo
-except ImportError:
-    pass
-
-try:
-    import imaplib
-
-    DRIVERS["imaplib"] = imaplib
-except ImportError:
-    pass
-
-try:
-    import pytds
-
-    DRIVERS["pytds"] = pytds
-except ImportError:
-    pass
-
-try:
-    import pymssql
-
-    DRIVERS["pymssql"] = pymssql
-except ImportError:
-    pass
-
-try:
-    import mssql_python
-
-    DRIVERS["mssql-python"] = mssql_python
-except ImportError:
-    pass
+    return zxJDBC
+
+
+#: driver name -> loader returning the module or raising ImportError.
+DRIVER_LOADERS: Dict[str, Callable[[], Any]] = {
+    "firestore": _firestore,
+    "sqlite2": _module("pysqlite2.dbapi2"),
+    "sqlite3": _module("sqlite3.dbapi2"),
+    "pymysql": _module("pymysql"),
+    "snowflakeconnector": _module("snowflake.connector"),
+    "MySQLdb": _module("MySQLdb"),
+    "mysqlconnector": _module("mysql.connector"),
+    "psycopg2": _module("psycopg2"),
+    "cx_Oracle": _module("cx_Oracle"),
+    "pyodbc": _pyodbc,
+    "ibm_db_dbi": _module("ibm_db_dbi"),
+    "Sybase": _module("Sybase"),
+    "kinterbasdb": _module("kinterbasdb"),
+    "fdb": _module("fdb"),
+    "firebirdsql": _module("firebirdsql"),
+    "informixdb": _module("informixdb"),
+    "sapdb": _module("sapdb"),
+    "cubriddb": _module("cubriddb"),
+    "zxJDBC": _zxJDBC,
+    "couchdb": _module("couchdb"),
+    "pymongo": _module("pymongo"),
+    "imaplib": _module("imaplib"),
+    "pytds": _module("pytds"),
+    "pymssql": _module("pymssql"),
+    "mssql-python": _module("mssql_python"),
+}
+
+
+class LazyDrivers(dict):
+    """``{driver_name: module}`` dict that imports each driver on demand."""
+
+    def __init__(self, loaders: Dict[str, Callable[[], Any]]):
+        super().__init__()
+        self._pending = dict(loaders)
+        self._lock = threading.Lock()
+
+    def _probe(self, name: Any) -> None:
+        if name not in self._pending:
+            return
+        with self._lock:
+            loader = self._pending.pop(name, None)
+            if loader is None:
+                return
+            try:
+                dict.__setitem__(self, name, loader())
+            except ImportError:
+                pass
+
+    def probe_all(self) -> None:
+        """Import every known driver (what the old eager module did)."""
+        for name in list(self._pending):
+            self._probe(name)
+
+    def __contains__(self, name: Any) -> bool:
+        self._probe(name)
+        return dict.__contains__(self, name)
+
+    def __getitem__(self, name: Any) -> Any:
+        self._probe(name)
+        return dict.__getitem__(self, name)
+
+    def get(self, name: Any, default: Any = None) -> Any:
+        self._probe(name)
+        return dict.get(self, name, default)
+
+    def __iter__(self):
+        self.probe_all()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        self.probe_all()
+        return dict.__len__(self)
+
+    def keys(self):
+        self.probe_all()
+        return dict.keys(self)
+
+    def values(self):
+        self.probe_all()
+        return dict.values(self)
+
+    def items(self):
+        self.probe_all()
+        return dict.items(self)
+
+    def __repr__(self) -> str:
+        self.probe_all()
+        return dict.__repr__(self)
+
+
+DRIVERS: Dict[str, Any] = LazyDrivers(DRIVER_LOADERS)
+
+
+def _psycopg2_adapt() -> Any:
+    if "psycopg2" not in DRIVERS:
+        return None
+    from psycopg2.extensions import adapt
+
+    return adapt
+
+
+# Names adapters import with ``from ..drivers import <name>``. They
+# always exist (``None`` when the driver is missing) but are computed
+# on first access so importing this module stays free.
+_LAZY_ATTRIBUTES: Dict[str, Callable[[], Any]] = {
+    "psycopg2_adapt": _psycopg2_adapt,
+    "cx_Oracle": lambda: DRIVERS.get("cx_Oracle"),
+    "pyodbc": lambda: DRIVERS.get("pyodbc"),
+    "couchdb": lambda: DRIVERS.get("couchdb"),
+    "snowflakeconnector": lambda: DRIVERS.get("snowflakeconnector"),
+    "is_jdbc": lambda: "zxJDBC" in DRIVERS,
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        value = _LAZY_ATTRIBUTES[name]()
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
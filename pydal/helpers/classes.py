@@ -22,6 +22,8 @@ Internal:
 * ``cachedprop`` — read-only property cached on first access.
 * ``SQLCallableList`` — ``list`` subclass that returns a shallow copy
   when called (used as ``db.tables``).
+* ``LazyList`` — ``list`` filled by a loader on first use (used for the
+  back-references of tables copied from a schema template).
 * ``RecordOperator`` / ``RecordUpdater`` / ``RecordDeleter`` —
   per-row update/delete shortcuts attached to fetched ``Row``s.
 * ``MethodAdder`` — decorator used by ``table.methods.add``.
@@ -336,6 +338,63 @@ class SQLCallableList(list):
         return copy.copy(self)
 
 
+class LazyList(list):
+    """
+    ``list`` whose items come from ``loader()`` the first time the list
+    is read or changed.
+    """
+
+    def __init__(self, loader: Callable[[], Any]):
+        super().__init__()
+        self._loader: Optional[Callable[[], Any]] = loader
+
+    def _load(self) -> None:
+        loader, self._loader = self._loader, None
+        if loader is not None:
+            list.extend(self, loader())
+
+    def _loading(name):
+        method = getattr(list, name)
+
+        def wrapper(self, *args, **kwargs):
+            self._load()
+            return method(self, *args, **kwargs)
+
+        wrapper.__name__ = name
+        return wrapper
+
+    for _name in (
+        "__iter__",
+        "__len__",
+        "__getitem__",
+        "__contains__",
+        "__eq__",
+        "__ne__",
+        "__repr__",
+        "__reversed__",
+        "__add__",
+        "__iadd__",
+        "__setitem__",
+        "__delitem__",
+        "append",
+        "extend",
+        "insert",
+        "remove",
+        "pop",
+        "index",
+        "count",
+        "copy",
+        "sort",
+        "reverse",
+        "clear",
+    ):
+        locals()[_name] = _loading(_name)
+    del _name, _loading
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+
 class SQLALL:
     """
     Marker emitted by ``Table.ALL`` that expands to every field of a
@@ -616,6 +675,11 @@ class DatabaseStoredFile:
     def escape(self, obj):
         return self.db._adapter.escape(obj)
 
+    @staticmethod
+    def placeholder(db) -> str:
+        """The driver's parameter placeholder (``?`` for sqlite, else ``%s``)."""
+        return "?" if db._adapter.dbengine == "sqlite" else "%s"
+
     @staticmethod
     def try_create_web2py_filesystem(db) -> None:
         """Ensure the ``web2py_filesystem`` table exists on ``db``."""
@@ -647,8 +711,10 @@ class DatabaseStoredFile:
         self.p = 0
         self.data = b""
         if mode in ("r", "rw", "rb", "a", "ab"):
-            query = "SELECT content FROM web2py_filesystem WHERE path='%s'" % filename
-            rows = self.db.executesql(query)
+            query = "SELECT content FROM web2py_filesystem WHERE path=%s" % (
+                DatabaseStoredFile.placeholder(db)
+            )
+            rows = self.db.executesql(query, (filename,))
             if rows:
                 self.data = to_bytes(rows[0][0])
             elif exists(filename):
@@ -684,10 +750,11 @@ class DatabaseStoredFile:
     def close_connection(self) -> None:
         """Persist the buffer to the database, replacing any prior content."""
         if self.db is not None:
+            placeholder = DatabaseStoredFile.placeholder(self.db)
             self.db.executesql(
-                "DELETE FROM web2py_filesystem WHERE path='%s'" % self.filename
+                "DELETE FROM web2py_filesystem WHERE path=%s" % placeholder,
+                (self.filename,),
             )
-            placeholder = "?" if self.db._adapter.dbengine == "sqlite" else "%s"
             query = (
                 "INSERT INTO web2py_filesystem(path,content) VALUES (%(placeholder)s, %(placeholder)s)"
                 % {"placeholder": placeholder}
@@ -722,9 +789,11 @@ class DatabaseStoredFile:
 
         DatabaseStoredFile.try_create_web2py_filesystem(db)
 
-        query = "SELECT path FROM web2py_filesystem WHERE path='%s'" % filename
+        query = "SELECT path FROM web2py_filesystem WHERE path=%s" % (
+            DatabaseStoredFile.placeholder(db)
+        )
         try:
-            if db.executesql(query):
+            if db.executesql(query, (filename,)):
                 return True
         except Exception as e:
             if not (
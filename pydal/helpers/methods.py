@@ -34,6 +34,9 @@ from .regex import REGEX_CONST_STRING, REGEX_CREDENTIALS, REGEX_UNPACK, REGEX_W
 
 UNIT_SEPARATOR = "\x1f"  # ASCII unit separator for delimiting data
 
+# SQL types of text columns that can't be compared with <>
+LOB_TYPES = ("CLOB", "NCLOB", "NTEXT")
+
 
 PLURALIZE_RULES = [
     (re.compile('child$'), re.compile('child$'), 'children'),
@@ -206,11 +209,48 @@ def archive_record(qset, fs, archive_table, current_record) -> bool:
     one of the about-to-change fields differs from the new value.
 
     Used by ``_enable_record_versioning`` as an ``_before_update``
-    callback. Returns ``False`` so the surrounding update continues.
+    callback. When the archive lives in the same SQL database the copy
+    is a single ``INSERT INTO <archive> (...) SELECT ...`` restricted to
+    the changed rows, so they never leave the database; otherwise rows
+    are selected and archived one by one. Returns ``False`` so the
+    surrounding update continues.
     """
-    tablenames = qset.db._adapter.tables(qset.query)
+    from ..backend_base import SQLAdapter
+    from ..compilers.sql import ParamSQL
+    from ..objects import table_written
+
+    db = qset.db
+    tablenames = db._adapter.tables(qset.query)
     if len(tablenames) != 1:
         raise RuntimeError("cannot update join")
+    table = list(tablenames.values())[0]
+    changed = _changed_query(table, fs)
+    if (
+        changed is not None
+        and archive_table._db is db
+        and isinstance(db._adapter, SQLAdapter)
+        and getattr(table, "_id", None) is not None
+    ):
+        names = [
+            name
+            for name in archive_table.fields
+            if name == current_record or (name != "id" and name in table.fields)
+        ]
+        fields = [
+            table._id if name == current_record else table[name] for name in names
+        ]
+        query = (qset if changed is True else qset(changed)).query
+        adapter = db._adapter
+        # not Set._select: keep the values bound, as in the update
+        select = adapter._select(query, adapter.expand_all(fields, tablenames), {})
+        sql = "INSERT INTO %s(%s) %s" % (
+            archive_table.sql_fullref,
+            ", ".join(archive_table[name]._rname for name in names),
+            select,
+        )
+        adapter.execute(ParamSQL(sql, getattr(select, "params", ())))
+        table_written(archive_table)
+        return False
     for row in qset.select():
         fields = archive_table._filter_fields(row)
         for k, v in fs.items():
@@ -221,6 +261,35 @@ def archive_record(qset, fs, archive_table, current_record) -> bool:
     return False
 
 
+def _changed_query(table, fs):
+    """
+    Build the query matching the rows of ``table`` where a field of
+    ``fs`` differs from its new value (``NULL`` included). Returns
+    ``True`` when a new value is an expression, as every row counts as
+    changed, and ``None`` when a field cannot be compared in SQL: blob
+    and json fields, and text or list fields stored as LOBs (Oracle).
+    """
+    from ..objects import Expression
+
+    dialect = getattr(table._db._adapter, "dialect", None)
+    types = getattr(dialect, "types", {})
+    queries = []
+    for name, value in fs.items():
+        field = table[name]
+        if not isinstance(field.type, str) or field.type.startswith(("blob", "json")):
+            return None
+        if field.type == "text" or field.type.startswith("list:"):
+            if types.get(field.type) in LOB_TYPES:
+                return None
+        if isinstance(value, Expression):
+            return True
+        if value is None:
+            queries.append(field != None)
+        else:
+            queries.append((field != value) | (field == None))
+    return reduce(lambda a, b: a | b, queries) if queries else None
+
+
 # ---------------------------------------------------------------------------
 # smart_query — natural-language predicate parser.
 # ---------------------------------------------------------------------------
@@ -633,6 +702,8 @@ def delete_uploaded_files(dbset, upload_fields: Optional[Dict] = None) -> bool:
     ``upload_fields`` (when provided) is a ``{name: new_value}`` map
     that tells which fields are being changed AND what the new value
     is — files matching the new value are kept rather than deleted.
+    Content stored by an ``uploadstore="cas"`` field may be shared, so
+    it is left to ``Field.sweep_content``.
 
     Returns ``False`` so it can be chained as a ``_before_delete`` /
     ``_before_update`` hook without aborting the operation.
@@ -666,6 +737,9 @@ def delete_uploaded_files(dbset, upload_fields: Optional[Dict] = None) -> bool:
                 and oldname == upload_fields[fieldname]
             ):
                 continue
+            if field._content_key(oldname):
+                # other records (maybe not committed yet) may share it
+                continue
             if field.custom_delete:
                 field.custom_delete(oldname)
             else:
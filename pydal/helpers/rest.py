@@ -3,13 +3,17 @@ URL-pattern parser backing ``DAL.parse_as_rest``.
 
 A "pattern" describes a URL shape and the table/field it maps onto.
 Tokens inside ``{...}`` are query predicates; tokens inside ``[...]``
-are table joins. ``RestParser.parse`` walks a list of patterns,
-matches the current request path against each, and returns a
-status/response dict.
+are table joins. ``RestParser.parse`` matches the current request path
+against the patterns and returns a status/response dict.
+
+Pattern lists are compiled once into ``RestRoutes`` (a trie per number
+of segments, keyed by the literal segments) and cached on the DAL, so a
+request only walks the patterns its literal segments can match.
 
 This module is consumed by ``pydal/restapi.py``.
 """
 
+import functools
 import re
 from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
@@ -27,6 +31,113 @@ def to_num(num: Any) -> int:
     return int(num)
 
 
+# search operator -> query builder, called with the field and the value
+SEARCH_OPERATORS = {
+    "eq": lambda field, value: field == value,
+    "ne": lambda field, value: field != value,
+    "lt": lambda field, value: field < value,
+    "gt": lambda field, value: field > value,
+    "ge": lambda field, value: field >= value,
+    "le": lambda field, value: field <= value,
+    "year": lambda field, value: field.year() == value,
+    "month": lambda field, value: field.month() == value,
+    "day": lambda field, value: field.day() == value,
+    "hour": lambda field, value: field.hour() == value,
+    "minute": lambda field, value: field.minutes() == value,
+    "second": lambda field, value: field.seconds() == value,
+    "startswith": lambda field, value: field.startswith(value),
+    "contains": lambda field, value: field.cast("text").contains(value),
+}
+
+
+class RestRoute:
+    """
+    One pattern, compiled: a step per segment, with the tables and
+    fields it names already looked up.
+
+    ``index`` is the position of the pattern in the list given to
+    ``parse`` (None for patterns generated by ``:auto``), where its
+    basequery and exposed fields are read from at dispatch time.
+    """
+
+    __slots__ = ("pattern", "index", "steps", "table")
+
+    def __init__(self, pattern, index, steps, table):
+        self.pattern = pattern
+        self.index = index
+        self.steps = steps
+        self.table = table
+
+
+class _Node:
+    __slots__ = ("literals", "wildcard", "routes")
+
+    def __init__(self):
+        self.literals = {}
+        self.wildcard = None
+        self.routes = []
+
+
+class RestRoutes:
+    """
+    A pattern list compiled into a trie per number of segments.
+
+    Each node maps literal segments to children and has one wildcard
+    child for the search (``{...}``) and ``:field`` segments. Routes are
+    numbered in pattern order, so ``match`` returns the candidates in
+    the order ``parse`` has to try them: the first pattern that matches
+    a request still wins.
+    """
+
+    def __init__(self, patterns, tables=(), readable=()):
+        # the expanded pattern list, as answered to a "patterns" request:
+        # an int refers to the entry at that position of the list given
+        self.patterns = patterns
+        # the tables ":auto" patterns were generated from, and which of
+        # their fields were readable then
+        self.tables = tables
+        self.readable = readable
+        self.routes = []
+        self.roots = {}
+
+    def add(self, route, keys):
+        """Add ``route``, reached through ``keys`` (None for a wildcard)."""
+        node = self.roots.get(len(keys))
+        if node is None:
+            node = self.roots[len(keys)] = _Node()
+        for key in keys:
+            if key is None:
+                if node.wildcard is None:
+                    node.wildcard = _Node()
+                node = node.wildcard
+            else:
+                child = node.literals.get(key)
+                if child is None:
+                    child = node.literals[key] = _Node()
+                node = child
+        node.routes.append(len(self.routes))
+        self.routes.append(route)
+
+    def match(self, args: Sequence[str]) -> List[RestRoute]:
+        """Return the routes ``args`` can match, in pattern order."""
+        node = self.roots.get(len(args))
+        if node is None:
+            return []
+        nodes = [node]
+        for arg in args:
+            nodes = [
+                child
+                for node in nodes
+                for child in (node.literals.get(arg), node.wildcard)
+                if child is not None
+            ]
+            if not nodes:
+                return []
+        if len(nodes) == 1:
+            return [self.routes[i] for i in nodes[0].routes]
+        return [self.routes[i] for i in sorted(i for n in nodes for i in n.routes)]
+
+
 class RestParser:
     """
     Walk a URL request through a list of REST patterns and dispatch
@@ -35,6 +146,9 @@ class RestParser:
     Typically used via ``db.parse_as_rest(patterns, args, vars)``.
     """
 
+    # compiled pattern lists kept per DAL
+    cache_size = 64
+
     def __init__(self, db):
         self.db = db
 
@@ -99,6 +213,177 @@ class RestParser:
                     patterns += self.auto_table(table, base=tag, depth=depth - 1)
         return patterns
 
+    def expand(
+        self, patterns: Union[str, Sequence[Union[str, Tuple]]]
+    ) -> Tuple[List[Tuple[Optional[int], str]], List[str]]:
+        """
+        Expand ``"auto"`` and the ``:auto[table]`` entries of ``patterns``.
+
+        Returns the ``(index, pattern)`` pairs, where ``index`` is the
+        position of the entry in ``patterns`` (None for a generated
+        pattern), and the tables the patterns were generated from.
+        """
+        expanded: List[Tuple[Optional[int], str]] = []
+        tables: List[str] = []
+        if patterns == "auto":
+            for table in self.db.tables:
+                if not table.startswith("auth_"):
+                    tables.append(table)
+                    expanded.append((None, "/%s[%s]" % (table, table)))
+                    expanded += [
+                        (None, pattern)
+                        for pattern in self.auto_table(table, base="", depth=1)
+                    ]
+            return expanded, tables
+        for index, pattern in enumerate(patterns):
+            if not isinstance(pattern, str):
+                pattern = pattern[0]
+            tokens = pattern.split("/")
+            if tokens[-1].startswith(":auto") and re.match(
+                REGEX_SQUARE_BRACKETS, tokens[-1]
+            ):
+                table = tokens[-1][tokens[-1].find("[") + 1: -1]
+                tables.append(table)
+                expanded += [
+                    (None, pattern)
+                    for pattern in self.auto_table(table, "/".join(tokens[:-1]))
+                ]
+            else:
+                expanded.append((index, pattern))
+        return expanded, tables
+
+    def _readable(self, tables: List[str]) -> Tuple:
+        # auto_table skips the fields that are not readable
+        return tuple(
+            tuple(field.readable for field in self.db[table]) for table in tables
+        )
+
+    def compile(self, patterns: Union[str, Sequence[Union[str, Tuple]]]) -> RestRoutes:
+        """Compile ``patterns`` (as given to ``parse``) into ``RestRoutes``."""
+        expanded, tables = self.expand(patterns)
+        routes = RestRoutes(
+            [pattern if index is None else index for index, pattern in expanded],
+            tables,
+            self._readable(tables),
+        )
+        segments: Dict = {}
+        for index, pattern in expanded:
+            keys, steps, table = self._compile_pattern(pattern, segments)
+            # a pattern that never names a table can never respond
+            if table:
+                routes.add(RestRoute(pattern, index, steps, table), keys)
+        return routes
+
+    def routes(self, patterns: Union[str, Sequence[Union[str, Tuple]]]) -> RestRoutes:
+        """
+        Return the compiled ``patterns``, from the cache of the DAL.
+
+        Only the pattern strings and the tables defined are part of the
+        key: basequeries and exposed fields are read from ``patterns``
+        at dispatch time.
+        """
+        if isinstance(patterns, str):
+            key = (patterns,)
+        else:
+            key = tuple(
+                pattern if isinstance(pattern, str) else pattern[0]
+                for pattern in patterns
+            )
+        key = (key, tuple(self.db.tables))
+        cache = self.db._rest_routes
+        routes = cache.get(key)
+        if routes is None or routes.readable != self._readable(routes.tables):
+            routes = self.compile(patterns)
+            if len(cache) >= self.cache_size:
+                cache.clear()
+            cache[key] = routes
+        return routes
+
+    def _compile_pattern(
+        self, pattern: str, segments: Dict
+    ) -> Tuple[List, List, Optional[str]]:
+        """
+        Return the trie keys of ``pattern``, its steps (None for a literal
+        segment) and the table it selects from.
+
+        ``segments`` memoizes the compiled segments of a pattern list:
+        generated patterns share most of their prefixes.
+        """
+        keys: List[Optional[str]] = []
+        steps: List[Optional[Tuple]] = []
+        table = None
+        for tag in pattern[1:].split("/"):
+            segment = segments.get((tag, table))
+            if segment is None:
+                segment = self._compile_segment(pattern, tag, table)
+                if segment[1] is None or segment[1][0] != "error":
+                    segments[tag, table] = segment
+            key, step, table = segment
+            keys.append(key)
+            steps.append(step)
+        return keys, steps, table
+
+    def _compile_segment(
+        self, pattern: str, tag: str, otable: Optional[str]
+    ) -> Tuple[Optional[str], Optional[Tuple], Optional[str]]:
+        """
+        Return the trie key (None for a wildcard), the step and the table
+        of segment ``tag`` of ``pattern``, following a segment on
+        ``otable``.
+
+        An invalid segment compiles to an ``("error", exception)`` step,
+        raised only when a request reaches it.
+        """
+        db = self.db
+        table = otable
+        try:
+            if re.match(REGEX_SEARCH_PATTERN, tag):
+                key = None
+                tokens = tag[1:-1].split(".")
+                table = tokens[0]
+                if otable and table != otable:
+                    raise RuntimeError("missing relation in pattern: %s" % pattern)
+                operator = tokens[2] if len(tokens) > 2 else "eq"
+                if operator not in SEARCH_OPERATORS or (
+                    len(tokens) >= 4 and (len(tokens) > 4 or tokens[3] != "not")
+                ):
+                    raise RuntimeError("invalid pattern: %s" % pattern)
+                build = functools.partial(
+                    SEARCH_OPERATORS[operator], db[table][tokens[1]]
+                )
+                step = ("search", table, not otable, build, len(tokens) == 4)
+            elif re.match(REGEX_SQUARE_BRACKETS, tag):
+                key = tag[: tag.find("[")]
+                ref = tag[tag.find("[") + 1: -1]
+                if "." in ref and otable:
+                    table, field = ref.split(".")
+                    selfld = "_id"
+                    if db[table][field].type.startswith("reference "):
+                        refs = [
+                            x.name
+                            for x in db[otable]
+                            if x.type == db[table][field].type
+                        ]
+                    else:
+                        refs = [
+                            x.name
+                            for x in db[table]._referenced_by
+                            if x.tablename == otable
+                        ]
+                    if refs:
+                        selfld = refs[0]
+                    step = ("join", db[table][field], db[otable][selfld])
+                else:
+                    table = ref
+                    step = ("table", table, not otable, db[table])
+            elif tag == ":field" and otable:
+                key, step = None, ("field", otable)
+            else:
+                key, step = tag, None
+        except (RuntimeError, KeyError, AttributeError) as e:
+            step = ("error", e)
+        return key, step, table
+
     def parse(
         self,
         patterns: Union[str, Sequence[Union[str, Tuple]]],
@@ -146,242 +431,62 @@ class RestParser:
                         return dict(content=parser.response)
                     raise HTTP(parser.status, parser.error)
         """
-        if patterns == "auto":
-            patterns = []
-            for table in self.db.tables:
-                if not table.startswith("auth_"):
-                    patterns.append("/%s[%s]" % (table, table))
-                    patterns += self.auto_table(table, base="", depth=1)
-        else:
-            i = 0
-            while i < len(patterns):
-                pattern = patterns[i]
-                if not isinstance(pattern, str):
-                    pattern = pattern[0]
-                tokens = pattern.split("/")
-                if tokens[-1].startswith(":auto") and re.match(
-                    REGEX_SQUARE_BRACKETS, tokens[-1]
-                ):
-                    new_patterns = self.auto_table(
-                        tokens[-1][tokens[-1].find("[") + 1: -1],
-                        "/".join(tokens[:-1]),
-                    )
-                    patterns = patterns[:i] + new_patterns + patterns[i + 1:]
-                    i += len(new_patterns)
-                else:
-                    i += 1
+        routes = self.routes(patterns)
         if "/".join(args) == "patterns":
+            response = [
+                patterns[entry] if isinstance(entry, int) else entry
+                for entry in routes.patterns
+            ]
             return self.db.Row(
-                {"status": 200, "pattern": "list", "error": None, "response": patterns}
+                {"status": 200, "pattern": "list", "error": None, "response": response}
             )
-        for pattern in patterns:
-            basequery, exposedfields = None, []
-            if isinstance(pattern, tuple):
-                if len(pattern) == 2:
-                    pattern, basequery = pattern
-                elif len(pattern) > 2:
-                    pattern, basequery, exposedfields = pattern[0:3]
-            otable = table = None
-            if not isinstance(queries, dict):
-                dbset = self.db(queries)
-                if basequery is not None:
-                    dbset = dbset(basequery)
-            i = 0
-            tags = pattern[1:].split("/")
-            if len(tags) != len(args):
+        for route in routes.match(args):
+            entry = route.pattern if route.index is None else patterns[route.index]
+            result = self._dispatch(route, entry, args, vars, queries, nested_select)
+            if result is not None:
+                return result
+        return self.db.Row(
+            {"status": 400, "error": "no matching pattern", "response": None}
+        )
+
+    def _dispatch(self, route, entry, args, vars, queries, nested_select):
+        """
+        Run the steps of ``route`` against ``args``: return the response,
+        or None to try the next route.
+        """
+        db = self.db
+        pattern = route.pattern
+        basequery, exposedfields = None, []
+        if isinstance(entry, tuple):
+            if len(entry) == 2:
+                basequery = entry[1]
+            elif len(entry) > 2:
+                basequery, exposedfields = entry[1:3]
+        if not isinstance(queries, dict):
+            dbset = db(queries)
+            if basequery is not None:
+                dbset = dbset(basequery)
+        for step, arg in zip(route.steps, args):
+            if step is None:
                 continue
-            for tag in tags:
-                if re.match(REGEX_SEARCH_PATTERN, tag):
-                    tokens = tag[1:-1].split(".")
-                    table, field = tokens[0], tokens[1]
-                    if not otable or table == otable:
-                        if len(tokens) == 2 or tokens[2] == "eq":
-                            query = self.db[table][field] == args[i]
-                        elif tokens[2] == "ne":
-                            query = self.db[table][field] != args[i]
-                        elif tokens[2] == "lt":
-                            query = self.db[table][field] < args[i]
-                        elif tokens[2] == "gt":
-                            query = self.db[table][field] > args[i]
-                        elif tokens[2] == "ge":
-                            query = self.db[table][field] >= args[i]
-                        elif tokens[2] == "le":
-                            query = self.db[table][field] <= args[i]
-                        elif tokens[2] == "year":
-                            query = self.db[table][field].year() == args[i]
-                        elif tokens[2] == "month":
-                            query = self.db[table][field].month() == args[i]
-                        elif tokens[2] == "day":
-                            query = self.db[table][field].day() == args[i]
-                        elif tokens[2] == "hour":
-                            query = self.db[table][field].hour() == args[i]
-                        elif tokens[2] == "minute":
-                            query = self.db[table][field].minutes() == args[i]
-                        elif tokens[2] == "second":
-                            query = self.db[table][field].seconds() == args[i]
-                        elif tokens[2] == "startswith":
-                            query = self.db[table][field].startswith(args[i])
-                        elif tokens[2] == "contains":
-                            query = self.db[table][field].cast("text").contains(args[i])
-                        else:
-                            raise RuntimeError("invalid pattern: %s" % pattern)
-                        if len(tokens) == 4 and tokens[3] == "not":
-                            query = ~query
-                        elif len(tokens) >= 4:
-                            raise RuntimeError("invalid pattern: %s" % pattern)
-                        if not otable and isinstance(queries, dict):
-                            dbset = self.db(queries[table])
-                            if basequery is not None:
-                                dbset = dbset(basequery)
-                        dbset = dbset(query)
-                    else:
-                        raise RuntimeError("missing relation in pattern: %s" % pattern)
-                elif (
-                    re.match(REGEX_SQUARE_BRACKETS, tag)
-                    and args[i] == tag[: tag.find("[")]
-                ):
-                    ref = tag[tag.find("[") + 1: -1]
-                    if "." in ref and otable:
-                        table, field = ref.split(".")
-                        selfld = "_id"
-                        if self.db[table][field].type.startswith("reference "):
-                            refs = [
-                                x.name
-                                for x in self.db[otable]
-                                if x.type == self.db[table][field].type
-                            ]
-                        else:
-                            refs = [
-                                x.name
-                                for x in self.db[table]._referenced_by
-                                if x.tablename == otable
-                            ]
-                        if refs:
-                            selfld = refs[0]
-                        if nested_select:
-                            try:
-                                dbset = self.db(
-                                    self.db[table][field].belongs(
-                                        dbset._select(self.db[otable][selfld])
-                                    )
-                                )
-                            except ValueError:
-                                return self.db.Row(
-                                    {
-                                        "status": 400,
-                                        "pattern": pattern,
-                                        "error": "invalid path",
-                                        "response": None,
-                                    }
-                                )
-                        else:
-                            items = [
-                                item.id
-                                for item in dbset.select(self.db[otable][selfld])
-                            ]
-                            dbset = self.db(self.db[table][field].belongs(items))
-                    else:
-                        table = ref
-                        if not otable and isinstance(queries, dict):
-                            dbset = self.db(queries[table])
-                        dbset = dbset(self.db[table])
-                elif tag == ":field" and table:
-                    field = args[i]
-                    if field not in self.db[table]:
-                        break
-                    if not self.db[table][field].readable:
-                        return self.db.Row(
-                            {
-                                "status": 418,
-                                "pattern": pattern,
-                                "error": "I'm a teapot",
-                                "response": None,
-                            }
-                        )
-                    try:
-                        distinct = vars.get("distinct", False) == "True"
-                        offset = to_num(vars.get("offset", None))
-                        limits = (
-                            offset,
-                            to_num(vars.get("limit", None) or 1000) + offset,
-                        )
-                    except ValueError:
-                        return self.db.Row(
-                            {"status": 400, "error": "invalid limits", "response": None}
-                        )
-                    items = dbset.select(
-                        self.db[table][field], distinct=distinct, limitby=limits
-                    )
-                    if items:
-                        return self.db.Row(
-                            {"status": 200, "response": items, "pattern": pattern}
-                        )
-                    return self.db.Row(
-                        {
-                            "status": 404,
-                            "pattern": pattern,
-                            "error": "no record found",
-                            "response": None,
-                        }
-                    )
-                elif tag != args[i]:
-                    break
-                otable = table
-                i += 1
-                if i == len(tags) and table:
-                    if hasattr(self.db[table], "_id"):
-                        ofields = vars.get("order", self.db[table]._id.name).split("|")
-                    else:
-                        ofields = vars.get(
-                            "order", self.db[table]._primarykey[0]
-                        ).split("|")
+            kind = step[0]
+            if kind == "search":
+                _, table, first, build, negate = step
+                query = build(arg)
+                if negate:
+                    query = ~query
+                if first and isinstance(queries, dict):
+                    dbset = db(queries[table])
+                    if basequery is not None:
+                        dbset = dbset(basequery)
+                dbset = dbset(query)
+            elif kind == "join":
+                _, field, selfld = step
+                if nested_select:
                     try:
-                        orderby = [
-                            (
-                                self.db[table][f]
-                                if not f.startswith("~")
-                                else ~self.db[table][f[1:]]
-                            )
-                            for f in ofields
-                        ]
-                    except (KeyError, AttributeError):
-                        return self.db.Row(
-                            {
-                                "status": 400,
-                                "error": "invalid orderby",
-                                "response": None,
-                            }
-                        )
-                    if exposedfields:
-                        fields = [
-                            field
-                            for field in self.db[table]
-                            if str(field).split(".")[-1] in exposedfields
-                            and field.readable
-                        ]
-                    else:
-                        fields = [field for field in self.db[table] if field.readable]
-                    count = dbset.count()
-                    try:
-                        offset = to_num(vars.get("offset", None))
-                        limits = (
-                            offset,
-                            to_num(vars.get("limit", None) or 1000) + offset,
-                        )
+                        dbset = db(field.belongs(dbset._select(selfld)))
                     except ValueError:
-                        return self.db.Row(
-                            {
-                                "status": 400,
-                                "error": "invalid limits",
-                                "response": None,
-                            }
-                        )
-                    try:
-                        response = dbset.select(
-                            limitby=limits, orderby=orderby, *fields
-                        )
-                    except ValueError:
-                        return self.db.Row(
+                        return db.Row(
                             {
                                 "status": 400,
                                 "pattern": pattern,
@@ -389,14 +494,86 @@ class RestParser:
                                 "response": None,
                             }
                         )
-                    return self.db.Row(
+                else:
+                    items = [item.id for item in dbset.select(selfld)]
+                    dbset = db(field.belongs(items))
+            elif kind == "table":
+                _, table, first, tableobj = step
+                if first and isinstance(queries, dict):
+                    dbset = db(queries[table])
+                dbset = dbset(tableobj)
+            elif kind == "field":
+                table = db[step[1]]
+                if arg not in table:
+                    return None
+                if not table[arg].readable:
+                    return db.Row(
                         {
-                            "status": 200,
-                            "response": response,
+                            "status": 418,
                             "pattern": pattern,
-                            "count": count,
+                            "error": "I'm a teapot",
+                            "response": None,
                         }
                     )
-        return self.db.Row(
-            {"status": 400, "error": "no matching pattern", "response": None}
+                try:
+                    distinct = vars.get("distinct", False) == "True"
+                    offset = to_num(vars.get("offset", None))
+                    limits = (offset, to_num(vars.get("limit", None) or 1000) + offset)
+                except ValueError:
+                    return db.Row(
+                        {"status": 400, "error": "invalid limits", "response": None}
+                    )
+                items = dbset.select(table[arg], distinct=distinct, limitby=limits)
+                if items:
+                    return db.Row(
+                        {"status": 200, "response": items, "pattern": pattern}
+                    )
+                return db.Row(
+                    {
+                        "status": 404,
+                        "pattern": pattern,
+                        "error": "no record found",
+                        "response": None,
+                    }
+                )
+            else:
+                raise step[1].with_traceback(None)
+        table = db[route.table]
+        if hasattr(table, "_id"):
+            ofields = vars.get("order", table._id.name).split("|")
+        else:
+            ofields = vars.get("order", table._primarykey[0]).split("|")
+        try:
+            orderby = [
+                table[f] if not f.startswith("~") else ~table[f[1:]] for f in ofields
+            ]
+        except (KeyError, AttributeError):
+            return db.Row({"status": 400, "error": "invalid orderby", "response": None})
+        if exposedfields:
+            fields = [
+                field
+                for field in table
+                if str(field).split(".")[-1] in exposedfields and field.readable
+            ]
+        else:
+            fields = [field for field in table if field.readable]
+        count = dbset.count()
+        try:
+            offset = to_num(vars.get("offset", None))
+            limits = (offset, to_num(vars.get("limit", None) or 1000) + offset)
+        except ValueError:
+            return db.Row({"status": 400, "error": "invalid limits", "response": None})
+        try:
+            response = dbset.select(limitby=limits, orderby=orderby, *fields)
+        except ValueError:
+            return db.Row(
+                {
+                    "status": 400,
+                    "pattern": pattern,
+                    "error": "invalid path",
+                    "response": None,
+                }
+            )
+        return db.Row(
+            {"status": 200, "response": response, "pattern": pattern, "count": count}
         )
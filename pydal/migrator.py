@@ -17,13 +17,22 @@ Public surface (called from ``BaseAdapter.create_table`` /
 * ``create_table`` — emit ``CREATE TABLE`` and write the snapshot.
 * ``migrate_table`` — compare snapshots and emit ``ALTER TABLE``.
 * ``save_dbt`` — write the snapshot file for ``table``.
+* ``fingerprint`` / ``update_manifest`` — maintain the per-database
+  schema manifest (``<uri_hash>_schema.manifest``), which maps each
+  snapshot file to a hash of its content. When a table's current
+  definition hashes to the manifest entry, ``create_table`` returns
+  without opening or unpickling the ``.table`` file.
 * ``log`` — append a line to the migration log.
 * File helpers (``file_open`` / ``file_close`` / ``file_delete`` /
-  ``file_exists``) — overridden by ``InDBMigrator`` to use the DB.
+  ``file_exists``) — overridden by ``InDBMigrator`` to use the DB
+  (it reads every snapshot of the database with one query).
 """
 
 import copy
 import datetime
+import hashlib
+import io
+import json
 import os
 import pickle
 from os.path import exists, join as pjoin
@@ -44,6 +53,8 @@ class Migrator:
 
     def __init__(self, adapter):
         self.adapter = adapter
+        self._manifest_file = None
+        self._manifest = None
 
     @property
     def db(self):
@@ -251,6 +262,7 @@ class Migrator:
             else:
                 ftype = types[field_type] % {"length": field.length}
 
+            type_sql = ftype
             if not field_type.startswith(("id", "reference", "big-reference")):
                 if field.notnull:
                     ftype += " NOT NULL"
@@ -282,7 +294,7 @@ class Migrator:
                 # a migration simply because a default value changes.
                 not_null = self.dialect.not_null(field.default, field_type)
                 ftype = ftype.replace("NOT NULL", not_null)
-            sql_fields_aux[field_name] = dict(sql=ftype)
+            sql_fields_aux[field_name] = dict(sql=ftype, type_sql=type_sql)
             # Postgres - PostGIS:
             # geometry fields are added after the table has been created, not now
             if not (self.dbengine == "postgres" and field_type.startswith("geom")):
@@ -377,6 +389,11 @@ class Migrator:
             table._dbt = pjoin(dbpath, migrate)
         else:
             table._dbt = pjoin(dbpath, "%s_%s.table" % (db._uri_hash, tablename))
+        if table._dbt:
+            self._manifest_file = pjoin(dbpath, "%s_schema.manifest" % db._uri_hash)
+        indexes = self.index_specs(table)
+        if indexes:
+            sql_fields["_indexes"] = indexes
 
         if not table._dbt or not self.file_exists(table._dbt):
             if table._dbt:
@@ -393,15 +410,21 @@ class Migrator:
                 for query in postcreation_fields:
                     self.adapter.execute(query)
                     db.commit()
+                self._migrate_indexes(table, (), indexes)
             if table._dbt:
                 tfile = self.file_open(table._dbt, "wb")
                 pickle.dump(sql_fields, tfile)
                 self.file_close(tfile)
+                self.update_manifest(table._dbt, self.fingerprint(sql_fields))
                 if fake_migrate:
                     self.log("faked!\n", table)
                 else:
                     self.log("success!\n", table)
         else:
+            fingerprint = self.fingerprint(sql_fields)
+            if self.manifest.get(table._dbt) == fingerprint:
+                # snapshot already matches this definition
+                return query
             tfile = self.file_open(table._dbt, "rb")
             try:
                 sql_fields_old = pickle.load(tfile)
@@ -411,6 +434,8 @@ class Migrator:
             self.file_close(tfile)
             # add missing rnames
             for key, item in sql_fields_old.items():
+                if key == "_indexes":
+                    continue
                 tmp = sql_fields.get(key)
                 if tmp:
                     item.setdefault("rname", tmp["rname"])
@@ -427,6 +452,8 @@ class Migrator:
                     None,
                     fake_migrate=fake_migrate,
                 )
+            else:
+                self.update_manifest(table._dbt, fingerprint)
         return query
 
     def _fix(self, item):
@@ -457,11 +484,23 @@ class Migrator:
         changes; executes them in sequence and updates the snapshot.
         ``fake_migrate=True`` skips DDL but still updates the snapshot.
 
+        With ``adapter_args["migrate_batch_size"]`` set the migration
+        runs *online*: renames and type changes use the backend's native
+        ``RENAME COLUMN`` / ``ALTER COLUMN ... TYPE`` where available,
+        copies are backfilled in primary-key ranges of that size with a
+        commit after each batch, and progress is checkpointed so an
+        interrupted migration resumes where it stopped.
+
         ``logfile`` is deprecated; use ``self.log`` instead.
         """
         db = table._db
         db._migrated.append(table._tablename)
         tablename = table._tablename
+        # declared indexes travel in the snapshot under "_indexes"
+        sql_fields = dict(sql_fields)
+        sql_fields_old = dict(sql_fields_old)
+        indexes = sql_fields.pop("_indexes", {})
+        indexes_old = sql_fields_old.pop("_indexes", {})
         if self.dbengine in ("firebird",):
             drop_expr = "ALTER TABLE %s DROP %s;"
         else:
@@ -487,9 +526,24 @@ class Migrator:
             if key not in keys:
                 keys.append(key)
         new_add = self.dialect.concat_add(table_rname)
+        batch_size = self.adapter.adapter_args.get("migrate_batch_size")
+        online = bool(batch_size) and not fake_migrate
+        progress = self._read_progress(table) if online else None
 
         metadata_change = False
         sql_fields_current = copy.copy(sql_fields_old)
+        kept = dict(
+            (name, sql) for name, sql in indexes_old.items() if indexes.get(name) == sql
+        )
+        if kept:
+            sql_fields_current["_indexes"] = kept
+        if len(kept) < len(indexes_old):
+            # stale indexes go first: they may cover columns dropped below
+            self._migrate_indexes(
+                table, [name for name in indexes_old if name not in kept], (),
+                fake_migrate=fake_migrate,
+            )
+            self.save_dbt(table, sql_fields_current)
         for key in keys:
             query = None
             if key not in sql_fields_old:
@@ -517,15 +571,20 @@ class Migrator:
                         sql_fields[key]["raw_rname"].lower()
                         != sql_fields_old[key]["raw_rname"].lower()
                     ):
+                        rename = online and self.dialect.rename_column(
+                            table_rname,
+                            sql_fields_old[key]["rname"],
+                            sql_fields[key]["rname"],
+                        )
                         tt = sql_fields_aux[key]["sql"].replace(", ", new_add)
-                        query = [
+                        query = [rename] if rename else [
                             "ALTER TABLE %s ADD %s %s;"
                             % (table_rname, sql_fields[key]["rname"], tt),
-                            "UPDATE %s SET %s=%s;"
-                            % (
+                            _Backfill(
                                 table_rname,
                                 sql_fields[key]["rname"],
                                 sql_fields_old[key]["rname"],
+                                sql_fields_aux[key]["type_sql"],
                             ),
                         ]
                 metadata_change = True
@@ -553,15 +612,22 @@ class Migrator:
                 != sql_fields_old[key]["raw_rname"].lower()
             ):
                 sql_fields_current[key] = sql_fields[key]
+                rename = None
+                if online and sql_fields[key]["sql"] == sql_fields_old[key]["sql"]:
+                    rename = self.dialect.rename_column(
+                        table_rname,
+                        sql_fields_old[key]["rname"],
+                        sql_fields[key]["rname"],
+                    )
                 tt = sql_fields_aux[key]["sql"].replace(", ", new_add)
-                query = [
+                query = [rename] if rename else [
                     "ALTER TABLE %s ADD %s %s;"
                     % (table_rname, sql_fields[key]["rname"], tt),
-                    "UPDATE %s SET %s=%s;"
-                    % (
+                    _Backfill(
                         table_rname,
                         sql_fields[key]["rname"],
                         sql_fields_old[key]["rname"],
+                        sql_fields_aux[key]["type_sql"],
                     ),
                     drop_expr % (table_rname, sql_fields_old[key]["rname"]),
                 ]
@@ -574,25 +640,51 @@ class Migrator:
                 and not sql_fields[key]["type"].startswith("id")
             ):
                 sql_fields_current[key] = sql_fields[key]
+                alter = online and self._alter_column_type(
+                    table_rname, sql_fields[key], sql_fields_old[key], sql_fields_aux[key]
+                )
                 tt = sql_fields_aux[key]["sql"].replace(", ", new_add)
+                type_sql = sql_fields_aux[key]["type_sql"]
                 key_tmp = self.dialect.quote(key + "__tmp")
                 query = [
                     "ALTER TABLE %s ADD %s %s;" % (table_rname, key_tmp, tt),
-                    "UPDATE %s SET %s=%s;"
-                    % (table_rname, key_tmp, sql_fields_old[key]["rname"]),
+                    _Backfill(
+                        table_rname,
+                        key_tmp,
+                        sql_fields_old[key]["rname"],
+                        type_sql,
+                        cast=True,
+                    ),
                     drop_expr % (table_rname, sql_fields_old[key]["rname"]),
-                    "ALTER TABLE %s ADD %s %s;"
-                    % (table_rname, sql_fields[key]["rname"], tt),
-                    "UPDATE %s SET %s=%s;"
-                    % (table_rname, sql_fields[key]["rname"], key_tmp),
-                    drop_expr % (table_rname, key_tmp),
                 ]
+                # online, the copy takes the old column's place by a
+                # rename, so the column is never missing nor half-filled
+                rename = online and self.dialect.rename_column(
+                    table_rname, key_tmp, sql_fields[key]["rname"]
+                )
+                if alter:
+                    query = [alter]
+                elif rename:
+                    query.append(rename)
+                else:
+                    query += [
+                        "ALTER TABLE %s ADD %s %s;"
+                        % (table_rname, sql_fields[key]["rname"], tt),
+                        _Backfill(
+                            table_rname, sql_fields[key]["rname"], key_tmp, type_sql
+                        ),
+                        drop_expr % (table_rname, key_tmp),
+                    ]
                 metadata_change = True
             elif sql_fields[key] != sql_fields_old[key]:
                 sql_fields_current[key] = sql_fields[key]
                 metadata_change = True
 
-            if query:
+            if query and online:
+                progress = self._migrate_online(
+                    table, key, query, sql_fields_current, batch_size, progress
+                )
+            elif query:
                 self.log(
                     "timestamp: %s\n" % datetime.datetime.today().isoformat(), table
                 )
@@ -617,16 +709,330 @@ class Migrator:
             elif metadata_change:
                 self.save_dbt(table, sql_fields_current)
 
-        if metadata_change and not (query and db._adapter.commit_on_alter_table):
+        if metadata_change and not (
+            query and (online or db._adapter.commit_on_alter_table)
+        ):
             db.commit()
             self.save_dbt(table, sql_fields_current)
             self.log("success!\n", table)
+        if len(kept) < len(indexes):
+            self._migrate_indexes(
+                table, (), [name for name in indexes if name not in kept],
+                fake_migrate=fake_migrate,
+            )
+            sql_fields_current["_indexes"] = indexes
+            self.save_dbt(table, sql_fields_current)
+
+    def index_specs(self, table) -> dict:
+        """
+        Map the name of each ``Index`` declared on ``table`` to its
+        ``CREATE INDEX`` statement: the form stored in the snapshot and
+        compared to detect changed indexes.
+        """
+        return dict(
+            (index.name, self._index_sql(table, index)) for index in table._indexes
+        )
+
+    def _index_sql(self, table, index, concurrently=False) -> str:
+        columns = [
+            self._index_expression(table, expression, key=True)
+            for expression in index.expressions
+        ]
+        where = None
+        if index.where is not None:
+            where = self._index_expression(table, index.where)
+        return self.dialect.declared_index(
+            index.name,
+            table,
+            columns,
+            unique=index.unique,
+            where=where,
+            concurrently=concurrently,
+        )
+
+    def _index_expression(self, table, expression, key=False) -> str:
+        """
+        SQL for an index key (field name, ``Field`` or expression) or
+        partial-index predicate, compiled by the AST compiler when the
+        adapter has one.
+        """
+        from .ast_translate import to_ast
+        from .objects import Field
+
+        if callable(expression):
+            expression = expression(table)
+        if isinstance(expression, str):
+            expression = table[expression]
+        if isinstance(expression, Field):
+            return expression._rname
+        sql = None
+        if self.adapter.compiler is not None:
+            try:
+                sql = self.adapter.compiler.compile_index_expression(
+                    to_ast(expression)
+                )
+            except NotImplementedError:
+                pass
+        if sql is None:
+            with self.adapter.index_expander():
+                sql = self.adapter.expand(expression)
+        # expression keys must be parenthesized on most backends
+        return "(%s)" % sql if key else sql
+
+    def _migrate_indexes(self, table, drop, create, fake_migrate=False):
+        """
+        Drop the indexes named in ``drop``, then create the declared
+        indexes named in ``create``, committing after each statement.
+        """
+        if not drop and not create:
+            return
+        db = table._db
+        declared = dict((index.name, index) for index in table._indexes)
+        queries = [(self.dialect.drop_index(name, table), False) for name in drop]
+        for name in create:
+            index = declared[name]
+            concurrently = index.concurrently and self.dbengine == "postgres"
+            queries.append((self._index_sql(table, index, concurrently), concurrently))
+        self.log("timestamp: %s\n" % datetime.datetime.today().isoformat(), table)
+        for query, concurrently in queries:
+            self.log(query + "\n", table)
+            if fake_migrate:
+                self.log("faked!\n", table)
+                continue
+            if concurrently:
+                # CREATE INDEX CONCURRENTLY can't run inside a transaction
+                db.commit()
+                connection = self.adapter.connection
+                autocommit = connection.autocommit
+                connection.autocommit = True
+                try:
+                    self.adapter.execute(query)
+                finally:
+                    connection.autocommit = autocommit
+            else:
+                self.adapter.execute(query)
+                db.commit()
+            self.log("success!\n", table)
+
+    def _alter_column_type(self, table_rname, field_sql, old_sql, aux_sql):
+        """
+        Native type change for one column, or None when the backend has
+        none or the change touches more than the type (nullability,
+        uniqueness, qualifiers), which still goes through a copy.
+        """
+        type_sql = aux_sql.get("type_sql")
+        if not type_sql or not field_sql["sql"].startswith(type_sql):
+            return None
+        qualifiers = field_sql["sql"][len(type_sql) :]
+        if (
+            field_sql.get("notnull") != old_sql.get("notnull")
+            or field_sql.get("unique") != old_sql.get("unique")
+            or not old_sql["sql"].endswith(qualifiers)
+        ):
+            return None
+        return self.dialect.alter_column_type(
+            table_rname, field_sql["rname"], type_sql
+        )
+
+    def _migrate_online(
+        self, table, key, query, sql_fields_current, batch_size, progress
+    ):
+        """
+        Run ``query`` (the statements migrating column ``key``) with a
+        commit and a progress checkpoint after every statement and every
+        backfill batch; the snapshot is saved once the column is done.
+        Where DDL is transactional, the last batch of a backfill and the
+        statements up to the next backfill commit together.
+
+        ``progress`` is the checkpoint left by an interrupted run, if
+        any: its completed steps are skipped, and a checkpoint for a
+        different column or different statements raises RuntimeError.
+        Returns the (now consumed) checkpoint, i.e. None.
+        """
+        db = table._db
+        first, last_id = 0, None
+        if progress is not None:
+            if progress["key"] != key or progress["query"] != list(map(str, query)):
+                raise RuntimeError(
+                    "Interrupted online migration of %s.%s no longer matches "
+                    "its definition" % (table._tablename, progress["key"])
+                )
+            first, last_id = progress["step"], progress["last_id"]
+            self.log("resuming at step %s\n" % first, table)
+        else:
+            self.log(
+                "timestamp: %s\n" % datetime.datetime.today().isoformat(), table
+            )
+        pending = False
+        for step in range(first, len(query)):
+            sub_query = query[step]
+
+            def checkpoint(last_id, step=step):
+                self._save_progress(table, key, query, step, last_id)
+                db.commit()
+
+            if isinstance(sub_query, _Backfill):
+                self.log("%s -- in batches of %s\n" % (sub_query, batch_size), table)
+                self._backfill(table, sub_query, batch_size, last_id, checkpoint)
+                last_id = None
+                pending = not db._adapter.commit_on_alter_table
+            else:
+                self.log(sub_query + "\n", table)
+                self.adapter.execute(sub_query)
+            if (
+                pending
+                and step + 1 < len(query)
+                and not isinstance(query[step + 1], _Backfill)
+            ):
+                # the last batch commits with the statements dropping
+                # and replacing its source, so no write can land in
+                # between and no reader sees the column missing
+                continue
+            pending = False
+            self._save_progress(table, key, query, step + 1, None)
+            db.commit()
+        self.save_dbt(table, sql_fields_current)
+        self.file_delete(self._progress_file(table))
+        db.commit()
+        self.log("success!\n", table)
+        return None
+
+    def _backfill(self, table, backfill, batch_size, last_id, checkpoint):
+        """
+        Execute ``backfill`` in ranges of ``batch_size`` primary-key
+        values after ``last_id``, calling ``checkpoint(last_id)`` after
+        each range. The highest id is read again once the ranges are
+        done, until no row inserted meanwhile is left. A last UPDATE
+        (after the table is locked, where the backend can) then copies
+        the rows inserted since and the already-copied rows whose
+        source was updated meanwhile; it is left uncommitted, for the
+        caller to commit with the statements that follow. Tables
+        without an integer primary key get a single UPDATE.
+        """
+        id_field = getattr(table, "_id", None)
+        if getattr(id_field, "type", None) not in ("id", "big-id", "integer", "bigint"):
+            self.adapter.execute(backfill)
+            return
+        id_rname = id_field._rname
+        update = "UPDATE %s SET %s=%s WHERE %%s;" % (
+            backfill.table_rname,
+            backfill.target,
+            backfill.source,
+        )
+        while True:
+            low, high = self.adapter.db.executesql(
+                "SELECT MIN(%s), MAX(%s) FROM %s;"
+                % (id_rname, id_rname, backfill.table_rname)
+            )[0]
+            if high is None or (last_id is not None and last_id >= high):
+                break
+            if last_id is None:
+                last_id = low - 1
+            while last_id < high:
+                upper = last_id + batch_size
+                self.adapter.execute(
+                    update
+                    % ("%s > %d AND %s <= %d" % (id_rname, last_id, id_rname, upper))
+                )
+                last_id = upper
+                checkpoint(last_id)
+        lock = self.dialect.lock_table(backfill.table_rname)
+        if lock:
+            self.adapter.execute(lock)
+        if last_id is None:
+            self.adapter.execute(backfill)
+        else:
+            differs = self.dialect.column_differs(
+                backfill.target, backfill.source, backfill.type_sql, backfill.cast
+            )
+            self.adapter.execute(
+                update % ("%s > %d OR %s" % (id_rname, last_id, differs))
+            )
+
+    def _progress_file(self, table) -> str:
+        """Checkpoint file of an online migration of ``table``."""
+        return os.path.splitext(table._dbt)[0] + ".migration"
+
+    def _read_progress(self, table) -> Optional[dict]:
+        """Load the checkpoint left by an interrupted online migration."""
+        filename = self._progress_file(table)
+        if not self.file_exists(filename):
+            return None
+        tfile = self.file_open(filename, "rb")
+        try:
+            return pickle.load(tfile)
+        finally:
+            self.file_close(tfile)
+
+    def _save_progress(self, table, key, query, step, last_id) -> None:
+        """Checkpoint an online migration: next ``step`` and backfill position."""
+        tfile = self.file_open(self._progress_file(table), "wb")
+        pickle.dump(
+            dict(key=key, query=list(map(str, query)), step=step, last_id=last_id),
+            tfile,
+        )
+        self.file_close(tfile)
 
     def save_dbt(self, table, sql_fields_current):
         """Pickle ``sql_fields_current`` to ``table._dbt`` (the snapshot file)."""
         tfile = self.file_open(table._dbt, "wb")
         pickle.dump(sql_fields_current, tfile)
         self.file_close(tfile)
+        self.update_manifest(table._dbt, self.fingerprint(sql_fields_current))
+
+    @staticmethod
+    def fingerprint(sql_fields) -> str:
+        """Stable hash of a table snapshot (the ``sql_fields`` dict)."""
+        data = json.dumps(sql_fields, sort_keys=True, default=str)
+        return hashlib.sha1(data.encode("utf8")).hexdigest()
+
+    @property
+    def manifest(self):
+        """``{snapshot file: fingerprint}``, read once per migrator."""
+        if self._manifest is None:
+            self._manifest = self._read_manifest()
+        return self._manifest
+
+    def _read_manifest(self):
+        if not self._manifest_file or not self.file_exists(self._manifest_file):
+            return {}
+        mfile = self.file_open(self._manifest_file, "rb")
+        try:
+            data = io.BytesIO(mfile.read())
+        finally:
+            self.file_close(mfile)
+        manifest = {}
+        while True:
+            try:
+                entry = pickle.load(data)
+            except (EOFError, pickle.UnpicklingError):
+                # a damaged entry only costs the slow path for what follows
+                break
+            if isinstance(entry, dict):
+                # written whole by older versions
+                manifest.update(entry)
+            elif isinstance(entry, tuple) and len(entry) == 2:
+                manifest[entry[0]] = entry[1]
+            else:
+                break
+        return manifest
+
+    def update_manifest(self, dbt: str, fingerprint: str) -> None:
+        """
+        Record that the snapshot ``dbt`` now hashes to ``fingerprint``.
+
+        The manifest is a journal: each update appends one
+        ``(dbt, fingerprint)`` entry under the file's exclusive lock and
+        the last entry of a snapshot wins, so writers sharing a folder
+        never rewrite (or lose) each other's entries.
+        """
+        if not self._manifest_file:
+            return
+        mfile = self.file_open(self._manifest_file, "ab")
+        mfile.write(pickle.dumps((dbt, fingerprint)))
+        self.file_close(mfile)
+        if self._manifest is not None:
+            self._manifest[dbt] = fingerprint
 
     def log(self, message: str, table=None):
         """
@@ -692,15 +1098,55 @@ class InDBMigrator(Migrator):
     inside the database (MySQL / PostgreSQL / SQLite only).
 
     Useful when the application has no writable filesystem.
+
+    Every snapshot of this database (paths starting with the DAL's
+    ``_uri_hash``) and the migration log are fetched by one query the
+    first time one is needed. Writes go straight to the table and are
+    committed, like the DDL they record.
     """
 
+    def __init__(self, adapter):
+        super().__init__(adapter)
+        self._files = None
+        self._prefix = None
+        self._logname = None
+
+    def _prefetched(self, filename: str):
+        """The in-memory snapshot map if it covers ``filename``, else None."""
+        if self._files is None:
+            db = self.db
+            self._prefix = db._uri_hash + "_"
+            # log() resolves the log against the (empty) in-DB folder
+            self._logname = self.adapter.adapter_args.get("logfile", "sql.log")
+            DatabaseStoredFile.try_create_web2py_filesystem(db)
+            placeholder = DatabaseStoredFile.placeholder(db)
+            rows = db.executesql(
+                "SELECT path, content FROM web2py_filesystem"
+                " WHERE path LIKE %s OR path = %s" % (placeholder, placeholder),
+                (self._prefix + "%", self._logname),
+            )
+            self._files = {
+                path: to_bytes(content)
+                for path, content in rows
+                if path.startswith(self._prefix) or path == self._logname
+            }
+        if filename.startswith(self._prefix) or filename == self._logname:
+            return self._files
+        return None
+
     def file_exists(self, filename: str) -> bool:
         """True iff a snapshot row for ``filename`` is present in the DB."""
-        return DatabaseStoredFile.exists(self.db, filename)
+        files = self._prefetched(filename)
+        if files is None:
+            return DatabaseStoredFile.exists(self.db, filename)
+        return filename in files or exists(filename)
 
     def file_open(self, filename: str, mode: str = "rb", lock: bool = True):
         """Return a ``DatabaseStoredFile`` proxy bound to ``filename``."""
-        return DatabaseStoredFile(self.db, filename, mode)
+        files = self._prefetched(filename)
+        if files is None:
+            return DatabaseStoredFile(self.db, filename, mode)
+        return _PrefetchedFile(self, filename, mode, files.get(filename))
 
     @staticmethod
     def file_close(fileobj) -> None:
@@ -708,6 +1154,67 @@ class InDBMigrator(Migrator):
         fileobj.close_connection()
 
     def file_delete(self, filename: str) -> None:
-        query = "DELETE FROM web2py_filesystem WHERE path='%s'" % filename
-        self.db.executesql(query)
+        if self._files is not None:
+            self._files.pop(filename, None)
+        self.db.executesql(
+            "DELETE FROM web2py_filesystem WHERE path=%s"
+            % DatabaseStoredFile.placeholder(self.db),
+            (filename,),
+        )
         self.db.commit()
+
+
+class _PrefetchedFile(DatabaseStoredFile):
+    """``DatabaseStoredFile`` read from ``InDBMigrator``'s prefetched map."""
+
+    def __init__(self, migrator, filename: str, mode: str, data: Optional[bytes]):
+        self.db = None
+        self.migrator = migrator
+        self.filename = filename
+        self.mode = mode
+        self.p = 0
+        self.data = b""
+        if mode in ("r", "rw", "rb", "a", "ab"):
+            if data is not None:
+                self.data = data
+            elif exists(filename):
+                with open(filename, "rb") as datafile:
+                    self.data = datafile.read()
+            elif mode in ("r", "rw", "rb"):
+                raise RuntimeError("File %s does not exist" % filename)
+
+    def close_connection(self) -> None:
+        if self.migrator is not None and self.mode not in ("r", "rb"):
+            # written and committed now, like the DDL it records
+            self.migrator._files[self.filename] = self.data
+            self.db = self.migrator.db
+        self.migrator = None
+        super().close_connection()
+
+
+class _Backfill(str):
+    """
+    ``UPDATE <table> SET <target>=<source>;`` step of a migration.
+
+    Renders as the plain statement, so offline migrations execute and
+    log it unchanged; online migrations split it into primary-key ranges.
+    """
+
+    def __new__(
+        cls,
+        table_rname: str,
+        target: str,
+        source: str,
+        type_sql: str,
+        cast: bool = False,
+    ):
+        self = str.__new__(
+            cls, "UPDATE %s SET %s=%s;" % (table_rname, target, source)
+        )
+        self.table_rname = table_rname
+        self.target = target
+        self.source = source
+        # the target's type, and whether the source has another one
+        self.type_sql = type_sql
+        self.cast = cast
+        return self
@@ -28,12 +28,15 @@ import copy
 import csv
 import datetime
 import decimal
+import hashlib
 import io
 import logging
 import os
 import re
 import shutil
 import sys
+import tempfile
+import time
 import types
 from collections import OrderedDict
 from io import TextIOWrapper
@@ -112,6 +115,20 @@ def csv_reader(utf8_data, dialect=csv.excel, encoding="utf-8", **kwargs):
         yield [to_unicode(cell, encoding) for cell in row]
 
 
+def table_written(table, cascade=False):
+    """
+    Count a write to ``table`` in its DAL's ``_table_versions``, which
+    caches built from the table's rows (``IS_IN_DB`` options) compare
+    against. ``cascade`` also counts the tables referencing it, which
+    ON DELETE actions may change.
+    """
+    versions = table._db._table_versions
+    versions[table._dalname] = versions.get(table._dalname, 0) + 1
+    if cascade:
+        for field in table._referenced_by:
+            versions[field.tablename] = versions.get(field.tablename, 0) + 1
+
+
 def get_default_validator(field, _cached_defaults={}):
     """returns the default validators a value of type"""
     from . import validators
@@ -319,6 +336,55 @@ def pickle_row(s):
 copyreg.pickle(Row, pickle_row)
 
 
+_TABLE_CALLBACKS = (
+    "_before_insert",
+    "_before_update",
+    "_before_delete",
+    "_after_insert",
+    "_after_update",
+    "_after_delete",
+)
+
+# closures made per table by Table.__init__, rebuilt by Table._copy_for
+_UPLOAD_HOOKS = {
+    "attempt_upload_on_insert.<locals>.wrapped": attempt_upload_on_insert,
+    "attempt_upload_on_update.<locals>.wrapped": attempt_upload_on_update,
+}
+
+
+
+def _rebound(value, old, new):
+    """
+    Return ``value`` (a validator, a table callback or a list of them)
+    with whatever queries the ``old`` DAL bound to ``new`` instead.
+    """
+    if isinstance(value, (list, tuple)):
+        rebound = [_rebound(item, old, new) for item in value]
+        if all(a is b for a, b in zip(rebound, value)):
+            return value
+        return type(value)(rebound)
+    rebind = getattr(value, "_rebind", None)
+    return value if rebind is None else rebind(old, new)
+
+
+class _ArchiveHook(object):
+    """``_before_update`` callback installed by record versioning."""
+
+    def __init__(self, archive_db, archive_name, current_record):
+        self.archive_db = archive_db
+        self.archive_name = archive_name
+        self.current_record = current_record
+
+    def __call__(self, qset, fs):
+        archive_table = self.archive_db[self.archive_name]
+        return archive_record(qset, fs, archive_table, self.current_record)
+
+    def _rebind(self, old, new):
+        if self.archive_db is not old:
+            return self
+        return _ArchiveHook(new, self.archive_name, self.current_record)
+
+
 class Table(Serializable, BasicStorage):
     """
     A database table — collection of ``Field``s plus operations.
@@ -336,6 +402,7 @@ class Table(Serializable, BasicStorage):
     * ``insert`` / ``bulk_insert`` / ``_insert`` (SQL-only).
     * ``update_or_insert`` / ``validate_and_insert`` /
       ``validate_and_update`` / ``validate_and_update_or_insert``.
+    * ``validate_many`` / ``validate_and_bulk_insert`` (batched validation).
     * ``drop`` / ``_drop``.
     * ``import_from_csv_file`` / ``with_alias``.
     * ``ALL`` — sentinel expanding to all readable fields.
@@ -389,6 +456,7 @@ class Table(Serializable, BasicStorage):
             and db._adapter.dialect.trigger_name(tablename)
         )
         self._common_filter = args.get("common_filter")
+        self._indexes = list(args.get("indexes") or [])
         self._format = args.get("format")
         self._singular = args.get("singular", tablename.replace("_", " ").capitalize())
         self._plural = args.get("plural", pluralize(self._singular.lower()).capitalize())
@@ -608,9 +676,7 @@ class Table(Serializable, BasicStorage):
         )
 
         self._before_update.append(
-            lambda qset, fs, db=archive_db, an=archive_name, cn=current_record: (
-                archive_record(qset, fs, db[an], cn)
-            )
+            _ArchiveHook(archive_db, archive_name, current_record)
         )
         if is_active and is_active in fieldnames:
             self._before_delete.append(lambda qset: qset.update(is_active=False))
@@ -989,6 +1055,7 @@ class Table(Serializable, BasicStorage):
         if any(f(row) for f in self._before_insert):
             return 0
         ret = self._db._adapter.insert(self, row.op_values())
+        table_written(self)
         if ret and self._after_insert:
             for f in self._after_insert:
                 f(row, ret)
@@ -1025,14 +1092,9 @@ class Table(Serializable, BasicStorage):
                 continue
             # if the field is of type upload but this is JSON content
             if field.type == "upload" and isinstance(fields.get(field.name), dict):
-                filename = fields[field.name].get("filename")
-                content = fields[field.name].get("content")
-                if filename and content:
-                    file = io.BytesIO(base64.b64decode(content))
-                value = field.store(file, filename, field.uploadfolder)
-                fields[field.name] = value
-                if field.uploadfolder:
-                    temp_files.append(os.path.join(field.uploadfolder, value))
+                fields[field.name] = self._store_json_upload(
+                    field, fields[field.name], temp_files
+                )
             # if the field has a value use it
             if field.name in fields:
                 id = record and record.get("id")
@@ -1056,18 +1118,111 @@ class Table(Serializable, BasicStorage):
                 # only write if the field was passed and no error
                 new_fields[field.name] = value
         if errors:
-            for path in temp_files:
-                try:
-                    os.unlink(path)
-                except OSError:
-                    pass
+            self._remove_files(temp_files)
         return errors, new_fields
 
+    @staticmethod
+    def _store_json_upload(field, value, temp_files):
+        """
+        Store an upload given as ``{"filename": ..., "content": <base64>}``
+        and return its stored name (None without both keys). Files stored
+        in the field's ``uploadfolder`` are appended to ``temp_files``,
+        to be removed if the record turns out invalid.
+        """
+        filename = value.get("filename")
+        content = value.get("content")
+        if not (filename and content):
+            return None
+        file = io.BytesIO(base64.b64decode(content))
+        name = field.store(file, filename, field.uploadfolder)
+        if field.uploadfolder:
+            temp_files.append(os.path.join(field.uploadfolder, name))
+        return name
+
+    @staticmethod
+    def _remove_files(paths):
+        """Delete the files stored for an invalid record, where still there."""
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
     def validate_and_insert(self, **fields):
         errors, new_fields = self._validate_fields(fields)
         record_id = self.insert(**new_fields) if not errors else None
         return {"id": record_id, "errors": errors, "success": record_id is not None}
 
+    def validate_many(self, items, executor=None):
+        """
+        Validate a list of dicts for insertion, like ``_validate_fields``
+        but column by column: each field's validators see the whole
+        batch, so DB-backed ones (``IS_IN_DB``, ``IS_NOT_IN_DB``) run a
+        query per chunk instead of per value, and ``IS_NOT_IN_DB`` also
+        rejects values repeated within the batch.
+
+        With an ``executor`` (e.g. a ``ProcessPoolExecutor``) CPU-bound
+        validators (``CRYPT``, ``IS_STRONG``) do their work in it.
+
+        Returns ``(errors, rows)``: ``errors`` maps the index of each
+        invalid item to its ``{fieldname: message}`` dict and ``rows``
+        holds the validated values of every item.
+        """
+        from .validators import CRYPT
+
+        items = [copy.copy(fields) for fields in items]
+        valid_names = {
+            f.name for f in self if f.writable and f.type != "id" and not f.compute
+        }
+        errors = [
+            dict((name, "invalid") for name in fields if name not in valid_names)
+            for fields in items
+        ]
+        rows = [{} for fields in items]
+        temp_files = [[] for fields in items]
+        for field in self:
+            name = field.name
+            pending = []
+            for k, fields in enumerate(items):
+                if name in errors[k]:
+                    continue
+                if field.required and name not in fields:
+                    errors[k][name] = "required"
+                    continue
+                if field.type == "password" and fields.get(name) == CRYPT.STARS:
+                    continue
+                if field.type == "upload" and isinstance(fields.get(name), dict):
+                    fields[name] = self._store_json_upload(
+                        field, fields[name], temp_files[k]
+                    )
+                if name in fields:
+                    pending.append(k)
+                elif field.default:
+                    value = field.default
+                    rows[k][name] = value() if callable(value) else value
+            results = field.validate_many(
+                [items[k][name] for k in pending], executor
+            )
+            for k, (value, error) in zip(pending, results):
+                if error:
+                    errors[k][name] = "%s" % error
+                else:
+                    rows[k][name] = value() if callable(value) else value
+        for k, paths in enumerate(temp_files):
+            if errors[k]:
+                self._remove_files(paths)
+        return dict((k, e) for k, e in enumerate(errors) if e), rows
+
+    def validate_and_bulk_insert(self, items, executor=None):
+        """
+        ``validate_many`` then, if every item is valid, ``bulk_insert``.
+        Returns ``{"ids": ..., "errors": {index: {field: message}},
+        "success": ...}``; nothing is inserted when any item fails.
+        """
+        errors, rows = self.validate_many(items, executor)
+        ids = self.bulk_insert(rows) if not errors else None
+        return {"ids": ids, "errors": errors, "success": not errors}
+
     def validate_and_update(self, _key, **fields):
         record = self(**_key) if isinstance(_key, dict) else self(_key)
         errors, new_fields = self._validate_fields(fields, record)
@@ -1145,6 +1300,7 @@ class Table(Serializable, BasicStorage):
         if any(f(el) for el in data for f in self._before_insert):
             return 0
         ret = self._db._adapter.bulk_insert(self, [el.op_values() for el in data])
+        table_written(self)
         ret and [
             [f(el, ret[k]) for k, el in enumerate(data)] for f in self._after_insert
         ]
@@ -1154,7 +1310,9 @@ class Table(Serializable, BasicStorage):
         return self._db._adapter.dialect.truncate(self, mode)
 
     def truncate(self, mode=""):
-        return self._db._adapter.truncate(self, mode)
+        ret = self._db._adapter.truncate(self, mode)
+        table_written(self, cascade=True)
+        return ret
 
     def import_from_csv_file(
         self,
@@ -1362,6 +1520,57 @@ class Table(Serializable, BasicStorage):
         setattr(self._db._aliased_tables, alias, other)
         return other
 
+    def _copy_for(self, db):
+        """
+        Return a copy of this (template) table bound to ``db``.
+
+        Used by ``DAL.from_template``: fields are shallow-copied and
+        rebound, per-table lists are copied so appending to them never
+        leaks back into the template, and pydal's own upload hooks,
+        ``add_method`` methods, the record-versioning hook and the
+        ``IS_IN_DB``/``IS_NOT_IN_DB`` validators querying the template
+        are re-pointed at the copy. References to other tables are fixed
+        up by the DAL.
+        """
+        # plain __dict__ copies: this runs for every table of every
+        # per-request DAL, so skip copy.copy and Table.__setitem__
+        other = object.__new__(type(self))
+        attrs = other.__dict__
+        attrs.update(self.__dict__)
+        attrs["_db"] = db
+        attrs["_fields"] = SQLCallableList(self._fields)
+        attrs["virtualfields"] = list(self.virtualfields)
+        attrs["_virtual_fields"] = list(self._virtual_fields)
+        attrs["_virtual_methods"] = list(self._virtual_methods)
+        attrs["add_method"] = MethodAdder(other)
+        attrs["ALL"] = SQLALL(other)
+        template_db = self._db
+        for name in _TABLE_CALLBACKS:
+            attrs[name] = [
+                _UPLOAD_HOOKS[callback.__qualname__](other)
+                if getattr(callback, "__qualname__", None) in _UPLOAD_HOOKS
+                else _rebound(callback, template_db, db)
+                for callback in attrs[name]
+            ]
+        for key, value in self.__dict__.items():
+            if isinstance(value, types.MethodType) and value.__self__ is self:
+                attrs[key] = types.MethodType(value.__func__, other)
+        field_new = object.__new__
+        for fieldname in self._fields:
+            field = self.__dict__[fieldname]
+            copied = field_new(type(field))
+            copied.__dict__.update(field.__dict__)
+            copied.db = copied._db = db
+            copied.table = copied._table = other
+            requires = _rebound(field.requires, template_db, db)
+            copied.requires = list(requires) if isinstance(requires, list) else requires
+            attrs[fieldname] = copied
+        if "id" in attrs and "id" not in self._fields:
+            attrs["id"] = attrs[self.id.name]
+        if getattr(self, "_id", None) is not None:
+            attrs["_id"] = attrs[self._id.name]
+        return other
+
     def on(self, query):
         return Expression(self._db, self._db._adapter.dialect.on, self, query)
 
@@ -1372,6 +1581,48 @@ class Table(Serializable, BasicStorage):
         return self._db._adapter.drop_index(self, name, if_exists)
 
 
+class Index(object):
+    """
+    An index declared with ``DAL.define_table(..., indexes=[...])``::
+
+        db.define_table(
+            "person",
+            Field("name"),
+            Field("email"),
+            indexes=[
+                Index("person_name_idx", "name"),
+                Index("person_email_idx", "email", unique=True),
+            ],
+        )
+
+    ``expressions`` are field names, ``Field``s, expressions, or
+    callables taking the table and returning one (for expressions over
+    the table being defined: ``lambda t: t.email.lower()``); ``where``
+    (a query or such a callable) makes it a partial index.
+    ``concurrently=True`` builds it with ``CREATE INDEX CONCURRENTLY``
+    where the backend supports it (PostgreSQL). The migrator stores
+    declared indexes in the table snapshot and creates or drops them
+    as the declaration changes.
+    """
+
+    def __init__(self, name, *expressions, **kwargs):
+        if not expressions:
+            raise SyntaxError("Index %s has no expressions" % name)
+        invalid_kwargs = set(kwargs) - set(("unique", "where", "concurrently"))
+        if invalid_kwargs:
+            raise SyntaxError(
+                'invalid index "%s" attributes: %s' % (name, invalid_kwargs)
+            )
+        self.name = name
+        self.expressions = expressions
+        self.unique = kwargs.get("unique", False)
+        self.where = kwargs.get("where")
+        self.concurrently = kwargs.get("concurrently", False)
+
+    def __repr__(self):
+        return "<Index %s>" % self.name
+
+
 class Select(BasicStorage):
     """
     A SELECT statement reified as a first-class object.
@@ -2236,8 +2487,12 @@ class Field(Expression, Serializable):
               uploadseparate=False,
                   # True  -> bucket uploads under a per-uuid subfolder
                   # False -> all uploads go to one folder
-              uploadfs=None)
+              uploadfs=None,
+              uploadstore=None)
               # uploadfs is a pyfilesystem instance for non-local storage
+              # uploadstore="cas" stores each distinct content once, under
+              # its sha256, for all the uploads of the field (unused
+              # content is removed by sweep_content, not autodelete)
 
     See ``README.md`` for the full type catalogue.
     """
@@ -2275,6 +2530,7 @@ class Field(Expression, Serializable):
         uploadfolder=None,
         uploadseparate=False,
         uploadfs=None,
+        uploadstore=None,
         compute=None,
         custom_store=None,
         custom_retrieve=None,
@@ -2349,6 +2605,9 @@ class Field(Expression, Serializable):
         self.uploadfolder = uploadfolder
         self.uploadseparate = uploadseparate
         self.uploadfs = uploadfs
+        if uploadstore not in (None, "cas"):
+            raise SyntaxError("Field: invalid uploadstore: %s" % uploadstore)
+        self.uploadstore = uploadstore
         self.widget = widget
         self.comment = comment
         self.writable = writable
@@ -2483,18 +2742,22 @@ class Field(Expression, Serializable):
         filename = os.path.basename(filename.replace("/", os.sep).replace("\\", os.sep))
         m = re.search(REGEX_UPLOAD_EXTENSION, filename)
         extension = m and m.group(1) or "txt"
-        uuid_key = self._db.uuid().replace("-", "")[-16:] if self._db else uuidstr()
         encoded_filename = to_native(base64.urlsafe_b64encode(to_bytes(filename)))
-        newfilename = "%s.%s.%s.%s" % (
-            getattr(self, "_tablename", "no_table"),
-            self.name,
-            uuid_key,
-            encoded_filename,
-        )
-        newfilename = (
-            newfilename[: (self.length - 1 - len(extension))] + "." + extension
-        )
+
+        def make_filename(key):
+            newfilename = "%s.%s.%s.%s" % (
+                getattr(self, "_tablename", "no_table"),
+                self.name,
+                key,
+                encoded_filename,
+            )
+            return newfilename[: (self.length - 1 - len(extension))] + "." + extension
+
         self_uploadfield = self.uploadfield
+        if self.uploadstore == "cas" and self_uploadfield is True:
+            return make_filename(self._store_content(file, path))
+        uuid_key = self._db.uuid().replace("-", "")[-16:] if self._db else uuidstr()
+        newfilename = make_filename(uuid_key)
         if isinstance(self_uploadfield, Field):
             blob_uploadfield_name = self_uploadfield.uploadfield
             keys = {
@@ -2536,6 +2799,116 @@ class Field(Expression, Serializable):
             dest_file.close()
         return newfilename
 
+    def _store_content(self, file, path=None):
+        """
+        Store the content of ``file`` once under its sha256 (streamed
+        through a temporary file) and return the hex digest.
+
+        Blobs go to ``<uploadfolder>/<table>.<field>/<digest[:2]>/<digest>``,
+        the layout of ``uploadseparate``.
+        """
+        path = self._content_folder(path)
+        if not exists(path):
+            os.makedirs(path, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmpname = tempfile.mkstemp(dir=path, prefix=".upload.")
+        try:
+            with os.fdopen(fd, "wb") as dest_file:
+                while True:
+                    chunk = file.read(65536)
+                    if not chunk:
+                        break
+                    chunk = to_bytes(chunk)
+                    digest.update(chunk)
+                    dest_file.write(chunk)
+            key = digest.hexdigest()
+            path = pjoin(path, key[:2])
+            if not exists(path):
+                os.makedirs(path, exist_ok=True)
+            pathfilename = pjoin(path, key)
+            if exists(pathfilename):
+                os.unlink(tmpname)
+                # reused: not to be swept before the record commits
+                os.utime(pathfilename)
+            else:
+                os.replace(tmpname, pathfilename)
+        except IOError:
+            if exists(tmpname):
+                os.unlink(tmpname)
+            raise IOError(
+                'Unable to store file "%s" because invalid permissions, '
+                "readonly file system, or filename too long" % tmpname
+            )
+        return key
+
+    def _content_folder(self, path=None):
+        """Folder holding the blobs of an ``uploadstore="cas"`` field."""
+        if self.uploadfs:
+            raise RuntimeError("not supported")
+        if path:
+            pass
+        elif self.uploadfolder:
+            path = self.uploadfolder
+        elif self.db._adapter.folder:
+            path = pjoin(self.db._adapter.folder, "..", "uploads")
+        else:
+            raise RuntimeError("you must specify a Field(..., uploadfolder=...)")
+        return pjoin(path, "%s.%s" % (self._tablename, self.name))
+
+    def sweep_content(self, max_age=3600, path=None):
+        """
+        Delete the blobs of an ``uploadstore="cas"`` field that no record
+        references (filtered out ones included), and the leftovers of
+        interrupted uploads. Returns the number of files deleted.
+
+        Deleting or updating records never removes a blob, since another
+        transaction may be storing the same content meanwhile: run this
+        periodically instead. Files written or reused by ``store`` in the
+        last ``max_age`` seconds are kept, so uploads whose record is not
+        committed yet are safe.
+        """
+        if self.uploadstore != "cas":
+            raise RuntimeError("sweep_content needs uploadstore='cas'")
+        folder = self._content_folder(path)
+        cutoff = time.time() - max_age
+        candidates = []
+        for dirpath, _, names in os.walk(folder):
+            for name in names:
+                filename = pjoin(dirpath, name)
+                if os.path.getmtime(filename) < cutoff:
+                    candidates.append((name, filename))
+        if not candidates:
+            return 0
+        dbset = self.db(self != None, ignore_common_filters=True)
+        used = set(
+            self._content_key(row[self.name])
+            for row in dbset.select(self, distinct=True)
+        )
+        removed = 0
+        for name, filename in candidates:
+            if name in used:
+                continue
+            try:
+                # unless store() reused it since the listing
+                if os.path.getmtime(filename) < cutoff:
+                    os.unlink(filename)
+                    removed += 1
+            except OSError:
+                # already gone
+                pass
+        return removed
+
+    def _content_key(self, name):
+        """
+        Return the sha256 an ``uploadstore="cas"`` file name refers to, or
+        None for a name stored otherwise (e.g. before the field used it).
+        """
+        if self.uploadstore != "cas":
+            return None
+        m = re.match(REGEX_UPLOAD_PATTERN, name)
+        key = m and m.group("uuidkey")
+        return key if key and len(key) == 64 else None
+
     def retrieve(self, name, path=None, nameonly=False):
         """
         If `nameonly==True` return (filename, fullfilename) instead of
@@ -2566,7 +2939,9 @@ class Field(Expression, Serializable):
             # ## if file is on regular filesystem
             # this is intentionally a string with filename and not a stream
             # this propagates and allows stream_file_or_304_or_206 to be called
-            fullname = pjoin(file_properties["path"], name)
+            fullname = pjoin(
+                file_properties["path"], self._content_key(name) or name
+            )
             if nameonly:
                 return (filename, fullname)
             stream = open(fullname, "rb")
@@ -2601,7 +2976,7 @@ class Field(Expression, Serializable):
             else:
                 path = pjoin(self.db._adapter.folder, "..", "uploads")
                 path = os.path.abspath(path)
-        if self.uploadseparate:
+        if self.uploadseparate or self._content_key(name):
             t = m.group("table")
             f = m.group("field")
             u = m.group("uuidkey")
@@ -2644,6 +3019,25 @@ class Field(Expression, Serializable):
                 return (value, error)
         return ((value if value != self.map_none else None), None)
 
+    def validate_many(self, values, executor=None):
+        """
+        Validate a batch of values for new records; returns a
+        ``(value, error)`` pair per value, like ``validate``.
+        ``executor`` is passed on to the validators.
+        """
+        requires = self.requires
+        if not requires or requires is DEFAULT:
+            return [((v if v != self.map_none else None), None) for v in values]
+        if not isinstance(requires, (list, tuple)):
+            requires = [requires]
+        from .validators import validate_many
+
+        return [
+            (value, error) if error else
+            ((value if value != self.map_none else None), None)
+            for value, error in validate_many(requires, values, executor)
+        ]
+
     def count(self, distinct=None):
         return Expression(self.db, self._dialect.count, self, distinct, "integer")
 
@@ -2661,6 +3055,7 @@ class Field(Expression, Serializable):
             "uploadseparate",
             "widget",
             "uploadfs",
+            "uploadstore",
             "update",
             "custom_delete",
             "uploadfield",
@@ -3220,6 +3615,7 @@ class Set(Serializable):
         if any(f(self) for f in table._before_delete):
             return 0
         ret = db._adapter.delete(table, self.query)
+        table_written(table, cascade=True)
         ret and [f(self) for f in table._after_delete]
         return ret
 
@@ -3230,6 +3626,7 @@ class Set(Serializable):
         db = self.db
         table = db._adapter.get_table(self.query)
         ret = db._adapter.delete(table, self.query)
+        table_written(table, cascade=True)
         return ret
 
     def _build_update_row(self, update_fields):
@@ -3245,6 +3642,7 @@ class Set(Serializable):
         if run_callbacks and any(f(self, row) for f in table._before_update):
             return 0
         ret = self.db._adapter.update(table, self.query, row.op_values())
+        table_written(table)
         if run_callbacks and ret:
             for f in table._after_update:
                 f(self, row)
@@ -4127,6 +4525,9 @@ class IterRows(BasicRows):
         db_row = self.cursor.fetchone()
         if db_row is None:
             raise StopIteration
+        return self._parse_row(db_row)
+
+    def _parse_row(self, db_row):
         row = self.db._adapter._parse(
             db_row,
             self.tmps,
@@ -4161,6 +4562,24 @@ class IterRows(BasicRows):
             return
         return
 
+    def batches(self, size=500):
+        """
+        Yield lists of at most ``size`` rows, fetched from the cursor
+        ``size`` at a time with ``fetchmany``.
+        """
+        head = [self._head] if self._head else []
+        if len(head) == size:
+            yield head
+            head = []
+        while True:
+            db_rows = self.cursor.fetchmany(size - len(head))
+            batch = head + [self._parse_row(db_row) for db_row in db_rows]
+            head = []
+            if batch:
+                yield batch
+            if not db_rows:
+                return
+
     def first(self):
         if self._head is None:
             try:
@@ -27,13 +27,6 @@ import re
 from typing import Any, Dict, Optional, Set
 
 from .objects import Field
-from .validators import (
-    IS_DATE,
-    IS_DATETIME,
-    IS_FLOAT_IN_RANGE,
-    IS_INT_IN_RANGE,
-    IS_TIME,
-)
 
 
 class QueryParseError(RuntimeError):
@@ -49,6 +42,16 @@ def validate(field: Field, value: Any) -> None:
     -> ISO-format). Raises ``QueryParseError`` on failure; types
     without a known validator pass through unchecked.
     """
+    # validators is heavy and only needed once a query is parsed, so
+    # it isn't imported with the module.
+    from .validators import (
+        IS_DATE,
+        IS_DATETIME,
+        IS_FLOAT_IN_RANGE,
+        IS_INT_IN_RANGE,
+        IS_TIME,
+    )
+
     error = None
     if (
         field.type == "id"
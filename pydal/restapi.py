@@ -4,7 +4,9 @@ JSON REST API generator for any pydal database.
 ``RestAPI(db, policy)(method, tablename, ...)`` dispatches a CRUD
 request against ``db`` according to a ``Policy``. The result is a
 JSON-serializable dict with ``status`` / ``code`` / ``items`` /
-``count`` / etc.
+``count`` / etc. With ``RestAPI(db, policy, debug=True)`` it also
+carries ``round_trips``, the number of statements the request sent to
+the database, for the caller to expose as a debug header.
 
 Search expressions support dotted-key predicates
 (``color.name.eq=red`` joins through the ``color`` reference) and
@@ -15,17 +17,23 @@ See ``RestAPI.search`` for the full query language.
 """
 
 import collections
+import contextlib
 import copy
 import fnmatch
 import functools
 import re
+import threading
+import types
 from typing import Any, Callable, Dict, List, Optional
 
+from .helpers.classes import ExecutionHandler
+from .helpers.serializers import serializers
+from .objects import Expression
 from .utils import utcnow
 
 __version__ = "0.1"
 
-__all__ = ["RestAPI", "Policy", "ALLOW_ALL_POLICY", "DENY_ALL_POLICY"]
+__all__ = ["RestAPI", "Policy", "JSONStream", "ALLOW_ALL_POLICY", "DENY_ALL_POLICY"]
 
 MAX_LIMIT = 1000
 
@@ -72,6 +80,9 @@ def error_wrapper(func: Callable) -> Callable:
         data = {}
         try:
             data = func(*args, **kwargs)
+            if isinstance(data, JSONStream):
+                # the stream writes its own status in the footer
+                return data
             if not data.get("errors"):
                 data["status"] = "success"
                 data["code"] = 200
@@ -92,13 +103,55 @@ def error_wrapper(func: Callable) -> Callable:
             data["message"] = str(e)
             data["code"] = 400
         finally:
-            data["timestamp"] = utcnow().isoformat()
-            data["api_version"] = __version__
+            if isinstance(data, dict):
+                data["timestamp"] = utcnow().isoformat()
+                data["api_version"] = __version__
         return data
 
     return wrapper
 
 
+class RoundTrips(ExecutionHandler):
+    """
+    Appends every statement to the lists ``RestAPI.count_round_trips``
+    has open in the executing thread. It is installed once per adapter
+    and stays there: requests in other threads sharing the adapter are
+    neither counted nor affected by a request adding or removing it.
+    """
+
+    local = threading.local()
+    lock = threading.Lock()
+
+    @classmethod
+    def collectors(cls):
+        """The lists open in this thread"""
+        if not hasattr(cls.local, "collectors"):
+            cls.local.collectors = []
+        return cls.local.collectors
+
+    def before_execute(self, command):
+        for commands in RoundTrips.collectors():
+            commands.append(command)
+
+
+class JSONStream:
+    """
+    The body of a streamed GET response: an iterable of UTF-8 encoded
+    JSON chunks that together form the same document ``search`` returns.
+
+    It can be returned as is from a WSGI application or handed to an
+    ASGI streaming response; ``code`` is the HTTP status to send.
+    """
+
+    code = 200
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+
 class Policy:
     """
     Access-control rules for a ``RestAPI``.
@@ -283,6 +336,14 @@ class RestAPI:
         api("POST", "person", post_vars={"name": "Alice"})
         api("PUT", "person", id=42, post_vars={"name": "Bob"})
         api("DELETE", "person", id=42)
+
+    With ``debug=True`` every response carries ``round_trips``, the
+    number of statements executed while serving it (e.g. for an
+    ``X-DB-Round-Trips`` header).
+
+    With ``stream=True`` a successful GET returns a ``JSONStream``
+    instead of a dict, built ``stream_batch_size`` rows at a time (see
+    ``stream_search``), so large pages never sit in memory whole.
     """
 
     re_table_and_fields = re.compile(r"\w+([\w+(,\w+)+])?")
@@ -291,11 +352,48 @@ class RestAPI:
     )
     re_no_brackets = re.compile(r"\[.*?\]")
 
-    def __init__(self, db, policy: Optional[Policy]):
+    def __init__(
+        self,
+        db,
+        policy: Optional[Policy],
+        debug: bool = False,
+        stream: bool = False,
+        stream_batch_size: int = 500,
+    ):
         self.db = db
         self.policy = policy
+        self.debug = debug
+        self.stream = stream
+        self.stream_batch_size = stream_batch_size
         self.allow_count = "legacy"
 
+    @contextlib.contextmanager
+    def count_round_trips(self):
+        """
+        Yield a list that collects every statement the adapter executes
+        in this thread inside the block. Adapters without execution
+        handlers (NoSQL) leave it empty.
+        """
+        commands = []
+        handlers = getattr(self.db._adapter, "execution_handlers", None)
+        if handlers is None:
+            yield commands
+            return
+        if RoundTrips not in handlers:
+            with RoundTrips.lock:
+                if RoundTrips not in handlers:
+                    handlers.append(RoundTrips)
+        # a streamed body may be closed from another thread
+        collectors = RoundTrips.collectors()
+        collectors.append(commands)
+        try:
+            yield commands
+        finally:
+            for k, collector in enumerate(collectors):
+                if collector is commands:
+                    del collectors[k]
+                    break
+
     @error_wrapper
     def __call__(
         self,
@@ -320,6 +418,28 @@ class RestAPI:
         Errors are converted to structured responses by
         ``@error_wrapper``.
         """
+        if not self.debug:
+            return self.dispatch(
+                method, tablename, id, get_vars, post_vars, allow_count
+            )
+        with self.count_round_trips() as commands:
+            data = self.dispatch(
+                method, tablename, id, get_vars, post_vars, allow_count
+            )
+        if not isinstance(data, JSONStream):
+            data["round_trips"] = len(commands)
+        return data
+
+    def dispatch(
+        self,
+        method: str,
+        tablename: str,
+        id: Optional[Any] = None,
+        get_vars: Optional[Dict[str, Any]] = None,
+        post_vars: Optional[Dict[str, Any]] = None,
+        allow_count: Any = "legacy",
+    ):
+        """The body of ``__call__``, without the error handling."""
         method = method.upper()
         get_vars = get_vars or {}
         post_vars = post_vars or {}
@@ -338,6 +458,8 @@ class RestAPI:
         if method == "GET":
             if id:
                 get_vars["id.eq"] = id
+            if self.stream:
+                return self.stream_search(tablename, get_vars)
             return self.search(tablename, get_vars)
         elif method == "POST":
             table = self.db[tablename]
@@ -466,7 +588,13 @@ class RestAPI:
         * ``@lookup`` — comma-separated reference traversal spec.
         * ``@model`` — include a ``model`` block per ``table_model``.
         * ``@options_list`` — return ``{value, text}`` pairs instead of full rows.
-        * ``@count`` — include a total ``count`` in the response.
+        * ``@count`` — include a total ``count`` in the response. Where
+          the dialect has ``window_count()`` the total comes back with
+          the page, as ``COUNT(*) OVER ()``, instead of from a second
+          query.
+
+        ``RestAPI(..., stream=True)`` serves the same search through
+        ``stream_search`` instead.
 
         Regular keys are field predicates of the form
         ``field[.subfield][.op]`` where ``op`` is in
@@ -474,29 +602,118 @@ class RestAPI:
         ``contains``/``in`` (default ``eq``). Prefix with ``not.`` for
         negation. Up to four dots for relational hops.
         """
+        plan = self.plan_search(tname, vars)
+        rows = self.db(plan.query).select(
+            *plan.fields,
+            limitby=(plan.offset, plan.limit + plan.offset),
+            orderby=plan.orderby,
+        )
+        total = None
+        if plan.window_count is not None:
+            if rows.records:
+                total = rows.records[0]["_extra"][str(plan.window_count)]
+            elif plan.offset == 0 and plan.limit > 0:
+                total = 0
+            # drop the total from the rows so they compact again
+            for record in rows.records:
+                del record["_extra"]
+            rows.colnames.remove(str(plan.window_count))
+        self.mask_passwords(rows, plan.passwords)
+        self.apply_lookups(plan.table, rows, plan.lookup)
+        response = {"items": self.format_items(plan.table, rows, plan.options_list)}
+        if plan.want_count:
+            response["count"] = self.count(plan, total)
+        if plan.model:
+            response["model"] = self.table_model(plan.table, plan.model_fieldnames)
+        return response
+
+    def stream_search(self, tname: str, vars: Dict[str, Any]) -> "JSONStream":
+        """
+        Execute a search like ``search`` but return a ``JSONStream``.
+
+        The query, policy and field checks run immediately, so their
+        errors surface as the usual error dict. The rows are read with
+        ``iterselect``, ``stream_batch_size`` at a time; each batch gets
+        its lookups and is written out row by row, between a header
+        (``{"items": [``) and a footer carrying ``count``, ``model``,
+        ``status``, ``code`` and, with ``debug``, ``round_trips``.
+        """
+        plan = self.plan_search(tname, vars)
+
+        def chunks():
+            with self.count_round_trips() as commands:
+                yield '{"items": ['
+                total = None
+                separator = ""
+                rows = self.db(plan.query).iterselect(
+                    *plan.fields,
+                    limitby=(plan.offset, plan.limit + plan.offset),
+                    orderby=plan.orderby,
+                )
+                for batch in rows.batches(self.stream_batch_size):
+                    if plan.window_count is not None:
+                        total = batch[0][plan.window_count]
+                        batch = [row[plan.table._tablename] for row in batch]
+                    self.mask_passwords(batch, plan.passwords)
+                    self.apply_lookups(plan.table, batch, plan.lookup)
+                    for item in self.format_items(
+                        plan.table, batch, plan.options_list
+                    ):
+                        yield separator + serializers.json(item)
+                        separator = ", "
+                if total is None and plan.window_count is not None:
+                    if plan.offset == 0 and plan.limit > 0:
+                        total = 0
+                footer = {}
+                if plan.want_count:
+                    footer["count"] = self.count(plan, total)
+                if plan.model:
+                    footer["model"] = self.table_model(
+                        plan.table, plan.model_fieldnames
+                    )
+                footer.update(
+                    status="success",
+                    code=200,
+                    timestamp=utcnow().isoformat(),
+                    api_version=__version__,
+                )
+                if self.debug:
+                    footer["round_trips"] = len(commands)
+            yield "], " + serializers.json(footer)[1:]
 
-        def check_table_permission(tablename):
-            if self.policy:
-                self.policy.check_if_allowed("GET", tablename)
+        return JSONStream(chunk.encode("utf8") for chunk in chunks())
 
-        def check_table_lookup_permission(tablename):
-            if self.policy:
-                self.policy.check_if_lookup_allowed(tablename)
+    def filter_fieldnames(self, table, fieldnames: List[str]) -> List[str]:
+        """
+        Check requested ``fieldnames`` against the policy, or default
+        to every field the policy (or the table) exposes.
+        """
+        if self.policy:
+            if fieldnames:
+                self.policy.check_fieldnames(table, fieldnames)
+            else:
+                fieldnames = self.policy.allowed_fieldnames(table)
+        elif not fieldnames:
+            fieldnames = table.fields
+        return fieldnames
 
-        def filter_fieldnames(table, fieldnames):
-            if self.policy:
-                if fieldnames:
-                    self.policy.check_fieldnames(table, fieldnames)
-                else:
-                    fieldnames = self.policy.allowed_fieldnames(table)
-            elif not fieldnames:
-                fieldnames = table.fields
-            return fieldnames
+    def check_lookup_permission(self, tablename: str) -> None:
+        """Raise ``PolicyViolation`` unless ``@lookup`` may join ``tablename``."""
+        if self.policy:
+            self.policy.check_if_lookup_allowed(tablename)
 
+    def plan_search(self, tname: str, vars: Dict[str, Any]):
+        """
+        Parse and authorize a search without running it.
+
+        Returns a namespace with the ``table``, ``query`` and select
+        ``fields`` plus the parsed meta-options; see ``search``.
+        """
         db = self.db
         tname, tfieldnames = RestAPI.parse_table_and_fields(tname)
-        check_table_permission(tname)
-        tfieldnames = filter_fieldnames(db[tname], tfieldnames)
+        if self.policy:
+            self.policy.check_if_allowed("GET", tname)
+        tfieldnames = self.filter_fieldnames(db[tname], tfieldnames)
         query = []
         offset = 0
         limit = 100
@@ -618,14 +835,79 @@ class RestAPI:
             for tfieldname in tfieldnames
             if table[tfieldname].type == "password"
         ]
-        rows = db(query).select(
-            *tfields, limitby=(offset, limit + offset), orderby=orderby
+        want_count = do_count or (self.allow_count == "legacy" and offset == 0)
+        window_count = None
+        if want_count and tfields:
+            sql = getattr(db._adapter.dialect, "window_count", lambda: None)()
+            if sql:
+                window_count = Expression(db, sql, type="integer")
+                tfields.append(window_count)
+        return types.SimpleNamespace(
+            table=table,
+            query=query,
+            fields=tfields,
+            passwords=passwords,
+            offset=offset,
+            limit=limit,
+            orderby=orderby,
+            lookup=lookup,
+            model=model,
+            model_fieldnames=model_fieldnames,
+            options_list=options_list,
+            want_count=want_count,
+            window_count=window_count,
         )
+
+    def count(self, plan, total: Optional[int] = None) -> int:
+        """The search total: ``total`` when the page carried it, else a query."""
+        return self.db(plan.query).count() if total is None else total
+
+    @staticmethod
+    def mask_passwords(rows, passwords: List[str]) -> None:
+        """Replace the value of every password field with ``******``."""
         if passwords:
             dpass = {password: "******" for password in passwords}
             for row in rows:
                 row.update(dpass)
 
+    def apply_lookups(self, table, rows, lookup: Dict[str, Any]) -> None:
+        """
+        Resolve the ``@lookup`` keys of a search for ``rows`` (a page or
+        a streamed batch) and store the referenced records in place.
+        """
+        db = self.db
+        # single-hop lookups on the same table share one belongs() query
+        ref_fieldnames = collections.defaultdict(set)
+        ref_ids = collections.defaultdict(set)
+        for key in lookup:
+            key = key.split(":")[-1]
+            if "." in key:
+                continue
+            key, fieldnames = RestAPI.parse_table_and_fields(key)
+            ref_tablename = table[key].type.split(" ")[1]
+            ref_table = db[ref_tablename]
+            ref_fieldnames[ref_tablename].update(
+                fieldname
+                for fieldname in self.filter_fieldnames(ref_table, fieldnames)
+                if ref_table[fieldname].type != "password"
+            )
+            ref_ids[ref_tablename].update(row[key] for row in rows)
+        ref_rows = {}
+        for ref_tablename, fieldnames in ref_fieldnames.items():
+            self.check_lookup_permission(ref_tablename)
+            if not ref_ids[ref_tablename]:
+                ref_rows[ref_tablename] = {}
+                continue
+            ref_table = db[ref_tablename]
+            tfields = [ref_table[fieldname] for fieldname in fieldnames]
+            if not "id" in fieldnames:
+                tfields.append(ref_table["id"])
+            ref_rows[ref_tablename] = (
+                db(ref_table._id.belongs(ref_ids[ref_tablename]))
+                .select(*tfields)
+                .as_dict()
+            )
+
         lookup_map = {}
         for key in list(lookup.keys()):
             name, key = key.split(":") if ":" in key else ("", key)
@@ -640,20 +922,18 @@ class RestAPI:
                 key, tfieldnames = RestAPI.parse_table_and_fields(key[0])
                 ref_tablename = table[key].type.split(" ")[1]
                 ref_table = db[ref_tablename]
-                tfieldnames = filter_fieldnames(ref_table, tfieldnames)
-                check_table_lookup_permission(ref_tablename)
-                ids = [row[key] for row in rows]
-                tfields = [
-                    ref_table[tfieldname]
+                tfieldnames = self.filter_fieldnames(ref_table, tfieldnames)
+                fieldnames = [
+                    tfieldname
                     for tfieldname in tfieldnames
                     if ref_table[tfieldname].type != "password"
                 ]
-                if not "id" in tfieldnames:
-                    tfields.append(ref_table["id"])
-                drows = db(ref_table._id.belongs(ids)).select(*tfields).as_dict()
-                if tfieldnames and not "id" in tfieldnames:
-                    for row in drows.values():
-                        del row["id"]
+                if not tfieldnames:
+                    fieldnames.append("id")
+                drows = {
+                    id: {fieldname: row[fieldname] for fieldname in fieldnames}
+                    for id, row in ref_rows[ref_tablename].items()
+                }
                 lkey, collapsed = lookup_map[key]["name"], lookup_map[key]["collapsed"]
                 for row in rows:
                     new_row = drows.get(row[key])
@@ -667,9 +947,9 @@ class RestAPI:
             elif len(key) == 2:
                 lfield, key = key
                 key, tfieldnames = RestAPI.parse_table_and_fields(key)
-                check_table_lookup_permission(key)
+                self.check_lookup_permission(key)
                 ref_table = db[key]
-                tfieldnames = filter_fieldnames(ref_table, tfieldnames)
+                tfieldnames = self.filter_fieldnames(ref_table, tfieldnames)
                 ids = [row["id"] for row in rows]
                 tfields = [ref_table[tfieldname] for tfieldname in tfieldnames]
                 if not lfield in tfieldnames:
@@ -689,13 +969,13 @@ class RestAPI:
                 lfield, key, rfield = key
                 key, tfieldnames = RestAPI.parse_table_and_fields(key)
                 rfield, tfieldnames2 = RestAPI.parse_table_and_fields(rfield)
-                check_table_lookup_permission(key)
+                self.check_lookup_permission(key)
                 ref_table = db[key]
                 ref_ref_tablename = ref_table[rfield].type.split(" ")[1]
-                check_table_lookup_permission(ref_ref_tablename)
+                self.check_lookup_permission(ref_ref_tablename)
                 ref_ref_table = db[ref_ref_tablename]
-                tfieldnames = filter_fieldnames(ref_table, tfieldnames)
-                tfieldnames2 = filter_fieldnames(ref_ref_table, tfieldnames2)
+                tfieldnames = self.filter_fieldnames(ref_table, tfieldnames)
+                tfieldnames2 = self.filter_fieldnames(ref_ref_table, tfieldnames2)
                 ids = [row["id"] for row in rows]
                 tfields = [ref_table[tfieldname] for tfieldname in tfieldnames]
                 if not lfield in tfieldnames:
@@ -727,20 +1007,15 @@ class RestAPI:
                 for row in rows:
                     row[lkey] = drows.get(row.id, [])
 
-        response = {}
+    @staticmethod
+    def format_items(table, rows, options_list: bool) -> List[Dict[str, Any]]:
+        """Rows as dicts, or ``{value, text}`` pairs for ``@options_list``."""
         if not options_list:
-            response["items"] = rows.as_list()
+            return [row.as_dict() for row in rows]
+        if callable(table._format):
+            f = lambda row: trydo(lambda: table._format(row), str(row.id))
+        elif table._format:
+            f = lambda row: trydo(lambda: table._format % row, str(row.id))
         else:
-            if callable(table._format):
-                f = lambda row: trydo(lambda: table._format(row), str(row.id))
-            elif table._format:
-                f = lambda row: trydo(lambda: table._format % row, str(row.id))
-            else:
-                f = lambda row: str(row.id)
-            response["items"] = [dict(value=row.id, text=f(row)) for row in rows]
-
-        if do_count or (self.allow_count == "legacy" and offset == 0):
-            response["count"] = db(query).count()
-        if model:
-            response["model"] = self.table_model(table, model_fieldnames)
-        return response
+            f = lambda row: str(row.id)
+        return [dict(value=row.id, text=f(row)) for row in rows]
@@ -6,21 +6,26 @@ Created by Massimo Di Pierro<massimo.dipierro@gmail.com>
 License: 3-clause BSD
 """
 
+import bisect
+import collections
 import datetime
 import logging
 import math
 import os
+import select
 import signal
 import socket
+import struct
 import sys
 import threading
 import time
 import traceback
+import zlib
 
 from pydal import DAL, Field
 from pydal.validators import IS_IN_SET
 
-from ..utils import utcnow
+from ..utils import to_bytes, utcnow
 
 
 def now():
@@ -34,16 +39,27 @@ def delta(t_secs):
 
 
 def make_daemon(func, filename, cwd="."):
-    """Creates a daemon process running func in cwd and stdout->filename"""
+    """
+    Creates a daemon process running func in cwd and stdout->filename,
+    returns its pid
+    """
+    pid_pipe = os.pipe()
     if os.fork():
-        return
+        os.close(pid_pipe[1])
+        # the first child writes the daemon pid then exits
+        with os.fdopen(pid_pipe[0], "rb") as stream:
+            return int(stream.read() or 0) or None
+    os.close(pid_pipe[0])
     # decouple from parent environment
     os.chdir(cwd)
     # os.setsid()
     os.umask(0)
     # do second fork
-    if os.fork():
+    pid = os.fork()
+    if pid:
+        os.write(pid_pipe[1], str(pid).encode())
         sys.exit(0)
+    os.close(pid_pipe[1])
     # redirect standard file descriptors
     sys.__stdout__.flush()
     sys.__stderr__.flush()
@@ -54,11 +70,35 @@ def make_daemon(func, filename, cwd="."):
             os.dup2(stream_out.fileno(), sys.__stderr__.fileno())
             try:
                 func()
+            except Exception:
+                # never fall back into the caller (the scheduler loop)
+                traceback.print_exc()
             finally:
                 stream_out.flush()
     sys.exit(0)
 
 
+def redirect_output(filename):
+    """Points stdout/stderr of this process to filename (or /dev/null if None)"""
+    sys.__stdout__.flush()
+    sys.__stderr__.flush()
+    with open(filename or os.devnull, "wb") as stream_out:
+        os.dup2(stream_out.fileno(), sys.__stdout__.fileno())
+        os.dup2(stream_out.fileno(), sys.__stderr__.fileno())
+
+
+def read_capped(stream, max_size=None):
+    """Reads a binary file, only its head and tail if over max_size bytes"""
+    size = os.fstat(stream.fileno()).st_size
+    if not max_size or size <= max_size:
+        return stream.read()
+    head = stream.read(max_size // 2)
+    stream.seek(size - (max_size - len(head)))
+    tail = stream.read()
+    skipped = size - len(head) - len(tail)
+    return head + b'\n<truncated bytes="%i"/>\n' % skipped + tail
+
+
 def pid_exists(pid):
     """Check For the existence of a unix pid."""
     try:
@@ -78,6 +118,190 @@ def get_logger(name, log_format="[%(asctime)s]%(levelname)s %(message)s"):
     return logger
 
 
+class Histogram:
+    """Counts observed values (in seconds) in cumulative buckets"""
+
+    buckets = (0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 300, 3600)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = None
+
+    def observe(self, value):
+        """Records one value"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-th quantile, or the
+        largest value seen if lower
+        """
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        """The histogram as a JSON-serializable dict"""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+class SchedulerMetrics:
+    """
+    Counters and histograms of a Scheduler, safe to read from any thread:
+
+    - counters: loop_iterations, idle_waits, step_errors, claims,
+      claimed_runs, claim_conflicts and runs_<status> for every run that
+      ended
+    - histograms: claim_time, queue_wait (ready to started_on) and
+      run_duration (started_on to completed_on)
+
+    queue_wait and run_duration come from task_run timestamps, which are
+    stored to the second.
+    """
+
+    histogram_names = ("claim_time", "queue_wait", "run_duration")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = collections.Counter()
+        self.histograms = {name: Histogram() for name in self.histogram_names}
+
+    def incr(self, name, value=1):
+        """Adds value to a counter"""
+        with self.lock:
+            self.counters[name] += value
+
+    def observe(self, name, value):
+        """Records a value in a histogram"""
+        with self.lock:
+            self.histograms[name].observe(value)
+
+    def snapshot(self):
+        """All the metrics as a JSON-serializable dict"""
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: histogram.as_dict()
+                    for name, histogram in self.histograms.items()
+                },
+            }
+
+
+class FifoWakeup:
+    """
+    Wakes up schedulers on this host through a named pipe: notify() writes
+    a byte to it, a listening scheduler wakes up when it becomes readable.
+    When several schedulers listen on the same pipe, one of them wakes up.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fds = None
+
+    def listen(self):
+        """Creates the pipe if needed and opens it for reading"""
+        try:
+            os.mkfifo(self.path)
+        except FileExistsError:
+            pass
+        reader = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        # holding a writer open keeps the reader from seeing EOF
+        self.fds = (reader, os.open(self.path, os.O_WRONLY | os.O_NONBLOCK))
+
+    def fileno(self):
+        """The file descriptor to wait on"""
+        return self.fds[0]
+
+    def drain(self):
+        """Consumes pending notifications"""
+        try:
+            while os.read(self.fds[0], 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def notify(self):
+        """Wakes up a listener, if any"""
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            # no pipe or nobody listening
+            return
+        try:
+            os.write(fd, b"!")
+        except BlockingIOError:
+            # the pipe is full, a wakeup is pending anyway
+            pass
+        finally:
+            os.close(fd)
+
+    def close(self):
+        """Stops listening"""
+        if self.fds:
+            for fd in self.fds:
+                os.close(fd)
+            self.fds = None
+
+
+class PostgresWakeup:
+    """
+    Wakes up schedulers on any host through Postgres LISTEN/NOTIFY. The
+    notification is sent when the enqueuing transaction commits and every
+    listening scheduler wakes up. Requires psycopg2.
+    """
+
+    def __init__(self, db, channel):
+        self.db = db
+        self.channel = channel
+
+    def listen(self):
+        """Subscribes the connection of the calling thread to the channel"""
+        self.db.executesql(f"LISTEN {self.channel};")
+        self.db.commit()
+
+    def fileno(self):
+        """The file descriptor to wait on"""
+        return self.db._adapter.connection.fileno()
+
+    def drain(self):
+        """Consumes pending notifications"""
+        connection = self.db._adapter.connection
+        connection.poll()
+        del connection.notifies[:]
+
+    def notify(self):
+        """Notifies listeners when the current transaction commits"""
+        self.db.executesql(f"NOTIFY {self.channel};")
+
+    def close(self):
+        """Stops listening"""
+        self.db.executesql(f"UNLISTEN {self.channel};")
+        self.db.commit()
+
+
 class Scheduler:  # pylint: disable=too-many-instance-attributes
     """Makes a scheduler"""
 
@@ -88,9 +312,38 @@ class Scheduler:  # pylint: disable=too-many-instance-attributes
         "folder",
         "logger",
         "sleep_time",
+        "min_sleep_time",
+        "wakeup",
+        "metrics",
         "worker",
+        "mode",
+        "pool_size",
+        "max_log_size",
+        "compress_logs",
         "_looping",
         "_thread",
+        "_pool",
+        "_pool_pending",
+        "_pool_pipe",
+        "_poke_pipe",
+        "_inflight",
+        "_children",
+        "_start_attempts",
+    ]
+
+    # the Postgres channel used to wake up schedulers
+    channel = "pydal_scheduler"
+
+    # times a run may be handed to a process that exits before starting
+    # it (e.g. its first write timed out) before the run is marked dead
+    max_start_attempts = 3
+    # seconds a pool worker may take to connect before it is replaced:
+    # forking a threaded process can leave the child deadlocked
+    start_timeout = 10
+
+    modes = [
+        "fork",  # each run is executed by a new daemon process
+        "pool",  # runs are sent to a pool of persistent worker processes
     ]
 
     statuses = [
@@ -111,18 +364,53 @@ class Scheduler:  # pylint: disable=too-many-instance-attributes
         folder="/tmp/scheduler",
         sleep_time=10,
         logger=None,
+        mode="fork",
+        pool_size=None,
+        wakeup="auto",
+        min_sleep_time=0.5,
+        max_log_size=None,
+        compress_logs=False,
     ):
+        assert mode in Scheduler.modes
+        assert wakeup in ("auto", "postgres", "fifo", None)
         if threading.current_thread() is threading.main_thread():
             signal.signal(signal.SIGCHLD, signal.SIG_IGN)
         self.db = db
         self.max_concurrent_runs = max_concurrent_runs
         self.folder = folder
         self.sleep_time = sleep_time
+        self.min_sleep_time = min(min_sleep_time, sleep_time)
         self.worker = socket.gethostbyname(socket.gethostname())
         self.logger = logger or get_logger("scheduler")
         self.tasks = {}
+        self.mode = mode
+        self.pool_size = pool_size or max_concurrent_runs
+        self.max_log_size = max_log_size
+        self.compress_logs = compress_logs
         self._looping = False
         self._thread = None
+        self._pool = {}
+        self._pool_pending = {}
+        self._pool_pipe = None
+        self._poke_pipe = None
+        self._inflight = set()
+        self._children = {}
+        self._start_attempts = collections.Counter()
+        self.metrics = SchedulerMetrics()
+        if wakeup == "auto":
+            wakeup = (
+                "postgres"
+                if getattr(db._adapter, "driver_name", None) == "psycopg2"
+                else "fifo"
+                if hasattr(os, "mkfifo")
+                else None
+            )
+        if wakeup == "postgres":
+            self.wakeup = PostgresWakeup(db, Scheduler.channel)
+        elif wakeup == "fifo":
+            self.wakeup = FifoWakeup(os.path.join(self.folder, "wakeup.fifo"))
+        else:
+            self.wakeup = None
         # make the output folder if does not exist
         os.makedirs(self.folder, exist_ok=True)
         # create a task_run table if not already provided
@@ -156,6 +444,14 @@ class Scheduler:  # pylint: disable=too-many-instance-attributes
                 Field("output", "json", writable=False),
             )
             db.commit()
+        # with compress_logs, logs go zlib-compressed into a side table
+        if compress_logs and "task_run_log" not in db:
+            db.define_table(
+                "task_run_log",
+                Field("task_run", "reference task_run", writable=False),
+                Field("data", "blob", writable=False),
+            )
+            db.commit()
 
     def start(self):
         """Starts a thread running the main loop of the scheduler"""
@@ -168,8 +464,14 @@ class Scheduler:  # pylint: disable=too-many-instance-attributes
         """Stops the main loop and joins its thread"""
         assert self._thread and self._thread is not None
         self._looping = False
+        try:
+            os.write(self._poke_pipe[1], b"!")
+        except (TypeError, OSError):
+            # the loop is not waiting
+            pass
         self._thread.join()
         self._thread = None
+        self.stop_pool()
 
     def has_work(self):
         """Checks whether the scheduler has any work queued, assigned, or running"""
@@ -181,84 +483,276 @@ class Scheduler:  # pylint: disable=too-many-instance-attributes
 
     def loop(self):
         """Runs the main loop of the scheduler"""
-        db = self.db
         self.logger.info("worker %s/%s start", self.worker, id(self))
-        while self._looping:
-            self.logger.info("loop start (tasks in db %i)", db(db.task_run).count())
-            if not self.step():
-                time.sleep(self.sleep_time)
-            self.logger.info("end loop")
+        self.requeue_assigned()
+        self._poke_pipe = os.pipe()
+        if self.wakeup:
+            self.wakeup.listen()
+        try:
+            # when idle wait longer and longer, up to sleep_time
+            wait_time = self.min_sleep_time
+            while self._looping:
+                self.metrics.incr("loop_iterations")
+                try:
+                    if self.step():
+                        wait_time = self.min_sleep_time
+                        continue
+                except Exception:
+                    # e.g. the database is locked, retry after waiting
+                    self.logger.error(traceback.format_exc())
+                    self.db.rollback()
+                    self.metrics.incr("step_errors")
+                self.metrics.incr("idle_waits")
+                self.wait(wait_time)
+                wait_time = min(2 * wait_time, self.sleep_time)
+        finally:
+            if self.wakeup:
+                self.wakeup.close()
+            for fd in self._poke_pipe:
+                os.close(fd)
+            self._poke_pipe = None
         self.logger.info("worker %s/%s stop", self.worker, id(self))
 
+    def wait(self, timeout):
+        """Sleeps up to timeout seconds, less if woken up by enqueue_run or stop"""
+        fds = [self._poke_pipe[0]]
+        if self.wakeup:
+            fds.append(self.wakeup.fileno())
+        if self._pool_pipe:
+            # pool workers ready or done with a run
+            fds.append(self._pool_pipe[0])
+        ready, _, _ = select.select(fds, [], [], timeout)
+        if self.wakeup and self.wakeup.fileno() in ready:
+            self.wakeup.drain()
+
+    def requeue_assigned(self):
+        """Puts back in the queue runs this worker claimed but never started"""
+        db = self.db
+        wruns = db(db.task_run.worker == self.worker)
+        wruns(db.task_run.status == "assigned").update(status="queued", worker=None)
+        db.commit()
+
     def step(self):
         """Runs one step of the scheduler"""
         db = self.db
-        # find corrupted runs and re-enqueue them
         wruns = db(db.task_run.worker == self.worker)
-        wruns(db.task_run.status == "assigned").update(status="queued")
-        db.commit()
+        if self.mode == "pool":
+            self.fill_pool()
         # check on task timeout
-        runs = wruns(db.task_run.status == "running").select()
+        runs = wruns(db.task_run.status.belongs(("assigned", "running"))).select(
+            *self.run_fields()
+        )
+        active = set()
         num_running = 0
         t_end = now()
         for run in runs:
-            # check for processes that died
-            if not pid_exists(run.pid):
-                log = self.retrieve_log(run) + self._end_tag(
-                    status="dead", completed_on=t_end
-                )
-                run.update_record(status="dead", log=log, completed_on=t_end)
-                db.commit()
-                self.logger.info("run died #%i %s", run.id, run.name)
+            if run.status == "assigned":
+                # the child or pool worker it went to records its pid
+                # once it starts; 0 once a pool worker is done with it
+                pid = self._children.get(run.id)
+                if pid is not None and not (pid and pid_exists(pid)):
+                    self.retry_start(run, t_end)
+                    continue
+                # runs forked or sent to the pool but not started yet
+                # also take a slot
+                active.add(run.id)
+                num_running += 1
+                continue
+            # check for processes that died (unless the run just ended)
+            if run.pid and not pid_exists(run.pid):
+                self.mark_dead(run, t_end)
+                continue
             # check for processes that timedout
             if run.timeout and run.started_on + delta(run.timeout) < now():
                 os.kill(run.pid, signal.SIGKILL)
                 log = self.retrieve_log(run) + self._end_tag(
                     status="timeout", completed_on=t_end
                 )
-                run.update_record(status="timeout", log=log, completed_on=t_end)
+                run.update_record(
+                    status="timeout", completed_on=t_end, **self.store_log(run, log)
+                )
                 db.commit()
                 self.logger.info("run timeout #%i %s", run.id, run.name)
             else:
+                active.add(run.id)
                 num_running += 1
+        self.record_finished(self._inflight - active)
 
         # if too main runs wait before retrying
         if num_running >= self.max_concurrent_runs:
             self.logger.info("too many running tasks")
             return False
+        if self.mode == "pool" and len(self._pool_pending) == len(self._pool):
+            self.logger.info("no pool worker ready")
+            return False
 
-        # try find a new run else wait before retrying
-        run = self.next_run()
-        if not run:
+        # claim as many runs as there are free slots else wait before retrying
+        runs = self.claim_runs(self.max_concurrent_runs - num_running)
+        if not runs:
             self.logger.info("no new tasks")
             return False
+        for run in runs:
+            self.start_run(run)
+        return True
+
+    def retry_start(self, run, t_end):
+        """
+        Puts back in the queue an assigned run whose process exited
+        before starting it, or marks it dead after max_start_attempts
+        """
+        db = self.db
+        self._children.pop(run.id, None)
+        self._start_attempts[run.id] += 1
+        if self._start_attempts[run.id] >= self.max_start_attempts:
+            self.mark_dead(run, t_end)
+            return
+        query = (db.task_run.id == run.id) & (db.task_run.status == "assigned")
+        if db(query).update(status="queued", worker=None):
+            self._inflight.discard(run.id)
+            self.logger.info("run requeued #%i %s", run.id, run.name)
+        db.commit()
+
+    def mark_dead(self, run, t_end):
+        """Marks dead a run whose process is gone, unless it just ended"""
+        db = self.db
+        query = (db.task_run.id == run.id) & (db.task_run.status == run.status)
+        if db(query).update(status="dead", completed_on=t_end):
+            log = self.retrieve_log(run) + self._end_tag(
+                status="dead", completed_on=t_end
+            )
+            run.update_record(**self.store_log(run, log))
+            self.logger.info("run died #%i %s", run.id, run.name)
+        db.commit()
 
-        # if the next is unknown, skip it
+    def start_run(self, run):
+        """Forks a child to execute a claimed run"""
+        db = self.db
+        # if the run is unknown, skip it
         self.logger.info("new run: %s", run.name)
         if run.name not in self.tasks:
             run.update_record(status="unknown")
             db.commit()
-            return True
-
+            self.metrics.incr("runs_unknown")
+            return
+        # hand the run to the least busy pool worker
+        if self.mode == "pool":
+            ready = [pid for pid in self._pool if pid not in self._pool_pending]
+            if not ready:
+                run.update_record(status="queued", worker=None)
+                db.commit()
+                return
+            load = collections.Counter(self._children.values())
+            pid = min(ready, key=lambda pid: load[pid])
+            self._inflight.add(run.id)
+            self._children[run.id] = pid
+            try:
+                os.write(self._pool[pid], struct.pack("q", run.id))
+            except OSError as err:
+                # the worker just died: the run is retried
+                self.logger.error("Pool worker %i error: %s", pid, err)
+                self._children[run.id] = 0
+            return
         # make a child and assign it the run
         filename = self.get_output_filename(run)
         try:
-            make_daemon(lambda run=run: self.safe_exec_child(run), filename)
+            pid = make_daemon(lambda run=run: self.safe_exec_child(run), filename)
+            self._inflight.add(run.id)
+            # 0 if the first child failed: the run is retried
+            self._children[run.id] = pid or 0
         except OSError as err:
             self.logger.error("Fork error: %s", err)
+            run.update_record(status="queued", worker=None)
+            db.commit()
         except Exception:
             self.logger.error(traceback.format_exc())
-        return True
+
+    def record_finished(self, run_ids):
+        """Records the metrics of the given runs, started here and now over"""
+        if not run_ids:
+            return
+        db = self.db
+        self._inflight -= run_ids
+        for run_id in run_ids:
+            self._children.pop(run_id, None)
+            self._start_attempts.pop(run_id, None)
+        table = db.task_run
+        fields = ("status", "queued_on", "scheduled_for", "started_on", "completed_on")
+        for run in db(table.id.belongs(run_ids)).select(*[table[f] for f in fields]):
+            self.metrics.incr("runs_" + run.status)
+            if run.started_on:
+                ready = max(run.queued_on, run.scheduled_for)
+                self.metrics.observe(
+                    "queue_wait", (run.started_on - ready).total_seconds()
+                )
+                if run.completed_on:
+                    self.metrics.observe(
+                        "run_duration",
+                        (run.completed_on - run.started_on).total_seconds(),
+                    )
 
     def next_run(self):
         """Returns the next run ready to be executed"""
+        runs = self.claim_runs(1)
+        return runs[0] if runs else None
+
+    def claim_runs(self, limit):
+        """
+        Atomically assigns to this worker up to limit runs ready to be
+        executed and returns them, highest priority first. No two workers
+        can claim the same run.
+        """
+        if limit < 1:
+            return []
         db = self.db
-        # find the next task to execute
         nruns = db(db.task_run.worker == None)(db.task_run.scheduled_for <= now())
         orderby = db.task_run.priority | db.task_run.id
-        run = nruns.select(orderby=orderby, limitby=(0, 1)).first()
-        self.logger.info("run found #%s %s", run and run.id, run and run.name)
-        if run:
+        adapter = db._adapter
+        engine = getattr(adapter, "dbengine", None)
+        candidates = nruns._select(db.task_run.id, orderby=orderby, limitby=(0, limit))
+        if engine == "postgres":
+            # concurrent claimers skip each other's locked rows
+            candidates = candidates[:-1] + " FOR UPDATE SKIP LOCKED;"
+        elif engine != "sqlite" or adapter.driver.sqlite_version_info < (3, 35, 0):
+            # no UPDATE ... RETURNING
+            return self._claim_runs_one_by_one(nruns, orderby, limit)
+        sql = db(db.task_run.id.belongs(candidates))._update(
+            worker=self.worker, status="assigned"
+        )
+        fields = self.run_fields()
+        returning = ", ".join(field._rname for field in fields)
+        params = getattr(sql, "params", None)
+        t_start = time.perf_counter()
+        try:
+            if engine == "sqlite":
+                # sqlite has no row locks: take the write lock before reading
+                db.commit()
+                adapter.execute("BEGIN IMMEDIATE TRANSACTION;")
+            runs = db.executesql(
+                sql.rstrip(";") + " RETURNING %s;" % returning,
+                placeholders=params,
+                fields=fields,
+            )
+            db.commit()
+        except Exception:
+            self.logger.warning(traceback.format_exc())
+            db.rollback()
+            self.metrics.incr("claim_conflicts")
+            return []
+        self.metrics.observe("claim_time", time.perf_counter() - t_start)
+        self.metrics.incr("claims")
+        self.metrics.incr("claimed_runs", len(runs))
+        runs = sorted(runs, key=lambda run: (run.priority, run.id))
+        for run in runs:
+            self.logger.info("run assigned #%i %s", run.id, run.name)
+        return runs
+
+    def _claim_runs_one_by_one(self, nruns, orderby, limit):
+        """Claims runs with a conditional update each, for other backends"""
+        db = self.db
+        runs = []
+        t_start = time.perf_counter()
+        fields = self.run_fields()
+        for run in nruns.select(*fields, orderby=orderby, limitby=(0, limit)):
             # try assign the run to self if no other process stole it
             try:
                 if (
@@ -268,14 +762,144 @@ class Scheduler:  # pylint: disable=too-many-instance-attributes
                     > 0
                 ):
                     db.commit()
+                    run.worker, run.status = self.worker, "assigned"
                     self.logger.info("run assigned #%i %s", run.id, run.name)
-                    return run
+                    runs.append(run)
+                else:
+                    self.metrics.incr("claim_conflicts")
             except Exception:
-                # some other process stole it, rollback and loop to try again
+                # some other process stole it, rollback and try the next one
                 self.logger.warning(traceback.format_exc())
                 db.rollback()
-        # run not fund
-        return None
+                self.metrics.incr("claim_conflicts")
+        self.metrics.observe("claim_time", time.perf_counter() - t_start)
+        self.metrics.incr("claims")
+        self.metrics.incr("claimed_runs", len(runs))
+        return runs
+
+    def fill_pool(self):
+        """
+        Reads the pool workers' reports, then forks workers up to
+        pool_size, replacing dead or stuck ones
+        """
+        if self._pool_pipe is None:
+            # workers report on it the runs they are done with
+            self._pool_pipe = os.pipe()
+            os.set_blocking(self._pool_pipe[0], False)
+        self.drain_pool()
+        for pid in list(self._pool):
+            try:
+                # reap it if SIGCHLD is not ignored
+                os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                pass
+            if not pid_exists(pid):
+                # the runs it held are retried by step
+                os.close(self._pool.pop(pid))
+                self._pool_pending.pop(pid, None)
+        for pid, forked_on in list(self._pool_pending.items()):
+            if time.time() - forked_on > self.start_timeout:
+                self.logger.error("pool worker %i stuck starting", pid)
+                self.kill_worker(pid)
+        while len(self._pool) < self.pool_size:
+            jobs = os.pipe()
+            try:
+                pid = os.fork()
+            except OSError as err:
+                for fd in jobs:
+                    os.close(fd)
+                self.logger.error("Fork error: %s", err)
+                return
+            if not pid:
+                self.pool_worker(jobs)
+            os.close(jobs[0])
+            self._pool[pid] = jobs[1]
+            self._pool_pending[pid] = time.time()
+            self.logger.info("pool worker %i started", pid)
+
+    @staticmethod
+    def kill_worker(pid):
+        """Kills a pool worker, unless it is gone already"""
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def drain_pool(self):
+        """Reads which pool workers are ready and which runs they are done with"""
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self._pool_pipe[0], 4096)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+        for (value,) in struct.iter_unpack("q", data):
+            if value < 0:
+                self._pool_pending.pop(-value, None)
+            elif value in self._children:
+                self._children[value] = 0
+
+    def stop_pool(self):
+        """Tells pool workers to exit once done with their current run"""
+        if self._pool_pipe is None:
+            return
+        self.drain_pool()
+        for pid in self._pool_pending:
+            # never ready, it would wait forever on the pipe
+            self.kill_worker(pid)
+        for fd in self._pool.values():
+            try:
+                os.write(fd, struct.pack("q", 0))
+            except OSError:
+                # that worker is gone already
+                pass
+            os.close(fd)
+        for fd in self._pool_pipe:
+            os.close(fd)
+        self._pool = {}
+        self._pool_pending = {}
+        self._pool_pipe = None
+
+    def pool_worker(self, jobs):
+        """
+        Main of a pool worker process: executes the runs whose ids arrive
+        on its jobs pipe, over one connection, capturing the output of
+        each into its log file. It reports on the pool pipe once
+        connected (-pid), then each run once done with it (its id)
+        """
+        try:
+            # keep only the read end of its own pipe and the report pipe
+            for fd in list(self._pool.values()) + [jobs[1], self._pool_pipe[0]]:
+                os.close(fd)
+            with open(os.devnull, "rb") as stream_in:
+                os.dup2(stream_in.fileno(), sys.__stdin__.fileno())
+            redirect_output(None)
+            db = self.db
+            db.get_connection_from_pool_or_new()
+            os.write(self._pool_pipe[1], struct.pack("q", -os.getpid()))
+            while True:
+                data = os.read(jobs[0], 8)
+                if len(data) < 8 or not struct.unpack("q", data)[0]:
+                    break
+                run_id = struct.unpack("q", data)[0]
+                try:
+                    run = db(db.task_run.id == run_id).select(*self.run_fields())
+                    run = run.first()
+                    if run:
+                        redirect_output(self.get_output_filename(run))
+                        self.exec_child(run)
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                redirect_output(None)
+                os.write(self._pool_pipe[1], data)
+            db.recycle_connection_in_pool_or_close("commit")
+        finally:
+            # never return into the parent's code
+            os._exit(0)
 
     def safe_exec_child(self, run):
         """Run exec_child in a try check to reconnect/commit/rollback all databases"""
@@ -305,11 +929,17 @@ class Scheduler:  # pylint: disable=too-many-instance-attributes
             status, output, tb = "failed", None, traceback.format_exc()
         # record the completion
         completed_on = now()
+        sys.stdout.flush()
         # retrieve the log and update the current task
         log = self.retrieve_log(run) + self._end_tag(status, completed_on, tb)
         run.update_record(
-            status=status, output=output, log=log, completed_on=completed_on
+            status=status,
+            output=output,
+            completed_on=completed_on,
+            **self.store_log(run, log),
         )
+        # a slot is free
+        self.notify()
         db.commit()
         self.logger.info("run %s #%i %s", status, run.id, run.name)
         # if periodic task, reschedule it (mind errors below will not be logged)
@@ -337,20 +967,58 @@ class Scheduler:  # pylint: disable=too-many-instance-attributes
         return f'{msg}\n</run status="{status}" completed_on="{completed_on}">'
 
     def retrieve_log(self, run):
-        """Retrieve the log for the run"""
+        """Retrieve the log for the run, truncated to max_log_size bytes"""
         try:
             filename = self.get_output_filename(run)
             with open(filename, "rb") as stream:
-                log = stream.read().decode("utf8", errors="ignore")
+                data = read_capped(stream, self.max_log_size)
+            log = data.decode("utf8", errors="ignore")
             os.unlink(filename)
         except Exception as err:
             log = f'<missing reason="{err}"/>'
         return log.strip()
 
+    def store_log(self, run, log):
+        """
+        Stores the log of the run in the side table if compress_logs, and
+        returns the fields to update the run with
+        """
+        if not self.compress_logs:
+            return {"log": log}
+        db = self.db
+        data = zlib.compress(log.encode("utf8"))
+        db.task_run_log.insert(task_run=run.id, data=data)
+        return {"log": None}
+
+    def get_log(self, run_id):
+        """Returns the log of a run, wherever it is stored"""
+        db = self.db
+        if "task_run_log" in db:
+            query = db.task_run_log.task_run == run_id
+            row = db(query).select(db.task_run_log.data).first()
+            if row:
+                # the blob parser hands back str if the bytes decode as utf8
+                return zlib.decompress(to_bytes(row.data)).decode("utf8")
+        row = db(db.task_run.id == run_id).select(db.task_run.log).first()
+        return row and row.log
+
+    def run_fields(self):
+        """The task_run fields the scheduler selects: all but the log"""
+        table = self.db.task_run
+        return [table[name] for name in table.fields if name != "log"]
+
     def get_output_filename(self, run):
         """Generate the fullname for the output log file"""
         return os.path.join(self.folder, f"{run.id}.txt")
 
+    def notify(self):
+        """Wakes up a waiting scheduler (for Postgres, once the transaction commits)"""
+        if self.wakeup:
+            try:
+                self.wakeup.notify()
+            except Exception:
+                self.logger.warning(traceback.format_exc())
+
     def register_task(self, task_name, function):
         """Register a new task, given a name and a function"""
         self.tasks[task_name] = function
@@ -381,6 +1049,7 @@ class Scheduler:  # pylint: disable=too-many-instance-attributes
             queued_on=t,
             status="queued",
         )
+        self.notify()
         db.commit()
         self.logger.info("run enqueued %s", run_id)
         return run_id
@@ -17,12 +17,21 @@ Usage::
     tags.add(thing_id, "color/red")
     tags.add(thing_id, ["color/red", "style/modern"])
     rows = db(tags.find(["color"])).select()
+
+For many records at once, ``add_many``, ``get_many`` and ``remove_many``
+take or return ``{record_id: [tags]}`` and run one statement per tag
+path and batch of ids, instead of one or two per record and tag::
+
+    tags.add_many({id1: ["color/red"], id2: ["color/red", "style/modern"]})
+    tags.get_many([id1, id2])
 """
 
+import collections
 import functools
-from typing import List, Union
+from typing import Dict, Iterable, List, Union
 
-from .. import Field
+from .. import Field, Index
+from ..objects import Expression, table_written
 
 # noqa: F401, F403 — validators are re-exported here for back-compat
 # with code that does ``from pydal.tools.tags import *``.
@@ -42,6 +51,9 @@ class Tags:
     table.
     """
 
+    # max number of record ids per statement of the *_many methods
+    batch_size = 500
+
     def __init__(self, table, name: str = "default", tag_table=None):
         """
         Bind a Tags namespace to ``table``.
@@ -55,12 +67,21 @@ class Tags:
         self.tag_table = tag_table or self._make_tag_table()
 
     def _make_tag_table(self):
-        """Define the sibling ``<table>_tag_<name>`` table on first use."""
+        """
+        Define the sibling ``<table>_tag_<name>`` table on first use,
+        indexed for lookups by record (``get``, ``add``) and by tag
+        path prefix (``find``).
+        """
         db = self.table._db
+        tablename = self.table._tablename + "_tag_" + self.name
         tag_table = db.define_table(
-            self.table._tablename + "_tag_" + self.name,
+            tablename,
             Field("tagpath"),
             Field("record_id", self.table),
+            indexes=[
+                Index(tablename + "_record_idx", "record_id", "tagpath"),
+                Index(tablename + "_tagpath_idx", "tagpath"),
+            ],
         )
         db.commit()
         return tag_table
@@ -72,22 +93,64 @@ class Tags:
         rows = db(tag_table.record_id == record_id).select(tag_table.tagpath)
         return [row.tagpath.strip("/") for row in rows]
 
+    def get_many(self, record_ids: Iterable[int]) -> Dict[int, List[str]]:
+        """Return ``{record_id: [tag paths]}``, keyed by int, for ``record_ids``."""
+        tag_table = self.tag_table
+        db = tag_table._db
+        # ids may come as strings (e.g. from a request), the rows hold ints
+        record_ids = [int(record_id) for record_id in record_ids]
+        tags = {record_id: [] for record_id in record_ids}
+        for ids in self._batches(record_ids):
+            query = tag_table.record_id.belongs(self._sql_ids(ids))
+            sql = db(query)._select(
+                tag_table.record_id, tag_table.tagpath, orderby=tag_table.id
+            )
+            # plain tuples, there is no need to parse them into Rows
+            for record_id, tagpath in db.executesql(sql):
+                tags[record_id].append(tagpath.strip("/"))
+        return tags
+
     def add(self, record_id: int, tags: TagsLike) -> None:
         """
         Attach one or more tag paths to ``record_id``.
 
         Idempotent: re-adding an existing tag is a no-op.
         """
+        self.add_many({record_id: tags})
+
+    def add_many(self, tags: Dict[int, TagsLike]) -> int:
+        """
+        Attach tag paths to many records, given ``{record_id: tags}``.
+
+        Idempotent like ``add``: each tag path is inserted with one
+        ``INSERT ... SELECT`` per batch of ids, which skips the ids of
+        missing records and the ones already tagged. Returns the number
+        of tags added.
+        """
+        table = self.table
         tag_table = self.tag_table
         db = tag_table._db
-        if not isinstance(tags, list):
-            tags = [tags]
-        for tag in tags:
-            path = "/%s/" % tag.strip("/")
-            if not db(
-                (tag_table.record_id == record_id) & (tag_table.tagpath == path)
-            ).count():
-                tag_table.insert(record_id=record_id, tagpath=path)
+        adapter = db._adapter
+        added = 0
+        for path, record_ids in self._group_by_path(tags).items():
+            value = Expression(db, adapter.represent(path, "string"), type="string")
+            for ids in self._batches(record_ids):
+                ids = self._sql_ids(ids)
+                tagged = db(tag_table.record_id.belongs(ids))(tag_table.tagpath == path)
+                query = table.id.belongs(ids) & ~table.id.belongs(
+                    tagged._select(tag_table.record_id)
+                )
+                sql = "INSERT INTO %s(%s, %s) %s" % (
+                    tag_table.sql_fullref,
+                    tag_table.record_id._rname,
+                    tag_table.tagpath._rname,
+                    db(query)._select(table.id, value),
+                )
+                adapter.execute(sql)
+                added += adapter.cursor.rowcount
+        if added:
+            table_written(tag_table)
+        return added
 
     def remove(self, record_id: int, tags: TagsLike) -> None:
         """Detach one or more tag paths from ``record_id``."""
@@ -100,6 +163,46 @@ class Tags:
             (tag_table.record_id == record_id) & (tag_table.tagpath.belongs(paths))
         ).delete()
 
+    def remove_many(self, tags: Dict[int, TagsLike]) -> int:
+        """
+        Detach tag paths from many records, given ``{record_id: tags}``.
+        Returns the number of tags removed.
+        """
+        tag_table = self.tag_table
+        db = tag_table._db
+        removed = 0
+        for path, record_ids in self._group_by_path(tags).items():
+            for ids in self._batches(record_ids):
+                ids = self._sql_ids(ids)
+                removed += db(
+                    (tag_table.tagpath == path) & tag_table.record_id.belongs(ids)
+                ).delete()
+        return removed
+
+    def _group_by_path(self, tags: Dict[int, TagsLike]) -> Dict[str, List[int]]:
+        """Turn ``{record_id: tags}`` into ``{"/path/": [record_ids]}``."""
+        # dicts as ordered sets of ids
+        record_ids = collections.defaultdict(dict)
+        for record_id, record_tags in tags.items():
+            if not isinstance(record_tags, list):
+                record_tags = [record_tags]
+            for tag in record_tags:
+                record_ids["/%s/" % tag.strip("/")][record_id] = None
+        return {path: list(ids) for path, ids in record_ids.items()}
+
+    def _batches(self, record_ids: List[int]):
+        """Split ``record_ids`` into lists of at most ``batch_size``."""
+        for k in range(0, len(record_ids), self.batch_size):
+            yield record_ids[k : k + self.batch_size]
+
+    @staticmethod
+    def _sql_ids(record_ids: List[int]) -> str:
+        """
+        Render ids as SQL for ``belongs``, which inlines a string (minus
+        its trailing ``;``): much cheaper than representing each id.
+        """
+        return ",".join(str(int(record_id)) for record_id in record_ids) + ";"
+
     def find(self, tags: TagsLike, mode: str = "and"):
         """
         Build a Query matching records that carry the given tags.
@@ -108,19 +211,61 @@ class Tags:
         tag whose path starts with ``"color/"``.
 
         ``mode`` is ``"and"`` (records must carry *all* tags) or
-        ``"or"`` (records must carry *any* tag).
+        ``"or"`` (records must carry *any* tag). Either way the query
+        has a single subselect on the tag table; for ``"and"`` it groups
+        by record and keeps those matching as many distinct tags as
+        given.
         """
         table = self.table
         tag_table = self.tag_table
         db = tag_table._db
-        queries = []
         if not isinstance(tags, list):
             tags = [tags]
-        for tag in tags:
-            path = "/%s/" % tag.strip("/")
-            subquery = db(tag_table.tagpath.startswith(path))._select(
-                tag_table.record_id
-            )
-            queries.append(table.id.belongs(subquery))
-        func = lambda a, b: (a & b) if mode == "and" else (a | b)
-        return functools.reduce(func, queries)
+        paths = list(dict.fromkeys("/%s/" % tag.strip("/") for tag in tags))
+        if mode == "and":
+            # "color/red" implies "color": keep paths no other path extends,
+            # so that every tag matches at most one of them
+            paths = [
+                path
+                for path in paths
+                if not any(other.startswith(path) for other in paths if other != path)
+            ]
+        matches = [tag_table.tagpath.startswith(path) for path in paths]
+        tagged = db(functools.reduce(lambda a, b: a | b, matches))
+        if mode != "and" or len(paths) == 1:
+            return table.id.belongs(tagged._select(tag_table.record_id))
+        # CASE WHEN <match 1> THEN 1 ELSE CASE WHEN <match 2> THEN 2 ... END
+        which = None
+        for k, match in reversed(list(enumerate(matches))):
+            which = match.case(k + 1, which)
+        matched = Expression(db, db._adapter.dialect.count, which, True, "integer")
+        subquery = tagged._select(
+            tag_table.record_id,
+            groupby=tag_table.record_id,
+            having=matched == len(paths),
+        )
+        return table.id.belongs(subquery)
+
+    def facets(self, query=None, prefix: str = None) -> Dict[str, int]:
+        """
+        Count the records carrying each tag path, in one aggregate query.
+
+        ``query`` restricts the records counted (e.g. to those of a
+        ``find``), ``prefix`` the tag paths (``"color"`` counts the
+        ``color/*`` tags). Returns ``{tag path: count}``, most frequent
+        first.
+        """
+        table = self.table
+        tag_table = self.tag_table
+        db = tag_table._db
+        tagpath = tag_table.tagpath
+        condition = tag_table.id > 0
+        if query is not None:
+            condition = (tag_table.record_id == table.id) & query
+        if prefix:
+            condition &= tagpath.startswith("/%s/" % prefix.strip("/"))
+        count = tag_table.record_id.count(distinct=True)
+        rows = db(condition).select(
+            tagpath, count, groupby=tagpath, orderby=~count | tagpath
+        )
+        return {row[tagpath].strip("/"): row[count] for row in rows}
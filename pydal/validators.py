@@ -22,9 +22,9 @@ a stored value back to user-facing form).
 """
 
 import binascii
+import copy
 import datetime
 import decimal
-import encodings.idna
 import hashlib
 import hmac
 import json
@@ -35,15 +35,15 @@ import struct
 import time
 import unicodedata
 import uuid
-from functools import reduce
+from functools import lru_cache, reduce
 
-import ipaddress
 from io import StringIO
 from urllib import parse as urlparse
 from urllib.parse import unquote as urllib_unquote
 
+from ._globals import DEFAULT
 from .utils import to_bytes, to_native, to_unicode
-from .objects import Field, FieldMethod, FieldVirtual, Table
+from .objects import Field, FieldMethod, FieldVirtual, Table, _rebound
 
 JSONErrors = (NameError, TypeError, ValueError, AttributeError, KeyError)
 
@@ -180,6 +180,15 @@ class Validator:
 
     translator = staticmethod(lambda text: text)
 
+    # pure CPU work on picklable values: validate_many may hand batches
+    # of offload_batch_size values to an executor
+    offload = False
+    offload_batch_size = 64
+    # validate depends only on the value and the constructor arguments,
+    # so compile_validators may cache its results; set by each class that
+    # defines validate (subclasses overriding validate are not pure)
+    pure = False
+
     def formatter(self, value):
         """
         Inverse of ``validate``: turn a stored value into a user-facing
@@ -205,6 +214,65 @@ class Validator:
         except ValidationError as e:
             return value, e.message
 
+    def validate_many(self, values, executor=None):
+        """
+        Validate a batch of ``values`` (for new records) and return a
+        ``(cleaned, error_or_None)`` pair per value.
+
+        Validates one value at a time; DB-backed validators override
+        it to check the whole batch with a query per chunk. When an
+        ``executor`` (e.g. a ``concurrent.futures.ProcessPoolExecutor``)
+        is given and the validator is marked ``offload``, the values are
+        validated in the executor in chunks, results kept in order.
+        """
+        if executor is None or not self.offload or len(values) < 2:
+            return [self(value) for value in values]
+        return _offload(self, values, executor)
+
+
+def validate_many(requires, values, executor=None):
+    """
+    Run the validator chain ``requires`` over a batch of ``values`` and
+    return a ``(cleaned, error_or_None)`` pair per value.
+
+    Each validator sees only the values that passed the ones before it,
+    as a batch when it has ``validate_many`` (legacy callables are
+    called once per value). ``executor`` is passed on to the
+    validators, see ``Validator.validate_many``.
+    """
+    results = [(value, None) for value in values]
+    for validator in requires:
+        pending = [i for i, (_, error) in enumerate(results) if error is None]
+        if not pending:
+            break
+        inputs = [results[i][0] for i in pending]
+        batch = getattr(validator, "validate_many", None)
+        if batch:
+            outputs = batch(inputs, executor=executor)
+        else:
+            outputs = [validator(v) for v in inputs]
+        for i, output in zip(pending, outputs):
+            results[i] = output
+    return results
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _validate_chunk(validator, values):
+    return [validator(value) for value in values]
+
+
+def _offload(validator, values, executor):
+    # executor.map returns the chunks in submission order
+    chunks = list(_chunks(values, validator.offload_batch_size))
+    results = []
+    for outputs in executor.map(_validate_chunk, [validator] * len(chunks), chunks):
+        results.extend(outputs)
+    return results
+
 
 def validator_caller(func, value, record_id=None):
     """
@@ -223,6 +291,16 @@ def validator_caller(func, value, record_id=None):
     return value
 
 
+def _rebind_dbset(dbset, old, new):
+    """Return ``dbset`` (a DAL or a Set) querying ``new`` instead of ``old``."""
+    if dbset is old:
+        return new
+    if getattr(dbset, "db", None) is old:
+        dbset = copy.copy(dbset)
+        dbset.db = dbset._db = new
+    return dbset
+
+
 class DefaultValidatorProxy(Validator):
     """
     Pass-through wrapper around another validator.
@@ -241,10 +319,105 @@ class DefaultValidatorProxy(Validator):
         except ValidationError as e:
             return value, e.message
 
+    def validate_many(self, values, executor=None):
+        return validate_many([self.obj], values, executor)
+
     def __getattr__(self, attr):
         return getattr(self.obj, attr)
 
 
+# values compile_validators looks up and results it keeps
+_CACHE_KEYS = frozenset((str, int, float, bool))
+_CACHE_VALUES = frozenset(
+    (str, int, float, bool, type(None), decimal.Decimal)
+    + (datetime.date, datetime.datetime, datetime.time)
+)
+_MISSING = object()
+
+
+def _is_pure(validator):
+    for cls in type(validator).__mro__:
+        if "validate" in vars(cls):
+            return vars(cls).get("pure", False)
+    return False
+
+
+def _run_steps(steps, value, record_id):
+    for validate, raises in steps:
+        if raises:
+            try:
+                value = validate(value, record_id)
+            except ValidationError as e:
+                return value, e.message
+        else:
+            value, error = validate(value, record_id)
+            if error:
+                return value, error
+    return value, None
+
+
+def compile_validators(field, cache_size=1024):
+    """
+    Fuse ``field.requires`` into one callable with the signature and
+    results of ``field.validate``::
+
+        validate = compile_validators(db.person.email)
+        value, error = validate("a@example.com")
+
+    ``Validator`` instances are called through ``validate`` directly
+    (default validator proxies are unwrapped), and runs of ``pure``
+    validators remember up to ``cache_size`` successful results for
+    repeated str/int/float/bool values; errors are never cached, so
+    their messages are always translated afresh. Compile after the
+    validators are configured: later changes to them are not seen.
+    """
+    requires = field.requires
+    map_none = field.map_none
+    if not requires or requires is DEFAULT:
+        requires = []
+    elif not isinstance(requires, (list, tuple)):
+        requires = [requires]
+    segments = []
+    for validator in requires:
+        while isinstance(validator, DefaultValidatorProxy):
+            validator = validator.obj
+        if (
+            isinstance(validator, Validator)
+            and type(validator).__call__ is Validator.__call__
+        ):
+            step = (validator.validate, True)
+            pure = cache_size > 0 and _is_pure(validator)
+        else:
+            step = (validator, False)
+            pure = False
+        if segments and (segments[-1][1] is not None) == pure:
+            segments[-1][0].append(step)
+        else:
+            segments.append(([step], {} if pure else None))
+
+    def validate(value, record_id=None):
+        for steps, cache in segments:
+            if cache is None or type(value) not in _CACHE_KEYS:
+                value, error = _run_steps(steps, value, record_id)
+                if error:
+                    return value, error
+                continue
+            key = (type(value), value)
+            cleaned = cache.get(key, _MISSING)
+            if cleaned is _MISSING:
+                cleaned, error = _run_steps(steps, value, record_id)
+                if error:
+                    return cleaned, error
+                if type(cleaned) in _CACHE_VALUES:
+                    if len(cache) >= cache_size:
+                        cache.clear()
+                    cache[key] = cleaned
+            value = cleaned
+        return (value if value != map_none else None), None
+
+    return validate
+
+
 class IS_MATCH(Validator):
     """
     Example:
@@ -280,6 +453,8 @@ class IS_MATCH(Validator):
 
     """
 
+    pure = True
+
     def __init__(
         self,
         expression,
@@ -335,6 +510,8 @@ class IS_EQUAL_TO(Validator):
 
     """
 
+    pure = True
+
     def __init__(self, expression, error_message="No match"):
         self.expression = expression
         self.error_message = error_message
@@ -418,6 +595,8 @@ class IS_LENGTH(Validator):
             ('1234567890', 'enter from 20 to 50 characters')
     """
 
+    pure = True
+
     def __init__(
         self,
         maxsize=255,
@@ -609,10 +788,22 @@ class IS_IN_DB(Validator):
                   requires=IS_IN_DB(db, db.mytable.myfield, zero=''))
 
     used for reference fields, rendered as a dropbox
+
+    With ``options_ttl`` (seconds), the options (keys and labels) are
+    cached on the DAL, keyed by the SELECT that builds them, and reused
+    until one of the tables involved is written through that DAL or the
+    TTL passes. While a cached set is fresh, ``validate`` checks
+    membership in it instead of querying, so a row deleted through
+    another connection is accepted until then.
     """
 
+    # seconds a cached option set is trusted; 0 builds it every time
+    options_ttl = 0
+
     REGEX_TABLE_DOT_FIELD = r"^(\w+)\.(\w+)$"
     REGEX_INTERP_CONV_SPECIFIER = r"%\((\w+)\)\d*(?:\.\d+)?[a-zA-Z]"
+    # values looked up per query by validate_many
+    batch_size = 500
 
     def __init__(
         self,
@@ -631,6 +822,7 @@ class IS_IN_DB(Validator):
         left=None,
         delimiter=None,
         auto_add=False,
+        options_ttl=None,
     ):
         if hasattr(dbset, "define_table"):
             self.dbset = dbset()
@@ -682,6 +874,8 @@ class IS_IN_DB(Validator):
         self.kfield = kfield
         self.error_message = error_message
         self.theset = None
+        self._keys = None
+        self._options_key = None
         self.orderby = orderby
         self.groupby = groupby
         self.distinct = distinct
@@ -693,44 +887,104 @@ class IS_IN_DB(Validator):
         self.left = left
         self.delimiter = delimiter
         self.auto_add = auto_add
+        if options_ttl is not None:
+            self.options_ttl = options_ttl
 
     def set_self_id(self, id):
         if self._and:
             self._and.record_id = id
 
     def build_set(self):
-        table = self.dbset.db[self.ktable]
+        db = self.dbset.db
+        table = db[self.ktable]
         if self.fieldnames == "*":
             fields = [f for f in table]
         else:
             fields = [table[k] for k in self.fieldnames]
         ignore = (FieldVirtual, FieldMethod)
         fields = [f for f in fields if not isinstance(f, ignore)]
-        if self.dbset.db._dbname != "gae":
+        if db._dbname != "gae":
             orderby = self.orderby or reduce(lambda a, b: a | b, fields)
-            groupby = self.groupby
-            distinct = self.distinct
-            left = self.left
             dd = dict(
                 orderby=orderby,
-                groupby=groupby,
-                distinct=distinct,
-                cache=self.cache,
-                cacheable=True,
-                left=left,
+                groupby=self.groupby,
+                distinct=self.distinct,
+                left=self.left,
             )
-            records = self.dbset(table).select(*fields, **dd)
         else:
             orderby = self.orderby or reduce(
                 lambda a, b: a | b, (f for f in fields if not f.name == "id")
             )
-            dd = dict(orderby=orderby, cache=self.cache, cacheable=True)
-            records = self.dbset(table).select(table.ALL, **dd)
+            dd = dict(orderby=orderby)
+            fields = [table.ALL]
+        dbset = self.dbset(table)
+        self._options_key = None
+        if self.options_ttl:
+            label = self.label if isinstance(self.label, str) else id(self.label)
+            sql = dbset._select(*fields, **dd)
+            # bound parameters are part of the query (ParamSQL compares as str)
+            key = (str(sql), repr(getattr(sql, "params", ())), self.kfield, label)
+            self._options_key = key
+            entry = self._fresh_options(key)
+            if entry is not None:
+                self.theset, self.labels, self._keys = entry[3:]
+                return
+        records = dbset.select(*fields, cache=self.cache, cacheable=True, **dd)
         self.theset = [str(r[self.kfield]) for r in records]
         if isinstance(self.label, str):
             self.labels = [self.label % r for r in records]
         else:
             self.labels = [self.label(r) for r in records]
+        self._keys = frozenset(self.theset)
+        if self._options_key is not None:
+            tablenames = set(db._adapter.tables(self.dbset.query))
+            tablenames.add(table._dalname)
+            if self.left:
+                left = self.left if isinstance(self.left, (list, tuple)) else [self.left]
+                tablenames.update(db._adapter.tables(*left))
+            tablenames = tuple(sorted(tablenames))
+            db._options_cache[self._options_key] = (
+                time.time(),
+                tablenames,
+                self._versions(tablenames),
+                self.theset,
+                self.labels,
+                self._keys,
+            )
+
+    def _rebind(self, old, new):
+        """Return a copy querying the ``new`` DAL (see ``DAL.from_template``)."""
+        if self.dbset.db is not old:
+            return self
+        other = copy.copy(self)
+        other.dbset = _rebind_dbset(self.dbset, old, new)
+        other.theset = other._keys = other._options_key = None
+        return other
+
+    def _versions(self, tablenames):
+        versions = self.dbset.db._table_versions
+        return tuple(versions.get(name, 0) for name in tablenames)
+
+    def _fresh_options(self, key):
+        """The cached options entry for ``key``, unless stale."""
+        entry = self.dbset.db._options_cache.get(key)
+        if entry is None:
+            return None
+        built, tablenames, versions = entry[:3]
+        if (
+            built + self.options_ttl < time.time()
+            or versions != self._versions(tablenames)
+        ):
+            return None
+        return entry
+
+    def _cached_keys(self):
+        """Keys of the last built option set while still fresh, else None."""
+        if self._options_key is None:
+            # uncached, the instance keeps the set it last built
+            return self._keys if self.theset else None
+        entry = self._fresh_options(self._options_key)
+        return entry and entry[5]
 
     def options(self, zero=True):
         self.build_set()
@@ -783,8 +1037,9 @@ class IS_IN_DB(Validator):
                 and not self.multiple[0] <= len(values) < self.multiple[1]
             ):
                 raise ValidationError(self.translator(self.error_message))
-            if self.theset:
-                if not [v for v in values if str(v) not in self.theset]:
+            keys = self._cached_keys()
+            if keys is not None:
+                if not [v for v in values if str(v) not in keys]:
                     return values
             else:
 
@@ -814,8 +1069,9 @@ class IS_IN_DB(Validator):
                 except TypeError:
                     raise ValidationError(self.translator(self.error_message))
 
-            if self.theset:
-                if str(value) in self.theset:
+            keys = self._cached_keys()
+            if keys is not None:
+                if str(value) in keys:
                     if self._and:
                         return validator_caller(self._and, value, record_id)
                     return value
@@ -826,6 +1082,48 @@ class IS_IN_DB(Validator):
                     return value
         raise ValidationError(self.translator(self.error_message))
 
+    def validate_many(self, values, executor=None):
+        """
+        Look the batch up in the cached option set while fresh, else
+        with one ``belongs()`` query per ``batch_size`` distinct values
+        (``multiple`` and ``auto_add`` validate one value at a time).
+        """
+        if self.multiple or self.auto_add:
+            return Validator.validate_many(self, values, executor)
+        table = self.dbset.db[self.ktable]
+        field = table[self.kfield]
+        error = self.translator(self.error_message)
+        results = [(value, error) for value in values]
+        candidates = {}
+        for i, value in enumerate(values):
+            if field.type in ("id", "integer"):
+                if isinstance(value, int) or (
+                    isinstance(value, str) and value.isdigit()
+                ):
+                    value = int(value)
+                else:
+                    continue
+            candidates[i] = value
+        batch_size = self.batch_size
+        if self.dbset.db._adapter.dbengine == "firestore":
+            batch_size = min(batch_size, 30)
+        found = self._cached_keys()
+        if found is None:
+            found = set()
+            distinct = list(dict.fromkeys(candidates.values()))
+            for chunk in _chunks(distinct, batch_size):
+                rows = self.dbset(field.belongs(chunk)).select(field, distinct=True)
+                found.update(str(row[self.kfield]) for row in rows)
+        passed = [i for i, value in candidates.items() if str(value) in found]
+        outputs = [(candidates[i], None) for i in passed]
+        if self._and:
+            outputs = validate_many(
+                [self._and], [value for value, _ in outputs], executor
+            )
+        for i, output in zip(passed, outputs):
+            results[i] = output
+        return results
+
 
 class IS_NOT_IN_DB(Validator):
     """
@@ -837,6 +1135,9 @@ class IS_NOT_IN_DB(Validator):
     makes the field unique
     """
 
+    # values looked up per query by validate_many
+    batch_size = 500
+
     def __init__(
         self,
         dbset,
@@ -859,6 +1160,15 @@ class IS_NOT_IN_DB(Validator):
         # it is not safe if the object is recycled
         self.record_id = id
 
+    def _rebind(self, old, new):
+        """Return a copy querying the ``new`` DAL (see ``DAL.from_template``)."""
+        dbset = _rebind_dbset(self.dbset, old, new)
+        if dbset is self.dbset:
+            return self
+        other = copy.copy(self)
+        other.dbset = dbset
+        return other
+
     def validate(self, value, record_id=None):
         value = to_native(str(value))
         if not value.strip():
@@ -885,6 +1195,45 @@ class IS_NOT_IN_DB(Validator):
             raise ValidationError(self.translator(self.error_message))
         return value
 
+    def validate_many(self, values, executor=None):
+        """
+        Check the batch with one ``belongs()`` query per ``batch_size``
+        values; a value repeated within the batch fails after its first
+        occurrence, as it would when inserting the rows one by one.
+        """
+        (tablename, fieldname) = str(self.field).split(".")
+        if hasattr(self.dbset, "define_table"):
+            db = self.dbset
+        else:
+            db = self.dbset.db
+        table = db[tablename]
+        field = table[fieldname]
+        error = self.translator(self.error_message)
+        results = [(value, error) for value in values]
+        candidates = {}
+        seen = set()
+        for i, value in enumerate(values):
+            value = to_native(str(value))
+            if not value.strip():
+                continue
+            if value in self.allowed_override:
+                results[i] = (value, None)
+            elif value not in seen:
+                seen.add(value)
+                candidates[i] = value
+        taken = set()
+        for chunk in _chunks(list(candidates.values()), self.batch_size):
+            dbset = self.dbset(
+                field.belongs(chunk), ignore_common_filters=self.ignore_common_filters
+            )
+            for row in dbset.select(table._id, field):
+                if row[table._id.name] != self.record_id:
+                    taken.add(str(row[fieldname]))
+        for i, value in candidates.items():
+            if value not in taken:
+                results[i] = (value, None)
+        return results
+
 
 def range_error_message(error_message, what_to_enter, minimum, maximum):
     """build the error message for the number range validators"""
@@ -945,6 +1294,8 @@ class IS_INT_IN_RANGE(Validator):
             ('abc', 'enter an integer')
     """
 
+    pure = True
+
     REGEX_INT = r"^[+-]?\d+$"
 
     def __init__(self, minimum=None, maximum=None, error_message=None):
@@ -1015,6 +1366,8 @@ class IS_FLOAT_IN_RANGE(Validator):
             ('abc', 'enter a number')
     """
 
+    pure = True
+
     def __init__(self, minimum=None, maximum=None, error_message=None, dot="."):
         self.minimum = float(minimum) if minimum is not None else None
         self.maximum = float(maximum) if maximum is not None else None
@@ -1099,6 +1452,8 @@ class IS_DECIMAL_IN_RANGE(Validator):
             ('abc', 'enter a number')
     """
 
+    pure = True
+
     def __init__(self, minimum=None, maximum=None, error_message=None, dot="."):
         self.minimum = decimal.Decimal(str(minimum)) if minimum is not None else None
         self.maximum = decimal.Decimal(str(maximum)) if maximum is not None else None
@@ -1172,6 +1527,8 @@ class IS_NOT_EMPTY(Validator):
             ('abc', None)
     """
 
+    pure = True
+
     def __init__(self, error_message="Enter a value", empty_regex=None):
         self.error_message = error_message
         if empty_regex is not None:
@@ -1335,6 +1692,8 @@ class IS_EMAIL(Validator):
 
     """
 
+    pure = True
+
     # NOTE: use these with flags = re.VERBOSE | re.IGNORECASE
     REGEX_BODY = r"""
         ^(?!\.)                           # name may not begin with a dot
@@ -1372,6 +1731,9 @@ class IS_EMAIL(Validator):
         self.banned = banned
         self.forced = forced
         self.error_message = error_message
+        flags = re.VERBOSE | re.IGNORECASE
+        self.regex_body = re.compile(self.REGEX_BODY, flags)
+        self.regex_domain = re.compile(self.REGEX_DOMAIN, flags)
 
     def validate(self, value, record_id=None):
         if (
@@ -1384,15 +1746,14 @@ class IS_EMAIL(Validator):
         body, domain = value.rsplit("@", 1)
 
         try:
-            regex_flags = re.VERBOSE | re.IGNORECASE
-            match_body = re.match(self.REGEX_BODY, body, regex_flags)
-            match_domain = re.match(self.REGEX_DOMAIN, domain, regex_flags)
+            match_body = self.regex_body.match(body)
+            match_domain = self.regex_domain.match(domain)
 
             if not match_domain:
                 # check for Internationalized Domain Names
                 # see https://docs.python.org/2/library/codecs.html#module-encodings.idna
                 domain_encoded = to_unicode(domain).encode("idna").decode("ascii")
-                match_domain = re.match(self.REGEX_DOMAIN, domain_encoded, regex_flags)
+                match_domain = self.regex_domain.match(domain_encoded)
 
             match = (match_body is not None) and (match_domain is not None)
         except (TypeError, UnicodeError):
@@ -1479,13 +1840,13 @@ class IS_LIST_OF_EMAILS(IS_LIST_OF_STRINGS):
 
     def __init__(self, error_message="Invalid emails: %s"):
         self.error_message = error_message
+        self.check_email = IS_EMAIL()
 
     def validate(self, value, record_id=None):
         emails = IS_LIST_OF_STRINGS.validate(self, value)
         bad_emails = []
-        check_email = IS_EMAIL()
         for email in emails:
-            error = check_email(email)[1]
+            error = self.check_email(email)[1]
             if error and email not in bad_emails:
                 bad_emails.append(email)
         if bad_emails:
@@ -1658,6 +2019,13 @@ def escape_unicode(string):
     return returnValue.getvalue()
 
 
+@lru_cache(maxsize=1024)
+def _idna_label(label):
+    import encodings.idna
+
+    return to_native(encodings.idna.ToASCII(label))
+
+
 def unicode_to_ascii_authority(authority):
     """
     Follows the steps in RFC 3490, Section 4 to convert a unicode authority
@@ -1694,7 +2062,7 @@ def unicode_to_ascii_authority(authority):
     asciiLabels = []
     for label in labels:
         if label:
-            asciiLabels.append(to_native(encodings.idna.ToASCII(label)))
+            asciiLabels.append(_idna_label(label))
         else:
             # encodings.idna.ToASCII does not accept an empty string, but
             # it is necessary for us to allow for empty labels so that we
@@ -1821,6 +2189,8 @@ class IS_GENERIC_URL(Validator):
 
     """
 
+    pure = True
+
     def __init__(
         self,
         error_message="Enter a valid URL",
@@ -3525,6 +3895,8 @@ class IS_HTTP_URL(Validator):
             necessary to make the URL valid
     """
 
+    pure = True
+
     REGEX_GENERIC_VALID_IP = r"([\w.!~*'|;:&=+$,-]+@)?\d+\.\d+\.\d+\.\d+(:\d*)*$"
     REGEX_GENERIC_VALID_DOMAIN = r"([\w.!~*'|;:&=+$,-]+@)?(([A-Za-z0-9]+[A-Za-z0-9\-]*[A-Za-z0-9]+\.)*([A-Za-z0-9]+\.)*)*([A-Za-z]+[A-Za-z0-9\-]*[A-Za-z0-9]+)\.?(:\d*)*$"
 
@@ -3557,6 +3929,12 @@ class IS_HTTP_URL(Validator):
                 "prepend_scheme='%s' is not in allowed_schemes=%s"
                 % (self.prepend_scheme, self.allowed_schemes)
             )
+        self.generic = IS_GENERIC_URL(
+            error_message=self.error_message,
+            allowed_schemes=self.allowed_schemes,
+            prepend_scheme=self.prepend_scheme,
+        )
+        self.tlds = frozenset(self.allowed_tlds)
 
     def validate(self, value, record_id=None):
         """
@@ -3570,12 +3948,7 @@ class IS_HTTP_URL(Validator):
         """
         try:
             # if the URL passes generic validation
-            x = IS_GENERIC_URL(
-                error_message=self.error_message,
-                allowed_schemes=self.allowed_schemes,
-                prepend_scheme=self.prepend_scheme,
-            )
-            if x(value)[1] is None:
+            if self.generic(value)[1] is None:
                 components = urlparse.urlparse(value)
                 authority = components.netloc
                 # if there is an authority component
@@ -3591,7 +3964,7 @@ class IS_HTTP_URL(Validator):
                         )
                         if domainMatch:
                             # if the top-level domain really exists
-                            if domainMatch.group(5).lower() in self.allowed_tlds:
+                            if domainMatch.group(5).lower() in self.tlds:
                                 # Then this HTTP URL is valid
                                 return value
                 else:
@@ -3698,6 +4071,8 @@ class IS_URL(Validator):
     @author: Jonathan Benn
     """
 
+    pure = True
+
     def __init__(
         self,
         error_message="Enter a valid URL",
@@ -3727,6 +4102,19 @@ class IS_URL(Validator):
         # prepend_scheme's validity to a sub-method
 
         self.prepend_scheme = prepend_scheme
+        if self.mode == "generic":
+            self.sub_validator = IS_GENERIC_URL(
+                error_message=self.error_message,
+                allowed_schemes=self.allowed_schemes,
+                prepend_scheme=self.prepend_scheme,
+            )
+        else:
+            self.sub_validator = IS_HTTP_URL(
+                error_message=self.error_message,
+                allowed_schemes=self.allowed_schemes,
+                prepend_scheme=self.prepend_scheme,
+                allowed_tlds=self.allowed_tlds,
+            )
 
     def validate(self, value, record_id=None):
         """
@@ -3741,22 +4129,6 @@ class IS_URL(Validator):
             may be modified to (1) prepend a scheme, and/or (2) convert a
             non-compliant unicode URL into a compliant US-ASCII version.
         """
-        if self.mode == "generic":
-            subMethod = IS_GENERIC_URL(
-                error_message=self.error_message,
-                allowed_schemes=self.allowed_schemes,
-                prepend_scheme=self.prepend_scheme,
-            )
-        elif self.mode == "http":
-            subMethod = IS_HTTP_URL(
-                error_message=self.error_message,
-                allowed_schemes=self.allowed_schemes,
-                prepend_scheme=self.prepend_scheme,
-                allowed_tlds=self.allowed_tlds,
-            )
-        else:
-            raise SyntaxError("invalid mode '%s' in IS_URL" % self.mode)
-
         if isinstance(value, str):
             try:
                 value = unicode_to_ascii_url(value, self.prepend_scheme)
@@ -3764,7 +4136,7 @@ class IS_URL(Validator):
                 # If we are not able to convert the unicode url into a
                 # US-ASCII URL, then the URL is not valid
                 raise ValidationError(self.translator(self.error_message))
-        return subMethod.validate(value, record_id)
+        return self.sub_validator.validate(value, record_id)
 
 
 class IS_TIME(Validator):
@@ -3810,6 +4182,8 @@ class IS_TIME(Validator):
 
     """
 
+    pure = True
+
     REGEX_TIME = "((?P<h>[0-9]+))([^0-9 ]+(?P<m>[0-9 ]+))?([^0-9ap ]+(?P<s>[0-9]*))?((?P<d>[ap]m))?"
 
     def __init__(
@@ -3869,6 +4243,11 @@ class IS_DATE(Validator):
     date has to be in the ISO8960 format YYYY-MM-DD
     """
 
+    pure = True
+
+    isodate = "%Y-%m-%d"
+    REGEX_ISODATE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
     def __init__(self, format="%Y-%m-%d", error_message="Enter date as %(format)s"):
         self.format = self.translator(format)
         self.error_message = str(error_message)
@@ -3878,7 +4257,12 @@ class IS_DATE(Validator):
         if isinstance(value, datetime.date):
             return value
         try:
-            (y, m, d, hh, mm, ss, t0, t1, t2) = time.strptime(value, str(self.format))
+            format = str(self.format)
+            match = format == self.isodate and self.REGEX_ISODATE.fullmatch(value)
+            if match:
+                # what strptime would return, without parsing the format
+                return datetime.date(*map(int, match.groups()))
+            (y, m, d, hh, mm, ss, t0, t1, t2) = time.strptime(value, format)
             value = datetime.date(y, m, d)
             return value
         except (ValueError, TypeError):
@@ -3910,7 +4294,10 @@ class IS_DATETIME(Validator):
     timezome must be None or a pytz.timezone("America/Chicago") object
     """
 
+    pure = True
+
     isodatetime = "%Y-%m-%d %H:%M:%S"
+    REGEX_ISODATETIME = re.compile(r"(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})")
 
     @staticmethod
     def nice(format):
@@ -3950,8 +4337,17 @@ class IS_DATETIME(Validator):
                 value = value.replace("T", " ")
                 if len(value) == 16:
                     value += ":00"
-            (y, m, d, hh, mm, ss, t0, t1, t2) = time.strptime(value, str(self.format))
-            value = datetime.datetime(y, m, d, hh, mm, ss)
+                match = self.REGEX_ISODATETIME.fullmatch(value)
+            else:
+                match = None
+            if match:
+                # what strptime would return, without parsing the format
+                value = datetime.datetime(*map(int, match.groups()))
+            else:
+                (y, m, d, hh, mm, ss, t0, t1, t2) = time.strptime(
+                    value, str(self.format)
+                )
+                value = datetime.datetime(y, m, d, hh, mm, ss)
             if self.timezone is not None:
                 # Tolerate naive datetimes with an explicit timezone arg.
                 value = (
@@ -4003,6 +4399,8 @@ class IS_DATE_IN_RANGE(IS_DATE):
 
     """
 
+    pure = True
+
     def __init__(
         self, minimum=None, maximum=None, format="%Y-%m-%d", error_message=None
     ):
@@ -4049,6 +4447,8 @@ class IS_DATETIME_IN_RANGE(IS_DATETIME):
 
     """
 
+    pure = True
+
     def __init__(
         self,
         minimum=None,
@@ -4157,6 +4557,8 @@ class IS_LOWER(Validator):
 
     """
 
+    pure = True
+
     def validate(self, value, record_id=None):
         cast_back = lambda x: x
         if isinstance(value, str):
@@ -4178,6 +4580,8 @@ class IS_UPPER(Validator):
 
     """
 
+    pure = True
+
     def validate(self, value, record_id=None):
         cast_back = lambda x: x
         if isinstance(value, str):
@@ -4255,6 +4659,8 @@ class IS_SLUG(Validator):
         ('a bc', 'must be slug')
     """
 
+    pure = True
+
     @staticmethod
     def urlify(value, maxlen=80, keep_underscores=False):
         return urlify(value, maxlen, keep_underscores)
@@ -4340,6 +4746,15 @@ class IS_EMPTY_OR(Validator):
         if hasattr(other, "options"):
             self.options = self._options
 
+    def _rebind(self, old, new):
+        """Return a copy whose validators query the ``new`` DAL."""
+        others = _rebound(self.other, old, new)
+        if others is self.other:
+            return self
+        other = copy.copy(self)
+        other.other = others
+        return other
+
     def _options(self, *args, **kwargs):
         options = self.other.options(*args, **kwargs)
         if (not options or options[0][0] != "") and not self.multiple:
@@ -4365,6 +4780,24 @@ class IS_EMPTY_OR(Validator):
             return value
         return validator_caller(self.other, value, record_id)
 
+    def validate_many(self, values, executor=None):
+        results = []
+        pending = []
+        for i, value in enumerate(values):
+            value, empty = is_empty(value, empty_regex=self.empty_regex)
+            if empty:
+                results.append((self.null, None))
+            else:
+                results.append(None)
+                pending.append((i, value))
+        others = self.other
+        if not isinstance(others, (list, tuple)):
+            others = [others]
+        outputs = validate_many(others, [value for _, value in pending], executor)
+        for (i, value), (cleaned, error) in zip(pending, outputs):
+            results[i] = (values[i], error) if error else (cleaned, None)
+        return results
+
     def formatter(self, value):
         if value in (None, ""):
             return value
@@ -4386,6 +4819,8 @@ class CLEANUP(Validator):
     removes special characters on validation
     """
 
+    pure = True
+
     REGEX_CLEANUP = "[^\x09\x0a\x0d\x20-\x7e]"
 
     def __init__(self, regex=None):
@@ -4449,6 +4884,15 @@ DIGEST_ALG_BY_SIZE = {
 }
 
 
+def _crypt(password, key, salt, digest_alg):
+    hashed = simple_hash(password, key, salt, digest_alg)
+    return "%s$%s$%s" % (digest_alg, salt, hashed)
+
+
+def _crypt_many(jobs):
+    return [_crypt(*job) for job in jobs]
+
+
 class LazyCrypt(object):
     """
     Stores a lazy password hash
@@ -4481,8 +4925,15 @@ class LazyCrypt(object):
         ...
         key = 'pbkdf2(1000,64,sha512):uuid' 1000 iterations and 64 chars length
         """
-        if self.crypted:
-            return self.crypted
+        if not self.crypted:
+            self.crypted = _crypt(*self._hash_args())
+        return self.crypted
+
+    def _hash_args(self):
+        """
+        Returns the ``(password, key, salt, digest_alg)`` to hash, picking
+        a new salt when ``crypt.salt is True``.
+        """
         if self.crypt.key:
             if ":" in self.crypt.key:
                 digest_alg, key = self.crypt.key.split(":", 1)
@@ -4497,9 +4948,7 @@ class LazyCrypt(object):
                 salt = self.crypt.salt
         else:
             salt = ""
-        hashed = simple_hash(self.password, key, salt, digest_alg)
-        self.crypted = "%s$%s$%s" % (digest_alg, salt, hashed)
-        return self.crypted
+        return self.password, key, salt, digest_alg
 
     def __eq__(self, stored_password):
         """
@@ -4574,6 +5023,10 @@ class CRYPT(Validator):
     Important: hashed password is returned as a LazyCrypt object and computed only if needed.
     The LasyCrypt object also knows how to compare itself with an existing salted password
 
+    With an ``executor`` (e.g. a ``concurrent.futures.ProcessPoolExecutor``),
+    either given here or passed to ``validate_many``, a batch of passwords
+    is hashed up front in the executor instead of one by one on insert.
+
     Supports standard algorithms
 
         >>> for alg in ('md5','sha1','sha256','sha384','sha512'):
@@ -4628,6 +5081,7 @@ class CRYPT(Validator):
         error_message="Too short",
         salt=True,
         max_length=1024,
+        executor=None,
     ):
         """
         important, digest_alg='md5' is not the default hashing algorithm for
@@ -4642,6 +5096,7 @@ class CRYPT(Validator):
         self.max_length = max_length
         self.error_message = error_message
         self.salt = salt
+        self.executor = executor
 
     def validate(self, value, record_id=None):
         if value == self.STARS:
@@ -4653,6 +5108,25 @@ class CRYPT(Validator):
             return value
         return LazyCrypt(self, value)
 
+    def validate_many(self, values, executor=None):
+        results = [self(value) for value in values]
+        executor = executor or self.executor
+        if executor is None:
+            return results
+        pending = {}
+        for value, error in results:
+            if error is None and isinstance(value, LazyCrypt) and not value.crypted:
+                pending[id(value)] = value
+        pending = list(pending.values())
+        jobs = [value._hash_args() for value in pending]
+        chunks = list(_chunks(jobs, self.offload_batch_size))
+        hashed = []
+        for outputs in executor.map(_crypt_many, chunks):
+            hashed.extend(outputs)
+        for value, crypted in zip(pending, hashed):
+            value.crypted = crypted
+        return results
+
     def formatter(self, value):
         return "" if not value else self.STARS
 
@@ -4726,8 +5200,12 @@ class IS_STRONG(Validator):
         >>> IS_STRONG(es=True, entropy=100)('añd')
         ('a\\xc3\\xb1d', 'Password too simple (31.26/10)')
 
+    ``validate_many`` with an executor checks batches in worker
+    processes, whose messages go through the translator they import.
     """
 
+    offload = True
+
     def __init__(
         self,
         min=None,
@@ -4878,6 +5356,9 @@ class IS_IMAGE(Validator):
     Use (-1, -1) as minsize to pass image size check.
     Use (-1, -1) as aspectratio to pass aspect ratio check.
 
+    Only the first bytes of each stream are read, and open uploads cannot
+    be sent to worker processes, so ``validate_many`` ignores an executor.
+
     Examples:
         Check if uploaded file is in any of supported image formats:
 
@@ -5261,6 +5742,8 @@ class IS_IPV4(Validator):
 
     """
 
+    pure = True
+
     REGEX_IPV4 = re.compile(
         r"^(([1-9]?\d|1\d\d|2[0-4]\d|25[0-5])\.){3}([1-9]?\d|1\d\d|2[0-4]\d|25[0-5])$"
     )
@@ -5417,6 +5900,8 @@ class IS_IPV6(Validator):
 
     """
 
+    pure = True
+
     def __init__(
         self,
         is_private=None,
@@ -5438,8 +5923,11 @@ class IS_IPV6(Validator):
         self.is_teredo = is_teredo
         self.subnets = subnets
         self.error_message = error_message
+        self.networks = None
 
     def validate(self, value, record_id=None):
+        import ipaddress
+
         try:
             ip = ipaddress.IPv6Address(to_unicode(value))
             ok = True
@@ -5451,13 +5939,18 @@ class IS_IPV6(Validator):
             ok = False
             if isinstance(self.subnets, str):
                 self.subnets = [self.subnets]
-            for network in self.subnets:
+            # parsed once per list of subnets
+            subnets = tuple(self.subnets)
+            if self.networks is None or self.networks[0] != subnets:
                 try:
-                    ipnet = ipaddress.IPv6Network(to_unicode(network))
+                    networks = [
+                        ipaddress.IPv6Network(to_unicode(network))
+                        for network in subnets
+                    ]
                 except (ipaddress.NetmaskValueError, ipaddress.AddressValueError):
                     raise ValidationError(self.translator("invalid subnet provided"))
-                if ip in ipnet:
-                    ok = True
+                self.networks = (subnets, networks)
+            ok = any(ip in ipnet for ipnet in self.networks[1])
 
         if self.is_routeable:
             self.is_private = False
@@ -5626,6 +6119,8 @@ class IS_IPADDRESS(Validator):
         ('2001::8ffa:fe22:b3af', 'invalid subnet provided')
     """
 
+    pure = True
+
     def __init__(
         self,
         minip="0.0.0.0",
@@ -5662,8 +6157,30 @@ class IS_IPADDRESS(Validator):
         self.subnets = subnets
         self.is_ipv6 = is_ipv6 or is_ipv4 is False
         self.error_message = error_message
+        self.ipv4_validator = IS_IPV4(
+            minip=self.minip,
+            maxip=self.maxip,
+            invert=self.invert,
+            is_localhost=self.is_localhost,
+            is_private=self.is_private,
+            is_automatic=self.is_automatic,
+            error_message=self.error_message,
+        )
+        self.ipv6_validator = IS_IPV6(
+            is_private=self.is_private,
+            is_link_local=self.is_link_local,
+            is_reserved=self.is_reserved,
+            is_multicast=self.is_multicast,
+            is_routeable=self.is_routeable,
+            is_6to4=self.is_6to4,
+            is_teredo=self.is_teredo,
+            subnets=self.subnets,
+            error_message=self.error_message,
+        )
 
     def validate(self, value, record_id=None):
+        import ipaddress
+
         IPAddress = ipaddress.ip_address
         IPv6Address = ipaddress.IPv6Address
         IPv4Address = ipaddress.IPv4Address
@@ -5678,26 +6195,8 @@ class IS_IPADDRESS(Validator):
         elif self.is_ipv6 and isinstance(ip, IPv4Address):
             raise ValidationError(self.translator(self.error_message))
         elif self.is_ipv4 or isinstance(ip, IPv4Address):
-            return IS_IPV4(
-                minip=self.minip,
-                maxip=self.maxip,
-                invert=self.invert,
-                is_localhost=self.is_localhost,
-                is_private=self.is_private,
-                is_automatic=self.is_automatic,
-                error_message=self.error_message,
-            ).validate(value, record_id)
+            return self.ipv4_validator.validate(value, record_id)
         elif self.is_ipv6 or isinstance(ip, IPv6Address):
-            return IS_IPV6(
-                is_private=self.is_private,
-                is_link_local=self.is_link_local,
-                is_reserved=self.is_reserved,
-                is_multicast=self.is_multicast,
-                is_routeable=self.is_routeable,
-                is_6to4=self.is_6to4,
-                is_teredo=self.is_teredo,
-                subnets=self.subnets,
-                error_message=self.error_message,
-            ).validate(value, record_id)
+            return self.ipv6_validator.validate(value, record_id)
         else:
             raise ValidationError(self.translator(self.error_message))
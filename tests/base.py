@@ -2,6 +2,7 @@
 
 import shutil
 import tempfile
+from unittest import mock
 
 from pydal import DAL, Field
 
@@ -221,3 +222,110 @@ class TestSingleTransaction(unittest.TestCase):
         with db.single_transaction():
             db.tt.insert(aa="test")
         self.assertEqual(db(db.tt).count(), 1)
+
+
+class TestSchemaTemplate(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.template = DAL("sqlite://template.db", folder=self.folder)
+        self.template.define_table("person", Field("name"), format="%(name)s")
+        self.template.define_table(
+            "thing", Field("owner", "reference person"), Field("doc", "upload")
+        )
+        self.template.commit()
+        self.template.freeze_schema()
+
+    def tearDown(self):
+        self.template.close()
+        shutil.rmtree(self.folder)
+
+    def testRun(self):
+        db = DAL.from_template(self.template)
+        self.assertEqual(db.tables, ["person", "thing"])
+        # tables are copied on first access and bound to the new DAL
+        self.assertEqual(sorted(db._TEMPLATE_TABLES), ["person", "thing"])
+        self.assertIs(db.thing._db, db)
+        self.assertIs(db.thing.owner.db, db)
+        self.assertIs(db.thing.owner.referent, db.person.id)
+        self.assertEqual(db.person._referenced_by, [db.thing.owner])
+        self.assertEqual(db._TEMPLATE_TABLES, {})
+        self.assertIs(self.template.thing.owner.db, self.template)
+        self.assertIs(db.thing.owner.requires.other.dbset.db, db)
+        pid = db.person.insert(name="Ann")
+        db.thing.insert(owner=pid)
+        row = db(db.thing.owner == db.person.id).select().first()
+        self.assertEqual(row.person.name, "Ann")
+        self.assertEqual(db.thing.owner.represent(pid), "Ann")
+        # copies don't leak back into the template
+        db.person._after_insert.append(lambda *a: None)
+        self.assertEqual(self.template.person._after_insert, [])
+        db.define_table("person", Field("name"), Field("age"), redefine=True)
+        self.assertNotIn("age", self.template.person.fields)
+        db.rollback()
+        db.close()
+
+    def testFrozen(self):
+        self.assertRaises(
+            RuntimeError, self.template.define_table, "other", Field("aa")
+        )
+        self.assertRaises(RuntimeError, DAL.from_template, DAL(None))
+        self.assertRaises(ValueError, DAL.from_template, self.template, None)
+
+    def testVersioned(self):
+        from pydal.validators import IS_EMPTY_OR, IS_IN_DB, IS_NOT_IN_DB
+
+        template = DAL("sqlite://versioned.db", folder=self.folder)
+        template.define_table("tag", Field("name"))
+        template.define_table(
+            "doc",
+            Field("title", requires=IS_NOT_IN_DB(template, "doc.title")),
+            Field("tag", requires=IS_EMPTY_OR(IS_IN_DB(template, "tag.id"))),
+        )
+        template.doc._enable_record_versioning()
+        template.commit()
+        template.freeze_schema()
+        db = DAL.from_template(template)
+        self.assertIs(db.doc.title.requires.dbset, db)
+        self.assertIs(db.doc.tag.requires.other.dbset.db, db)
+        self.assertIs(template.doc.tag.requires.other.dbset.db, template)
+        tag = db.tag.insert(name="a")
+        self.assertEqual(db.doc.tag.validate(tag), (tag, None))
+        did = db.doc.insert(title="one")
+        # archived through the copy's connection and transaction
+        db(db.doc.id == did).update(title="two")
+        rows = db(db.doc_archive).select()
+        self.assertEqual([(r.current_record, r.title) for r in rows], [(did, "one")])
+        db.rollback()
+        db.close()
+        template.close()
+
+    def testCopiedLazily(self):
+        """Tables are copied on first access, never defined again."""
+        from pydal.objects import Table
+
+        template = DAL(DEFAULT_URI, migrate=False)
+        for i in range(20):
+            template.define_table(
+                "t%d" % i,
+                Field("f0"),
+                Field("parent", "reference t%d" % (i - 1 if i else 0)),
+            )
+        template.freeze_schema()
+        with mock.patch.object(
+            Table, "__init__", side_effect=AssertionError("table redefined")
+        ):
+            db = DAL.from_template(template, migrate=False)
+            self.assertEqual(len(db._TEMPLATE_TABLES), 20)
+            db.t1.parent, db.t0.f0
+            # only the touched tables were copied
+            self.assertNotIn("t0", db._TEMPLATE_TABLES)
+            self.assertNotIn("t1", db._TEMPLATE_TABLES)
+            self.assertEqual(len(db._TEMPLATE_TABLES), 18)
+            self.assertIs(db.t1.parent.referent, db.t0.id)
+            # back-references are resolved on first use
+            refs = db.t0._referenced_by
+            self.assertEqual(len(db._TEMPLATE_TABLES), 18)
+            self.assertEqual([f.tablename for f in refs], ["t0", "t1"])
+            self.assertEqual(len(db._TEMPLATE_TABLES), 18)
+            db.close()
+        template.close()
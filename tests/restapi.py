@@ -325,6 +325,98 @@ class TestRestAPI(unittest.TestCase):
             },
         )
 
+    def test_round_trips(self):
+        db = self.db
+        db.define_table(
+            "pair",
+            Field("name"),
+            Field("first", "reference color"),
+            Field("second", "reference color"),
+        )
+        db.pair.insert(name="flag", first=1, second=3)
+        db.pair.insert(name="lamp", first=2, second=2)
+        api = RestAPI(db, ALLOW_ALL_POLICY, debug=True)
+        get_vars = {"@lookup": "first[name],second!:second[name]", "@count": "true"}
+        response = api("GET", "pair", get_vars=get_vars)
+        self.assertEqual(response["count"], 2)
+        self.assertEqual(
+            response["items"],
+            [
+                {
+                    "id": 1,
+                    "name": "flag",
+                    "first": {"name": "red"},
+                    "second.name": "blue",
+                },
+                {
+                    "id": 2,
+                    "name": "lamp",
+                    "first": {"name": "green"},
+                    "second.name": "green",
+                },
+            ],
+        )
+        windowed = db._adapter.dialect.window_count() is not None
+        # page (+ total) and one query for both lookups on color
+        self.assertEqual(response["round_trips"], 2 if windowed else 3)
+        # a page past the end still reports the total
+        response = api("GET", "pair", get_vars={"@offset": 5, "@count": "true"})
+        self.assertEqual((response["count"], response["items"]), (2, []))
+        self.assertNotIn("round_trips", self.api("GET", "pair"))
+
+    def test_round_trips_threads(self):
+        import threading
+
+        from pydal.restapi import RoundTrips
+
+        db = self.db
+        api = RestAPI(db, ALLOW_ALL_POLICY, debug=True)
+        # statements other threads send meanwhile are not counted
+        with api.count_round_trips() as commands:
+            thread = threading.Thread(target=lambda: db(db.color).count())
+            thread.start()
+            thread.join()
+            db(db.thing).count()
+        self.assertEqual(len(commands), 1)
+        self.assertEqual(db._adapter.execution_handlers.count(RoundTrips), 1)
+        # a streamed body closed from another thread stops counting
+        api.stream = True
+        chunks = iter(api("GET", "thing"))
+        next(chunks)
+        thread = threading.Thread(target=chunks.close)
+        thread.start()
+        thread.join()
+        self.assertEqual(RoundTrips.collectors(), [])
+
+    def test_stream(self):
+        import json
+
+        from pydal.restapi import JSONStream
+
+        api = RestAPI(self.db, ALLOW_ALL_POLICY, stream=True, stream_batch_size=2)
+        for tablename, get_vars in [
+            ("thing", {"@lookup": "color[name]", "@count": "true"}),
+            ("thing", {"@lookup": "color!:color[name],related:a.rel[desc]"}),
+            ("thing", {"@offset": 1, "@limit": 3, "@order": "~name"}),
+            ("thing", {"@offset": 9, "@count": "true"}),
+            ("rel", {"@limit": 0, "@model": "true"}),
+            ("color", {"@options_list": "true"}),
+        ]:
+            expected = self.api.search(tablename, dict(get_vars))
+            stream = api("GET", tablename, get_vars=dict(get_vars))
+            self.assertIsInstance(stream, JSONStream)
+            chunks = list(stream)
+            self.assertTrue(all(isinstance(chunk, bytes) for chunk in chunks))
+            response = json.loads(b"".join(chunks))
+            self.assertEqual(response.pop("status"), "success")
+            self.assertEqual(response.pop("code"), 200)
+            self.assertEqual(response.pop("api_version"), __version__)
+            del response["timestamp"]
+            self.assertEqual(response, json.loads(json.dumps(expected)))
+        # errors are reported before anything is streamed
+        response = api("GET", "thing", get_vars={"bogus.eq": 1})
+        self.assertEqual(response["code"], 400)
+
     def test_REST(self):
         api = self.api
         api.policy = ALLOW_ALL_POLICY
@@ -404,3 +496,98 @@ class TestRestAPI(unittest.TestCase):
                 "api_version": __version__,
             },
         )
+
+
+class TestParseAsRest(unittest.TestCase):
+    def setUp(self):
+        db = DAL("sqlite:memory")
+        db.define_table("person", Field("name"), Field("info"))
+        db.define_table(
+            "pet", Field("ownedby", db.person), Field("name"), Field("info")
+        )
+        for name in ("Alex", "Bo"):
+            person_id = db.person.insert(name=name, info="owner")
+            db.pet.insert(ownedby=person_id, name="Rex", info="dog")
+            db.pet.insert(ownedby=person_id, name="Tom" + name, info="cat")
+        self.db = db
+        self.patterns = [
+            "/friends[person]",
+            "/{person.name}/:field",
+            "/{person.name}/pets[pet.ownedby]",
+            "/{person.name}/pets[pet.ownedby]/{pet.name}",
+            "/{person.name}/pets[pet.ownedby]/{pet.name}/:field",
+            ("/dogs[pet]", db.pet.info == "dog"),
+            ("/dogs[pet]/{pet.name.startswith}", db.pet.info == "dog", ["name"]),
+            "/pets/:auto[pet]",
+        ]
+
+    def tearDown(self):
+        self.db.close()
+
+    def parse(self, path, **vars):
+        return self.db.parse_as_rest(self.patterns, path.split("/"), vars)
+
+    def test_parse(self):
+        result = self.parse("friends", order="~name")
+        self.assertEqual(result.status, 200)
+        self.assertEqual(result.count, 2)
+        self.assertEqual([row.name for row in result.response], ["Bo", "Alex"])
+        result = self.parse("Alex/info")
+        self.assertEqual(result.pattern, "/{person.name}/:field")
+        self.assertEqual(result.response.as_list(), [{"info": "owner"}])
+        self.assertEqual(self.parse("Nobody/info").status, 404)
+        result = self.parse("Bo/pets")
+        self.assertEqual(sorted(row.name for row in result.response), ["Rex", "TomBo"])
+        result = self.parse("Bo/pets/TomBo/info")
+        self.assertEqual(result.response.as_list(), [{"info": "cat"}])
+        result = self.parse("dogs")
+        self.assertEqual((result.status, result.count), (200, 2))
+        result = self.parse("dogs/R")
+        self.assertEqual(result.response.as_list(), [{"name": "Rex"}] * 2)
+        self.assertEqual(self.parse("dogs/T").count, 0)
+        result = self.parse("pets/id/1/name")
+        self.assertEqual(result.response.as_list(), [{"name": "Rex"}])
+        result = self.parse("pets/ownedby/2")
+        self.assertEqual(result.pattern, "/pets/ownedby/{pet.ownedby}")
+        self.assertEqual(result.count, 2)
+        self.assertEqual(self.parse("cats").status, 400)
+        self.assertEqual(self.parse("friends", order="nope").status, 400)
+        result = self.parse("patterns")
+        self.assertEqual(result.response[:8], self.patterns[:7] + ["/pets/id/{pet.id}"])
+
+    def test_routes(self):
+        db = self.db
+        self.parse("friends")
+        routes = db._rest_routes
+        self.assertEqual(len(routes), 1)
+        compiled = list(routes.values())[0]
+        # a different basequery reuses the compiled patterns
+        self.patterns[5] = ("/dogs[pet]", db.pet.info == "cat")
+        self.assertEqual(self.parse("dogs").count, 2)
+        self.assertIs(list(routes.values())[0], compiled)
+        # the first pattern matching a request wins
+        self.patterns.insert(0, "/{person.info}/:field")
+        result = self.parse("owner/name")
+        self.assertEqual(result.pattern, "/{person.info}/:field")
+        self.assertEqual(len(result.response), 2)
+        self.assertEqual(self.parse("Alex/info").status, 404)
+        # a new table or fields made unreadable invalidate the cache
+        db.pet.ownedby.readable = False
+        self.assertEqual(self.parse("pets/ownedby/2").status, 400)
+        db.pet.ownedby.readable = True
+        db.define_table("toy", Field("name"))
+        self.parse("friends")
+        self.assertEqual(len(routes), 3)
+        # invalid patterns only fail the requests that reach them
+        self.patterns.append("/bad/{pet.nope}")
+        self.assertEqual(self.parse("friends").status, 200)
+        with self.assertRaises(KeyError):
+            self.parse("bad/x")
+
+    def test_auto(self):
+        result = self.db.parse_as_rest("auto", ["pet", "name"], {})
+        self.assertEqual(result.status, 400)
+        result = self.db.parse_as_rest("auto", ["pet"], {})
+        self.assertEqual((result.pattern, result.count), ("/pet[pet]", 4))
+        result = self.db.parse_as_rest("auto", ["person", "id", "1", "name"], {})
+        self.assertEqual(result.response.as_list(), [{"name": "Alex"}])
@@ -4,11 +4,14 @@
 """Unit tests for scheduler.py"""
 
 import datetime
+import logging
+import os
 import tempfile
+import threading
 import time
 
 from pydal import DAL
-from pydal.tools.scheduler import Scheduler, delta, now
+from pydal.tools.scheduler import Histogram, Scheduler, delta, now
 
 from ._compat import unittest
 
@@ -61,3 +64,338 @@ class TestScheduler(unittest.TestCase):
             self.assertEqual(db(db.task_run.status == "failed").count(), 1)
             # for run in db(db.task_run).select():
             #     print(run.name, run.status, run.log)
+
+    def test_max_concurrent_runs(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            db = DAL("sqlite://store.sqllite", folder=tempdir)
+            scheduler = Scheduler(
+                db,
+                folder=tempdir,
+                sleep_time=0.1,
+                max_concurrent_runs=1,
+                logger=logging.getLogger("test_max_concurrent_runs"),
+            )
+
+            def nap():
+                started = time.time()
+                time.sleep(0.5)
+                return [started, time.time()]
+
+            scheduler.register_task("nap", nap)
+            for k in range(4):
+                scheduler.enqueue_run(name="nap")
+            scheduler.start()
+            # stay out of SQLite while the loop forks
+            counters = scheduler.metrics.counters
+            deadline = time.time() + 30
+            while counters["runs_completed"] < 4 and time.time() < deadline:
+                time.sleep(0.1)
+            scheduler.stop()
+            runs = db(db.task_run).select()
+            self.assertEqual([run.status for run in runs], ["completed"] * 4)
+            # forked children not started yet count against the limit
+            spans = sorted(run.output for run in runs)
+            for (_, end), (start, _) in zip(spans, spans[1:]):
+                self.assertLessEqual(end, start)
+            db.close()
+
+    def test_dead_before_start(self):
+        class Crashing(Scheduler):
+            def safe_exec_child(self, run):
+                os._exit(1)
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            db = DAL("sqlite://store.sqllite", folder=tempdir)
+            scheduler = Crashing(
+                db,
+                folder=tempdir,
+                sleep_time=0.1,
+                max_concurrent_runs=1,
+                logger=logging.getLogger("test_dead_before_start"),
+            )
+            scheduler.register_task("noop", lambda: None)
+            for k in range(2):
+                scheduler.enqueue_run(name="noop")
+            scheduler.start()
+            deadline = time.time() + 30
+            while scheduler.has_work() and time.time() < deadline:
+                time.sleep(0.1)
+                db.commit()
+            scheduler.stop()
+            # the runs never started do not keep their slot, and are
+            # given up on after max_start_attempts
+            statuses = [run.status for run in db(db.task_run).select()]
+            self.assertEqual(statuses, ["dead", "dead"])
+            db.close()
+
+    def test_retry_start(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            marker = os.path.join(tempdir, "crashed")
+
+            class CrashingOnce(Scheduler):
+                def safe_exec_child(self, run):
+                    if not os.path.exists(marker):
+                        open(marker, "w").close()
+                        os._exit(1)
+                    super().safe_exec_child(run)
+
+            db = DAL("sqlite://store.sqllite", folder=tempdir)
+            scheduler = CrashingOnce(
+                db,
+                folder=tempdir,
+                sleep_time=0.1,
+                max_concurrent_runs=1,
+                logger=logging.getLogger("test_retry_start"),
+            )
+            scheduler.register_task("noop", lambda: "done")
+            run_id = scheduler.enqueue_run(name="noop")
+            scheduler.start()
+            counters = scheduler.metrics.counters
+            deadline = time.time() + 30
+            while counters["runs_completed"] < 1 and time.time() < deadline:
+                time.sleep(0.1)
+            scheduler.stop()
+            # a run whose child exits before starting it goes back in the queue
+            self.assertTrue(os.path.exists(marker))
+            run = db.task_run(run_id)
+            self.assertEqual((run.status, run.output), ("completed", "done"))
+            db.close()
+
+    def test_pool_dead_worker(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            marker = os.path.join(tempdir, "crashed")
+
+            class CrashingOnce(Scheduler):
+                def exec_child(self, run):
+                    if not os.path.exists(marker):
+                        open(marker, "w").close()
+                        os._exit(1)
+                    super().exec_child(run)
+
+            db = DAL("sqlite://store.sqllite", folder=tempdir)
+            scheduler = CrashingOnce(
+                db,
+                folder=tempdir,
+                sleep_time=0.1,
+                max_concurrent_runs=1,
+                mode="pool",
+                logger=logging.getLogger("test_pool_dead_worker"),
+            )
+            scheduler.register_task("noop", lambda: "done")
+            run_ids = [scheduler.enqueue_run(name="noop") for k in range(3)]
+            scheduler.start()
+            deadline = time.time() + 30
+            counters = scheduler.metrics.counters
+            while counters["runs_completed"] < 3 and time.time() < deadline:
+                time.sleep(0.1)
+            scheduler.stop()
+            # the run held by the dead worker does not keep its slot and
+            # goes back in the queue
+            self.assertTrue(os.path.exists(marker))
+            runs = [db.task_run(run_id) for run_id in run_ids]
+            self.assertEqual(
+                [(run.status, run.output) for run in runs], [("completed", "done")] * 3
+            )
+            db.close()
+
+    def test_claim_runs(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            db = DAL("sqlite://store.sqllite", folder=tempdir)
+            scheduler = Scheduler(
+                db, folder=tempdir, logger=logging.getLogger("test_claim_runs")
+            )
+            scheduler.register_task("noop", lambda: None)
+            run_ids = [scheduler.enqueue_run(name="noop") for _ in range(200)]
+            later_id = scheduler.enqueue_run(
+                name="noop", scheduled_for=now() + delta(60)
+            )
+            db.commit()
+            claimed = []
+            errors = []
+            # like separate workers, each claimer has its own DAL: a DAL
+            # instance must not be shared between threads
+            claimers = [
+                Scheduler(
+                    DAL("sqlite://store.sqllite", folder=tempdir),
+                    folder=tempdir,
+                    logger=logging.getLogger("test_claim_runs"),
+                )
+                for _ in range(8)
+            ]
+
+            def claim(claimer):
+                try:
+                    while True:
+                        runs = claimer.claim_runs(5)
+                        if not runs:
+                            break
+                        self.assertLessEqual(len(runs), 5)
+                        claimed.extend(run.id for run in runs)
+                except Exception as err:
+                    errors.append(err)
+                finally:
+                    claimer.db.recycle_connection_in_pool_or_close()
+
+            threads = [
+                threading.Thread(target=claim, args=(claimer,))
+                for claimer in claimers
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+            # every ready run claimed exactly once
+            self.assertEqual(sorted(claimed), sorted(run_ids))
+            self.assertEqual(db(db.task_run.status == "assigned").count(), 200)
+            self.assertEqual(db.task_run(later_id).status, "queued")
+            # unstarted claims go back in the queue
+            scheduler.requeue_assigned()
+            self.assertEqual(db(db.task_run.worker == None).count(), 201)
+            db.close()
+            for claimer in claimers:
+                claimer.db.close()
+
+    def test_pool(self):
+        def hello(name):
+            print(f"hello {name}")
+            return name
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            db = DAL("sqlite://store.sqllite", folder=tempdir)
+            scheduler = Scheduler(
+                db,
+                folder=tempdir,
+                sleep_time=0.1,
+                max_concurrent_runs=2,
+                mode="pool",
+                logger=logging.getLogger("test_pool"),
+            )
+            scheduler.register_task("hello", hello)
+            scheduler.register_task("fail", lambda x: 1 / x)
+            scheduler.register_task("long", lambda: time.sleep(10))
+            for k in range(20):
+                scheduler.enqueue_run(name="hello", inputs={"name": f"run{k}"})
+            scheduler.enqueue_run(name="fail", inputs={"x": 0})
+            scheduler.enqueue_run(name="long", timeout=1)
+            scheduler.start()
+            # wait on the metrics, which the loop records once it sees the
+            # runs over, to keep this thread out of SQLite while workers fork
+            counters = scheduler.metrics.counters
+            ended = ("runs_completed", "runs_failed", "runs_timeout")
+            deadline = time.time() + 30
+            while sum(counters[name] for name in ended) < 22 and time.time() < deadline:
+                time.sleep(0.1)
+            scheduler.stop()
+            metrics = scheduler.metrics.snapshot()
+            self.assertEqual(metrics["counters"]["runs_completed"], 20)
+            self.assertEqual(metrics["counters"]["runs_failed"], 1)
+            self.assertEqual(metrics["counters"]["runs_timeout"], 1)
+            self.assertEqual(metrics["counters"]["claimed_runs"], 22)
+            self.assertGreater(metrics["counters"]["loop_iterations"], 0)
+            self.assertEqual(metrics["histograms"]["queue_wait"]["count"], 22)
+            self.assertEqual(metrics["histograms"]["run_duration"]["count"], 22)
+            self.assertGreaterEqual(metrics["histograms"]["run_duration"]["max"], 1)
+            runs = db(db.task_run).select()
+            statuses = {run.name: run.status for run in runs}
+            self.assertEqual(
+                statuses, {"hello": "completed", "fail": "failed", "long": "timeout"}
+            )
+            hellos = runs.find(lambda run: run.name == "hello")
+            self.assertEqual(len(hellos), 20)
+            for run in hellos:
+                self.assertEqual(run.output, run.inputs["name"])
+                self.assertIn(f"hello {run.output}", run.log)
+                self.assertIn('status="completed"', run.log)
+            failed = runs.find(lambda run: run.name == "fail")[0]
+            self.assertIn("ZeroDivisionError", failed.log)
+            # the runs shared the pool processes, the killed one was replaced
+            self.assertLessEqual(len({run.pid for run in runs}), 3)
+            db.close()
+
+    def test_histogram(self):
+        histogram = Histogram()
+        self.assertEqual(histogram.quantile(0.5), None)
+        for value in (0.2, 0.3, 0.3):
+            histogram.observe(value)
+        # bucket bounds, but never above the largest value seen
+        self.assertEqual(histogram.quantile(0.5), 0.3)
+        histogram.observe(4)
+        self.assertEqual(histogram.quantile(0.5), 0.5)
+        self.assertEqual(histogram.quantile(0.95), 4)
+        histogram.observe(7200)
+        self.assertEqual(histogram.quantile(1), 7200)
+
+    def test_wakeup(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            db = DAL("sqlite://store.sqllite", folder=tempdir)
+            scheduler = Scheduler(
+                db,
+                folder=tempdir,
+                sleep_time=30,
+                logger=logging.getLogger("test_wakeup"),
+            )
+            self.assertEqual(scheduler.wakeup.__class__.__name__, "FifoWakeup")
+            scheduler.register_task("noop", lambda: None)
+            scheduler.start()
+            # let the idle loop back off
+            time.sleep(2)
+            started = time.time()
+            run_id = scheduler.enqueue_run(name="noop")
+            # the loop records the run once woken up by its child, and
+            # this thread stays out of SQLite while the loop forks
+            counters = scheduler.metrics.counters
+            while counters["runs_completed"] < 1 and time.time() - started < 10:
+                time.sleep(0.05)
+            waited = time.time() - started
+            # stop does not wait for the idle timeout either
+            started = time.time()
+            scheduler.stop()
+            self.assertLess(time.time() - started, 5)
+            self.assertLess(waited, 10)
+            self.assertEqual(db.task_run(run_id).status, "completed")
+            db.close()
+
+    def test_logs(self):
+        def chatty(lines):
+            for k in range(lines):
+                print(f"line {k:06d}")
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            db = DAL("sqlite://store.sqllite", folder=tempdir)
+            scheduler = Scheduler(
+                db,
+                folder=tempdir,
+                sleep_time=0.1,
+                max_log_size=2000,
+                compress_logs=True,
+                logger=logging.getLogger("test_logs"),
+            )
+            scheduler.register_task("chatty", chatty)
+            big_id = scheduler.enqueue_run(name="chatty", inputs={"lines": 10000})
+            small_id = scheduler.enqueue_run(name="chatty", inputs={"lines": 3})
+            # the scheduler never selects the log column
+            self.assertNotIn("log", [f.name for f in scheduler.run_fields()])
+            self.assertNotIn("log", db(db.task_run).select(*scheduler.run_fields())[0])
+            scheduler.start()
+            # stay out of SQLite while the loop forks
+            counters = scheduler.metrics.counters
+            deadline = time.time() + 30
+            while counters["runs_completed"] < 2 and time.time() < deadline:
+                time.sleep(0.1)
+            scheduler.stop()
+            self.assertEqual(db(db.task_run.status == "completed").count(), 2)
+            # the logs are only in the side table, compressed
+            self.assertEqual(db(db.task_run.log != None).count(), 0)
+            self.assertEqual(db(db.task_run_log).count(), 2)
+            log = scheduler.get_log(big_id)
+            self.assertIn("line 000000", log)
+            self.assertIn("line 009999", log)
+            self.assertNotIn("line 005000", log)
+            self.assertIn("<truncated bytes=", log)
+            self.assertIn('status="completed"', log)
+            self.assertLess(len(log), 3000)
+            log = scheduler.get_log(small_id)
+            self.assertIn("line 000002", log)
+            self.assertNotIn("<truncated", log)
+            db.close()
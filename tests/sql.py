@@ -14,7 +14,7 @@ from unittest import skipIf
 from pydal import DAL, Field
 from io import BytesIO, StringIO
 from pydal.utils import to_bytes
-from pydal.helpers.classes import SQLALL, OpRow
+from pydal.helpers.classes import SQLALL, ExecutionHandler, OpRow
 from pydal.objects import Expression, Row, Table
 
 from ._adapt import (
@@ -253,6 +253,79 @@ class TestFields(DALtest):
         except ImportError:
             pass
 
+    def testUploadStoreCAS(self):
+        import hashlib
+        import shutil
+        import tempfile
+
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+
+        def blobs():
+            return sorted(name for _, _, names in os.walk(folder) for name in names)
+
+        db = self.connect()
+        db.define_table(
+            "tt",
+            Field(
+                "fileobj",
+                "upload",
+                uploadfolder=folder,
+                uploadstore="cas",
+                autodelete=True,
+            ),
+        )
+        field = db.tt.fileobj
+        ids = [
+            db.tt.insert(fileobj=field.store(BytesIO(b"logo"), "logo%i.png" % i))
+            for i in range(3)
+        ]
+        other = db.tt.insert(fileobj=field.store(BytesIO(b"other"), "a.txt"))
+        key = hashlib.sha256(b"logo").hexdigest()
+        self.assertEqual(blobs(), sorted([key, hashlib.sha256(b"other").hexdigest()]))
+        # each record keeps its own file name
+        name = db.tt[ids[1]].fileobj
+        self.assertEqual(name.split(".")[2], key)
+        filename, stream = field.retrieve(name)
+        self.assertEqual((filename, stream.read()), ("logo1.png", b"logo"))
+        stream.close()
+        filename, fullname = field.retrieve(name, nameonly=True)
+        self.assertEqual(fullname, os.path.join(folder, "tt.fileobj", key[:2], key))
+        self.assertEqual(
+            field.retrieve_file_properties(name),
+            dict(path=os.path.join(folder, "tt.fileobj", key[:2]), filename=filename),
+        )
+        # records only let go of the content, the sweep removes it
+        db(db.tt.id.belongs(ids[:2])).delete()
+        db(db.tt.id == ids[2]).update(fileobj=field.store(BytesIO(b"new"), "b.txt"))
+        self.assertIn(key, blobs())
+        # not before max_age, even when stored again
+        self.assertEqual(field.sweep_content(), 0)
+        old = os.path.join(folder, "tt.fileobj", key[:2], key)
+        os.utime(old, (0, 0))
+        self.assertEqual(field.sweep_content(max_age=60), 1)
+        self.assertNotIn(key, blobs())
+        db(db.tt.id == other).update(fileobj=field.store(BytesIO(b"other"), "c.txt"))
+        self.assertEqual(field.sweep_content(max_age=0), 0)
+        self.assertEqual(len(blobs()), 2)
+        # records hidden by common filters still hold their content
+        db.tt._common_filter = lambda query: db.tt.id != other
+        self.assertEqual(db(db.tt).count(), 1)
+        self.assertEqual(field.sweep_content(max_age=0), 0)
+        self.assertEqual(len(blobs()), 2)
+        db.tt._common_filter = None
+        # and a delete rolled back leaves them in place
+        db.commit()
+        db(db.tt).delete()
+        db.rollback()
+        self.assertEqual(db(db.tt).count(), 2)
+        self.assertEqual(len(blobs()), 2)
+        db(db.tt).delete()
+        self.assertEqual(field.sweep_content(max_age=0), 2)
+        self.assertEqual(blobs(), [])
+        with self.assertRaises(SyntaxError):
+            Field("fileobj", "upload", uploadstore="s3")
+
     def testBlobBytes(self):
         # Test blob with latin1 encoded bytes
         db = self.connect()
@@ -1309,6 +1382,39 @@ class TestDatetime(DALtest):
         self.assertEqual(db().select(db.tt.aa)[0].aa, t0)
 
 
+@unittest.skipUnless(IS_SQLITE, "SQLite user functions")
+class TestSQLiteFunctions(DALtest):
+    def testExtractIsNative(self):
+        db = self.connect()
+        db.define_table("tt", Field("aa", "datetime"))
+        db.tt.insert(aa=datetime.datetime(1971, 12, 21, 11, 30, 15))
+        sql = db(db.tt.aa.year() == 1971)._select(db.tt.id)
+        self.assertIn("strftime('%Y'", sql)
+        self.assertNotIn("web2py_extract", sql)
+        row = db().select(
+            db.tt.aa.year(), db.tt.aa.month(), db.tt.aa.seconds(), db.tt.aa.epoch()
+        ).first()
+        self.assertEqual(row[db.tt.aa.year()], 1971)
+        self.assertEqual(row[db.tt.aa.month()], 12)
+        self.assertEqual(row[db.tt.aa.seconds()], 15)
+        self.assertEqual(
+            row[db.tt.aa.epoch()],
+            db._adapter.web2py_extract("epoch", "1971-12-21 11:30:15"),
+        )
+        db.tt.create_index("tt_year", db.tt.aa.year())
+        plan = db.executesql("EXPLAIN QUERY PLAN " + sql)
+        self.assertIn("tt_year", plan[0][-1])
+
+    def testRegexpIsDeterministic(self):
+        db = self.connect()
+        db.define_table("tt", Field("aa"))
+        db.tt.insert(aa="count")
+        # only deterministic functions are allowed in index expressions
+        db.executesql("CREATE INDEX tt_re ON tt (REGEXP('^c', aa));")
+        self.assertEqual(db(db.tt.aa.regexp("^c")).count(), 1)
+        self.assertFalse(db._adapter.web2py_regexp("^c", None))
+
+
 class TestExpressions(DALtest):
     @unittest.skipIf(IS_POSTGRESQL, "PG8000 does not like these")
     def testRun(self):
@@ -1875,6 +1981,357 @@ class TestMigrations(unittest.TestCase):
         db.commit()
         db.close()
 
+    def testManifest(self):
+        import tempfile
+
+        from pydal.migrator import Migrator
+
+        opened = []
+
+        class Spy(Migrator):
+            def file_open(self, filename, mode="rb", lock=True):
+                opened.append(os.path.basename(filename))
+                return Migrator.file_open(filename, mode, lock)
+
+        def define(db, *extra):
+            for name in ("t0", "t1", "t2"):
+                db.define_table(name, Field("aa"), *extra)
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            uri = "sqlite://storage.sqlite"
+            db = DAL(uri, folder=tempdir, adapter_args=dict(migrator=Spy))
+            define(db)
+            db.close()
+            manifest = glob.glob(os.path.join(tempdir, "*_schema.manifest"))
+            self.assertEqual(len(manifest), 1)
+            # one entry appended per snapshot written
+            with open(manifest[0], "rb") as mfile:
+                entries = [pickle.load(mfile) for name in ("t0", "t1", "t2")]
+                self.assertEqual(mfile.read(), b"")
+            self.assertEqual(
+                [os.path.basename(dbt) for dbt, fingerprint in entries],
+                [db._uri_hash + "_%s.table" % name for name in ("t0", "t1", "t2")],
+            )
+            # unchanged definitions never touch the .table snapshots
+            del opened[:]
+            db = DAL(uri, folder=tempdir, adapter_args=dict(migrator=Spy))
+            define(db)
+            self.assertEqual(
+                [name for name in opened if name.endswith(".table")], []
+            )
+            db.close()
+            # a changed table is migrated, and only that one is read
+            del opened[:]
+            db = DAL(uri, folder=tempdir, adapter_args=dict(migrator=Spy))
+            define(db)
+            db.define_table("t1", Field("aa"), Field("bb"), redefine=True)
+            db.t1.insert(aa="x", bb="y")
+            self.assertEqual(db(db.t1).select().first().bb, "y")
+            self.assertEqual(
+                sorted(set(name for name in opened if name.endswith(".table"))),
+                [db._uri_hash + "_t1.table"],
+            )
+            db.close()
+            # a second process migrating t0 meanwhile is not overwritten
+            db = DAL(uri, folder=tempdir)
+            other = DAL(uri, folder=tempdir)
+            db.define_table("t0", Field("aa"))
+            other.define_table("t0", Field("aa"), Field("cc"))
+            db.define_table("t2", Field("aa"), Field("cc"))
+            dbt = db.t0._dbt
+            with open(dbt, "rb") as tfile:
+                fingerprint = Migrator.fingerprint(pickle.load(tfile))
+            reader = Migrator(db._adapter)
+            reader._manifest_file = manifest[0]
+            self.assertEqual(reader._read_manifest()[dbt], fingerprint)
+            db.close()
+            other.close()
+
+    def testInDBMigrator(self):
+        import tempfile
+
+        from pydal.migrator import InDBMigrator
+
+        statements = []
+
+        class Recorder(ExecutionHandler):
+            def before_execute(self, command):
+                if "web2py_filesystem" in command:
+                    statements.append(command)
+
+        def connect(tempdir):
+            db = DAL(
+                "sqlite://storage.sqlite",
+                folder=tempdir,
+                adapter_args=dict(migrator=InDBMigrator),
+            )
+            db._adapter.execution_handlers.append(Recorder)
+            del statements[:]
+            return db
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            db = connect(tempdir)
+            for name in ("t0", "t1", "t2"):
+                db.define_table(name, Field("aa"))
+            db.close()
+            self.assertEqual(os.listdir(tempdir), ["storage.sqlite"])
+            # unchanged schema: one query fetches every snapshot
+            db = connect(tempdir)
+            for name in ("t0", "t1", "t2"):
+                db.define_table(name, Field("aa"))
+            db.commit()
+            self.assertEqual(len(statements), 1)
+            self.assertIn("LIKE", statements[0])
+            db.close()
+            # a change is written with bound parameters
+            db = connect(tempdir)
+            db.define_table("t0", Field("aa"), Field("bb"))
+            db.t0.insert(aa="x", bb="y")
+            db.commit()
+            self.assertFalse([s for s in statements if "'" in s])
+            db.t0.drop()
+            db.close()
+            # the snapshot is committed with the DDL, not by DAL.commit
+            db = connect(tempdir)
+            db.define_table("t3", Field("aa"))
+            db.rollback()
+            db._adapter.close(action=None)
+            db = connect(tempdir)
+            db.define_table("t3", Field("aa"))
+            db.t3.insert(aa="x")
+            db.close()
+            db = connect(tempdir)
+            paths = [row[0] for row in db.executesql(
+                "SELECT path FROM web2py_filesystem"
+            )]
+            self.assertNotIn(db._uri_hash + "_t0.table", paths)
+            self.assertIn(db._uri_hash + "_t1.table", paths)
+            db.close()
+
+    def testOnlineMigration(self):
+        import tempfile
+
+        updates = []
+
+        class Recorder(ExecutionHandler):
+            fail_at = None
+
+            def before_execute(self, command):
+                if command.startswith(("UPDATE", "ALTER")):
+                    updates.append(command)
+                    if len(updates) == Recorder.fail_at:
+                        raise RuntimeError("interrupted")
+
+        def connect(tempdir, native=False):
+            db = DAL(
+                "sqlite://storage.sqlite",
+                folder=tempdir,
+                adapter_args=dict(migrate_batch_size=10),
+            )
+            if not native:
+                db._adapter.dialect.rename_column = lambda *args: None
+            db._adapter.execution_handlers.append(Recorder)
+            del updates[:]
+            return db
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            db = connect(tempdir)
+            db.define_table("tt", Field("aa"))
+            for n in range(25):
+                db.tt.insert(aa=str(n))
+            db.commit()
+            db.close()
+            # the copy is backfilled in id ranges; interrupt the second one
+            db = connect(tempdir)
+            Recorder.fail_at = 3
+            with self.assertRaises(RuntimeError):
+                db.define_table("tt", Field("aa", rname="bb"))
+            db.close()
+            self.assertTrue(glob.glob(os.path.join(tempdir, "*_tt.migration")))
+            # the next run resumes after the last committed batch
+            Recorder.fail_at = None
+            db = connect(tempdir)
+            db.define_table("tt", Field("aa", rname="bb"))
+            self.assertEqual(
+                updates,
+                [
+                    'UPDATE "tt" SET bb="aa" WHERE "id" > %d AND "id" <= %d;'
+                    % (low, low + 10)
+                    for low in (10, 20)
+                ]
+                + [
+                    'UPDATE "tt" SET bb="aa" WHERE "id" > 30 OR %s;'
+                    % db._adapter.dialect.column_differs("bb", '"aa"', "CHAR(512)")
+                ],
+            )
+            self.assertEqual(
+                sorted(int(row.aa) for row in db(db.tt).select()), list(range(25))
+            )
+            self.assertFalse(glob.glob(os.path.join(tempdir, "*_tt.migration")))
+            db.close()
+            # renames are native where the backend supports them
+            db = connect(tempdir, native=True)
+            db.define_table("tt", Field("aa", rname="cc"))
+            if db._adapter.dialect.rename_column("tt", "bb", "cc"):
+                self.assertEqual(
+                    updates, ['ALTER TABLE "tt" RENAME COLUMN bb TO cc;']
+                )
+            self.assertEqual(db(db.tt).count(), 25)
+            db.close()
+
+    def testOnlineBackfillCatchUp(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            uri = "sqlite://storage.sqlite"
+            db = DAL(uri, folder=tempdir, adapter_args=dict(migrate_batch_size=10))
+            db.define_table("tt", Field("aa"))
+            for n in range(25):
+                db.tt.insert(aa=str(n))
+            db.commit()
+            db.close()
+            # another process keeps writing the old column meanwhile
+            writer = DAL(uri, folder=tempdir)
+            writer.define_table("tt", Field("aa"), migrate=False)
+
+            batches = []
+
+            class Writer(ExecutionHandler):
+                def before_execute(self, command):
+                    if command.startswith("UPDATE") and "<=" in command:
+                        batches.append(command)
+                        if len(batches) > 3:
+                            return
+                        # rows past the highest id read so far
+                        for n in range(10):
+                            writer.tt.insert(aa=str(writer(writer.tt).count()))
+                        # and a row already copied
+                        writer(writer.tt.id == len(batches)).update(aa="updated")
+                        writer.commit()
+
+            db = DAL(uri, folder=tempdir, adapter_args=dict(migrate_batch_size=10))
+            db._adapter.dialect.rename_column = lambda *args: None
+            db._adapter.execution_handlers.append(Writer)
+            db.define_table("tt", Field("aa", rname="bb"))
+            db._adapter.execution_handlers.remove(Writer)
+            rows = db(db.tt).select(orderby=db.tt.id)
+            self.assertEqual(len(batches), 6)
+            expected = ["updated"] * 3 + [str(n) for n in range(3, 55)]
+            self.assertEqual([row.aa for row in rows], expected)
+            db.close()
+            writer.close()
+
+    def testOnlineTypeChange(self):
+        import sqlite3
+        import tempfile
+
+        if sqlite3.sqlite_version_info < (3, 35, 0):
+            self.skipTest("DROP COLUMN needs SQLite 3.35")
+        statements = []
+
+        class Recorder(ExecutionHandler):
+            def before_execute(self, command):
+                if command.startswith(("UPDATE", "ALTER")):
+                    statements.append(command)
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            uri = "sqlite://storage.sqlite"
+            db = DAL(uri, folder=tempdir)
+            db.define_table("tt", Field("aa", "integer"))
+            for n in range(25):
+                db.tt.insert(aa=n)
+            db.commit()
+            db.close()
+            db = DAL(uri, folder=tempdir, adapter_args=dict(migrate_batch_size=10))
+            # take the copy path other backends use for type changes
+            db._adapter.dbengine = "generic"
+            db._adapter.execution_handlers.append(Recorder)
+            commit = db.commit
+            db.commit = lambda: (statements.append("COMMIT"), commit())
+            db.define_table("tt", Field("aa", "string"))
+            # the last batch, the drop and the rename commit together
+            self.assertEqual(
+                statements[-5:],
+                [
+                    'UPDATE "tt" SET "aa__tmp"="aa" WHERE "id" > 30 OR %s;'
+                    % db._adapter.dialect.column_differs(
+                        '"aa__tmp"', '"aa"', "CHAR(512)", True
+                    ),
+                    'ALTER TABLE "tt" DROP COLUMN "aa";',
+                    'ALTER TABLE "tt" RENAME COLUMN "aa__tmp" TO "aa";',
+                    "COMMIT",
+                    "COMMIT",
+                ],
+            )
+            rows = db(db.tt).select(orderby=db.tt.id)
+            self.assertEqual([row.aa for row in rows], [str(n) for n in range(25)])
+            db.close()
+
+    def testDeclaredIndexes(self):
+        import tempfile
+
+        from pydal import Index
+
+        def connect(tempdir, *indexes):
+            db = DAL("sqlite://storage.sqlite", folder=tempdir)
+            db.define_table(
+                "tt",
+                Field("aa"),
+                Field("bb"),
+                Field("nn", "integer"),
+                indexes=list(indexes),
+            )
+            return db
+
+        def created(db):
+            return dict(
+                db.executesql(
+                    "SELECT name, sql FROM sqlite_master WHERE type='index'"
+                    " AND tbl_name='tt' AND sql IS NOT NULL"
+                )
+            )
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            db = connect(
+                tempdir,
+                Index("tt_aa_bb", "aa", "bb"),
+                Index(
+                    "tt_lower_bb",
+                    lambda t: t.bb.lower(),
+                    where=lambda t: t.nn > 5,
+                    unique=True,
+                ),
+            )
+            self.assertEqual(
+                created(db),
+                {
+                    "tt_aa_bb": 'CREATE INDEX "tt_aa_bb" ON "tt" ("aa","bb")',
+                    "tt_lower_bb": 'CREATE UNIQUE INDEX "tt_lower_bb" ON "tt" '
+                    '((LOWER("bb"))) WHERE ("nn" > 5)',
+                },
+            )
+            with open(glob.glob(os.path.join(tempdir, "*_tt.table"))[0], "rb") as tfile:
+                self.assertEqual(
+                    sorted(pickle.load(tfile)["_indexes"]),
+                    ["tt_aa_bb", "tt_lower_bb"],
+                )
+            db.close()
+            # changed and removed indexes are dropped, new ones created
+            db = connect(tempdir, Index("tt_aa_bb", "aa"), Index("tt_nn", "nn"))
+            self.assertEqual(
+                created(db),
+                {
+                    "tt_aa_bb": 'CREATE INDEX "tt_aa_bb" ON "tt" ("aa")',
+                    "tt_nn": 'CREATE INDEX "tt_nn" ON "tt" ("nn")',
+                },
+            )
+            db.close()
+            db = connect(tempdir)
+            self.assertEqual(created(db), {})
+            db.close()
+        with self.assertRaises(SyntaxError):
+            Index("tt_empty")
+
     def tearDown(self):
         if os.path.exists(".storage.db"):
             os.unlink(".storage.db")
@@ -1931,6 +2388,66 @@ class TestReference(DALtest):
             self.tearDown()
 
 
+@unittest.skipUnless(IS_SQLITE, "pydal-side cascades are SQLite only")
+class TestSQLiteCascade(DALtest):
+    def testRun(self):
+        for foreign_keys in (True, False):
+            db = self.connect(
+                adapter_args=dict(foreign_keys=foreign_keys, cascade_batch_size=3)
+            )
+            db.define_table("pp", Field("name"))
+            db.define_table("cc", Field("pp", "reference pp"))
+            db.define_table("gg", Field("cc", "reference cc"))
+            for i in range(10):
+                pid = db.pp.insert(name="a" if i < 7 else "b")
+                for _ in range(2):
+                    db.gg.insert(cc=db.cc.insert(pp=pid))
+            expected = [] if foreign_keys else [db.cc.pp]
+            self.assertEqual(db._adapter._cascade_fields(db.pp), expected)
+            statements = []
+
+            class Recorder(ExecutionHandler):
+                def before_execute(self, command):
+                    statements.append(command)
+
+            db._adapter.execution_handlers.append(Recorder)
+            self.assertEqual(db(db.pp.name == "a").delete(), 7)
+            db._adapter.execution_handlers.pop()
+            self.assertEqual(db(db.pp).count(), 3)
+            self.assertEqual(db(db.cc).count(), 6)
+            self.assertEqual(db(db.gg).count(), 6)
+            self.assertFalse(
+                [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+            )
+            self.tearDown()
+
+    def testQueryOnChildren(self):
+        db = self.connect(
+            adapter_args=dict(foreign_keys=False, cascade_batch_size=3)
+        )
+        db.define_table("pp", Field("name"))
+        db.define_table("cc", Field("pp", "reference pp"), Field("marked", "boolean"))
+        for i in range(7):
+            pid = db.pp.insert(name="p%i" % i)
+            db.cc.insert(pp=pid, marked=i < 5)
+        # the query depends on the children the cascade deletes
+        query = db.pp.id.belongs(db(db.cc.marked == True)._select(db.cc.pp))
+        self.assertEqual(db(query).delete(), 5)
+        self.assertEqual(db(db.pp).count(), 2)
+        self.assertEqual(db(db.cc).count(), 2)
+        self.assertEqual(db(~db.cc.pp.belongs(db(db.pp)._select(db.pp.id))).count(), 0)
+
+    def testCyclic(self):
+        db = self.connect(adapter_args=dict(foreign_keys=False))
+        db.define_table("tt", Field("name"), Field("aa", "reference tt"))
+        a = db.tt.insert(name="a")
+        b = db.tt.insert(name="b", aa=a)
+        db(db.tt.id == a).update(aa=b)
+        self.assertTrue(db._adapter._cascades_cyclic(db.tt))
+        self.assertEqual(db(db.tt.id == a).delete(), 1)
+        self.assertEqual(db(db.tt).count(), 0)
+
+
 class TestClientLevelOps(DALtest):
     def testRun(self):
         db = self.connect()
@@ -3625,6 +4142,72 @@ class TestRecordVersioning(DALtest):
         self.assertEqual(len(db(db.t0_archive).select()), 2)
         self.assertEqual(db(db.t0_archive).count(), 2)
 
+    def testBulkArchive(self):
+        db = self.connect()
+        db.define_table(
+            "t0",
+            Field("name"),
+            Field("status"),
+            Field("counter", "integer", default=0),
+            Field("is_active", "boolean", writable=False, readable=False, default=True),
+        )
+        db.t0._enable_record_versioning(archive_name="t0_archive")
+        db.t0.bulk_insert([dict(name="n%s" % k, status="x") for k in range(50)])
+        db.t0.insert(name="already", status="y")
+        db.t0.insert(name="unknown", status=None)
+        statements = []
+
+        class Recorder(ExecutionHandler):
+            def before_execute(self, command):
+                statements.append(command)
+
+        db._adapter.execution_handlers.append(Recorder)
+        # one statement archives the changed rows, then the update runs
+        db(db.t0.id > 0).update(status="y")
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[0].startswith("INSERT INTO"))
+        self.assertIn("SELECT", statements[0])
+        self.assertEqual(db._table_versions.get("t0_archive"), 1)
+        archived = db(db.t0_archive).select(orderby=db.t0_archive.current_record)
+        # the row already at "y" is not archived, the NULL one is
+        self.assertEqual(len(archived), 51)
+        self.assertEqual(archived[0].status, "x")
+        self.assertEqual(archived[-1].name, "unknown")
+        self.assertEqual(archived[-1].status, None)
+        rows = db(db.t0.id > 0).select(orderby=db.t0.id)
+        self.assertEqual(
+            [row.id for row in rows[:50]], [row.current_record for row in archived[:50]]
+        )
+        # every row changes with an expression, inactive rows are left alone
+        db(db.t0.name == "already").delete()
+        del statements[:]
+        db(db.t0.id > 0).update(counter=db.t0.counter + 1)
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(db(db.t0_archive).count(), 51 + 1 + 51)
+        # setting a value to NULL archives the rows that had one
+        db(db.t0.name == "unknown").update(status=None)
+        self.assertEqual(db(db.t0_archive).count(), 51 + 1 + 51 + 1)
+
+    def testBulkArchiveLob(self):
+        db = self.connect()
+        db.define_table("t0", Field("name"), Field("body", "text"))
+        db.t0._enable_record_versioning(archive_name="t0_archive")
+        db.t0.insert(name="a", body="x")
+        # text is a CLOB on Oracle, which can't be compared with <>
+        db._adapter.dialect.types = dict(db._adapter.dialect.types, text="CLOB")
+        statements = []
+
+        class Recorder(ExecutionHandler):
+            def before_execute(self, command):
+                statements.append(command)
+
+        db._adapter.execution_handlers.append(Recorder)
+        db(db.t0.id > 0).update(body="y")
+        # archived row by row, no <> on the text column
+        self.assertEqual([sql for sql in statements if "<>" in sql], [])
+        self.assertEqual(db(db.t0_archive).select().column("body"), ["x"])
+        self.assertEqual(db(db.t0.id > 0).select().column("body"), ["y"])
+
 
 @unittest.skipIf(IS_SQLITE or IS_NOSQL, "Skip if sqlite or NOSQL since no pools")
 class TestConnection(unittest.TestCase):
@@ -3657,17 +4240,115 @@ class TestConnection(unittest.TestCase):
             dbs.append(db3)
         for db in dbs:
             db.close()
-        self.assertEqual(len(db3._adapter.POOLS[DEFAULT_URI]), 5)
-        for c in db3._adapter.POOLS[DEFAULT_URI]:
+        self.assertEqual(len(db3._adapter.POOLS[db3._adapter._pool_key_]), 5)
+        for c in db3._adapter.POOLS[db3._adapter._pool_key_]:
             c.close()
-        db3._adapter.POOLS[DEFAULT_URI] = []
+        db3._adapter.POOLS[db3._adapter._pool_key_] = []
         # Clean close if a connection is broken (closed explicity)
         if not IS_ORACLE:
             for a in range(10):
                 db4 = DAL(DEFAULT_URI, check_reserved=["all"], pool_size=5)
                 db4._adapter.connection.close()
                 db4.close()
-            self.assertEqual(len(db4._adapter.POOLS[DEFAULT_URI]), 0)
+            self.assertEqual(len(db4._adapter.POOLS[db4._adapter._pool_key_]), 0)
+
+
+@unittest.skipUnless(IS_SQLITE, "SQLite reader/writer lanes")
+class TestSQLitePool(unittest.TestCase):
+    def testRun(self):
+        import tempfile
+        import threading
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            uri = "sqlite://pool.sqlite"
+            db = DAL(uri, folder=tempdir, pool_size=3)
+            db.define_table("tt", Field("aa"))
+            db.commit()
+            self.assertEqual(
+                db.executesql("PRAGMA journal_mode;")[0][0].lower(), "wal"
+            )
+            adapter = db._adapter
+            # reads stay on a reader, the first write moves to the writer
+            db(db.tt).count()
+            reader = adapter.connection
+            self.assertFalse(adapter._in_writer_lane())
+            db.tt.insert(aa="x")
+            self.assertTrue(adapter._in_writer_lane())
+            writer = adapter.connection
+            self.assertIsNot(reader, writer)
+            self.assertIn(reader, adapter.POOLS[adapter._pool_key_])
+            db.commit()
+            self.assertFalse(adapter._in_writer_lane())
+            self.assertEqual(adapter.POOLS[adapter._writer_pool_key_], [writer])
+            db.close()
+            # connections are reused across DAL instances
+            for i in range(5):
+                db2 = DAL(uri, folder=tempdir, pool_size=3)
+                db2.define_table("tt", Field("aa"), migrate=False)
+                self.assertEqual(db2(db2.tt).count(), i + 1)
+                db2.tt.insert(aa="y")
+                self.assertIs(db2._adapter.connection, writer)
+                db2.close()
+            # concurrent writers are serialized through the single writer
+            errors = []
+
+            def work():
+                try:
+                    dbt = DAL(uri, folder=tempdir, pool_size=3)
+                    dbt.define_table("tt", Field("aa"), migrate=False)
+                    for _ in range(20):
+                        dbt.tt.insert(aa="z")
+                        dbt.commit()
+                    dbt.close()
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=work) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(errors, [])
+            db3 = DAL(uri, folder=tempdir, pool_size=3)
+            db3.define_table("tt", Field("aa"), migrate=False)
+            self.assertEqual(db3(db3.tt).count(), 86)
+            db3.close()
+            for key in (adapter._pool_key_, adapter._writer_pool_key_):
+                for c in adapter.POOLS.pop(key, []):
+                    c.close()
+
+    def testSeparateFolders(self):
+        import tempfile
+
+        # the same relative URI names a different file in each folder
+        with tempfile.TemporaryDirectory() as folder_a:
+            with tempfile.TemporaryDirectory() as folder_b:
+                uri = "sqlite://storage.sqlite"
+                dba = DAL(uri, folder=folder_a, pool_size=3)
+                dba.define_table("only_a", Field("aa"))
+                dba.only_a.insert(aa="x")
+                dba.commit()
+                dba.close()
+                dbb = DAL(uri, folder=folder_b, pool_size=3)
+                self.assertNotEqual(dba._adapter._pool_key_, dbb._adapter._pool_key_)
+                self.assertIsNot(dba._adapter._writer_lock, dbb._adapter._writer_lock)
+                tables = dbb.executesql(
+                    "SELECT name FROM sqlite_master WHERE type='table';"
+                )
+                self.assertNotIn(("only_a",), tables)
+                dbb.define_table("only_b", Field("bb"))
+                dbb.only_b.insert(bb="y")
+                dbb.commit()
+                dbb.close()
+                for adapter in (dba._adapter, dbb._adapter):
+                    for key in (adapter._pool_key_, adapter._writer_pool_key_):
+                        for c in adapter.POOLS.pop(key, []):
+                            c.close()
+
+    def testMemoryNotPooled(self):
+        db = DAL("sqlite:memory", pool_size=5)
+        self.assertEqual(db._adapter.pool_size, 0)
+        db.close()
 
 
 class TestSerializers(DALtest):
@@ -27,3 +27,89 @@ class TestTags(unittest.TestCase):
 
         rows = db(properties.find(["color"])).select()
         self.assertTrue(len(rows), 2)
+
+    def test_many(self):
+        db = DAL("sqlite:memory")
+        db.define_table("thing", Field("name"))
+        properties = Tags(db.thing)
+        properties.batch_size = 7
+        ids = [db.thing.insert(name="thing%s" % k) for k in range(20)]
+        indexes = db.executesql(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name=?;",
+            placeholders=(properties.tag_table._tablename,),
+        )
+        self.assertEqual(
+            sorted(name for name, in indexes),
+            ["thing_tag_default_record_idx", "thing_tag_default_tagpath_idx"],
+        )
+
+        versions = dict(db._table_versions)
+        added = properties.add_many(
+            {record_id: ["color/red", "/size/big/"] for record_id in ids}
+        )
+        self.assertEqual(added, 40)
+        # raw INSERTs still count as writes for the IS_IN_DB options cache
+        tablename = properties.tag_table._tablename
+        self.assertNotEqual(db._table_versions.get(tablename), versions.get(tablename))
+        # idempotent, and ids of missing records are skipped
+        added = properties.add_many({ids[0]: "color/red", ids[1]: "new", 999: "x"})
+        self.assertEqual(added, 1)
+        self.assertEqual(db(properties.tag_table).count(), 41)
+
+        tags = properties.get_many(ids[:2] + [999])
+        self.assertEqual(tags[ids[0]], ["color/red", "size/big"])
+        self.assertEqual(tags[ids[1]], ["color/red", "size/big", "new"])
+        self.assertEqual(tags[999], [])
+        self.assertEqual(properties.get_many([str(ids[0])]), {ids[0]: tags[ids[0]]})
+        self.assertEqual(sorted(properties.get(ids[1])), sorted(tags[ids[1]]))
+
+        removed = properties.remove_many({record_id: "size/big" for record_id in ids})
+        self.assertEqual(removed, 20)
+        rows = db(properties.find("size")).select()
+        self.assertEqual(len(rows), 0)
+        rows = db(properties.find("color/red")).select()
+        self.assertEqual(len(rows), 20)
+
+    def test_find_and_facets(self):
+        db = DAL("sqlite:memory")
+        db.define_table("thing", Field("name"))
+        properties = Tags(db.thing)
+        chair = db.thing.insert(name="chair")
+        table = db.thing.insert(name="table")
+        lamp = db.thing.insert(name="lamp")
+        properties.add_many(
+            {
+                chair: ["color/red", "style/modern"],
+                table: ["color/blue", "style/modern"],
+                lamp: ["color/red", "color/blue"],
+            }
+        )
+
+        def names(query):
+            return sorted(row.name for row in db(query).select())
+
+        rows = names(properties.find(["color", "style/modern"]))
+        self.assertEqual(rows, ["chair", "table"])
+        rows = names(properties.find(["color/red", "color/blue"]))
+        self.assertEqual(rows, ["lamp"])
+        # a path implied by another one does not count twice
+        rows = names(properties.find(["color", "color/red"]))
+        self.assertEqual(rows, ["chair", "lamp"])
+        self.assertEqual(
+            names(properties.find(["color/blue", "style"], mode="or")),
+            ["chair", "lamp", "table"],
+        )
+        # one subselect, grouped, whatever the number of tags
+        sql = db(properties.find(["color/red", "color/blue", "style"]))._select()
+        self.assertEqual(sql.count("SELECT"), 2)
+        self.assertIn("HAVING", sql)
+
+        self.assertEqual(
+            properties.facets(),
+            {"color/blue": 2, "color/red": 2, "style/modern": 2},
+        )
+        facets = properties.facets(properties.find("style/modern"))
+        self.assertEqual(list(facets), ["style/modern", "color/blue", "color/red"])
+        self.assertEqual(list(facets.values()), [2, 1, 1])
+        facets = properties.facets(db.thing.name != "chair", prefix="color")
+        self.assertEqual(facets, {"color/blue": 2, "color/red": 1})
@@ -14,6 +14,8 @@ have dedicated tests.
 """
 
 import datetime
+import subprocess
+import sys
 import warnings
 
 from pydal import _globals, _load, drivers, exceptions, utils
@@ -166,6 +168,72 @@ class TestDrivers(unittest.TestCase):
             )
         self.assertIsInstance(drivers.is_jdbc, bool)
 
+    def test_drivers_are_probed_lazily(self):
+        lazy = drivers.LazyDrivers({"ok": lambda: 1, "missing": _missing_driver})
+        self.assertEqual(dict.__len__(lazy), 0)
+        self.assertIn("ok", lazy)
+        self.assertEqual(dict.__len__(lazy), 1)
+        self.assertNotIn("missing", lazy)
+        self.assertEqual(dict(lazy.items()), {"ok": 1})
+
+
+def _missing_driver():
+    raise ImportError("not installed")
+
+
+class TestLazyImports(unittest.TestCase):
+    """
+    ``import pydal`` must not pull in backends, drivers or validators;
+    they're loaded when a DAL connects or a field needs its defaults.
+    """
+
+    LAZY_PREFIXES = (
+        "pydal.backends.",
+        "pydal.validators",
+        "pydal.compilers",
+        "psycopg2",
+        "pymysql",
+        "google.cloud",
+        "sqlite3",
+    )
+
+    def _run(self, code):
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return proc
+
+    def _modules_after(self, code):
+        code += "; import sys; print('\\n'.join(sys.modules))"
+        return set(self._run(code).stdout.split())
+
+    def test_import_pydal_is_lazy(self):
+        modules = self._modules_after("import pydal")
+        loaded = [
+            name
+            for name in modules
+            if any(name.startswith(prefix) for prefix in self.LAZY_PREFIXES)
+        ]
+        self.assertEqual(loaded, [])
+
+    def test_adapter_loaded_on_connect(self):
+        modules = self._modules_after(
+            "from pydal import DAL; DAL('sqlite:memory').close()"
+        )
+        self.assertIn("pydal.backends.sqlite", modules)
+        self.assertNotIn("pydal.backends.postgres", modules)
+
+    def test_validators_loaded_on_use(self):
+        modules = self._modules_after(
+            "from pydal import DAL, Field; db = DAL('sqlite:memory');"
+            " db.define_table('t', Field('n', 'integer')); db.t.n.requires"
+        )
+        self.assertIn("pydal.validators", modules)
+        self.assertNotIn("psycopg2", modules)
+
 
 class TestDispatcher(unittest.TestCase):
 
@@ -103,6 +103,114 @@ class TestValidateAndInsert(unittest.TestCase):
             content = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x04\x00\x00\x00\xb5\x1c\x0c\x02\x00\x00\x00\x0bIDATx\xdacd\xf8\x0f\x00\x01\x05\x01\x01'\x18\xe3f\x00\x00\x00\x00IEND\xaeB`\x82"
             with open(os.path.join(tempdir, names[0]), "rb") as stream:
                 self.assertEqual(stream.read(), content)
+            # without content nothing is stored
+            res = db.thing.validate_and_insert(name="empty", image=dict(filename="x"))
+            self.assertTrue(res["success"])
+            self.assertEqual(db.thing(res["id"]).image, None)
+            # the batch path keeps only the files of the valid items
+            errors, rows = db.thing.validate_many(
+                [
+                    dict(image=dict(filename="image", content=b64)),
+                    dict(name="other", image=dict(filename="image", content=b64)),
+                ]
+            )
+            self.assertEqual(errors, {0: {"name": "required"}})
+            self.assertEqual(
+                sorted(os.listdir(tempdir)), sorted([names[0], rows[1]["image"]])
+            )
+
+
+@unittest.skipIf(IS_IMAP, "TODO: IMAP test")
+class TestValidateMany(unittest.TestCase):
+    def testRun(self):
+        from pydal.helpers.classes import ExecutionHandler
+        from pydal.validators import IS_IN_DB, IS_NOT_IN_DB
+
+        selects = []
+
+        class Recorder(ExecutionHandler):
+            def before_execute(self, command):
+                if str(command).startswith("SELECT"):
+                    selects.append(command)
+
+        db = DAL(DEFAULT_URI, check_reserved=["all"])
+        db.define_table("person", Field("name"))
+        db.define_table(
+            "pet",
+            Field("name", requires=IS_NOT_IN_DB(db, "pet.name")),
+            Field("person", "reference person"),
+            Field("legs", "integer", requires=IS_INT_IN_RANGE(0, 5)),
+        )
+        people = [db.person.insert(name="o%s" % n) for n in range(3)]
+        db.pet.insert(name="rex", person=people[0], legs=4)
+        items = [
+            dict(name="pet%s" % n, person=people[n % 3], legs=n % 5)
+            for n in range(1200)
+        ]
+        items[10]["name"] = "rex"  # already in the database
+        items[20]["name"] = "pet19"  # repeated within the batch
+        items[30]["person"] = 999  # no such person
+        items[40]["legs"] = 9  # non-DB validator
+        items[50]["color"] = "red"  # not a field
+        db._adapter.execution_handlers.append(Recorder)
+        errors, rows = db.pet.validate_many(items)
+        db._adapter.execution_handlers.remove(Recorder)
+        self.assertEqual(sorted(errors), [10, 20, 30, 40, 50])
+        self.assertEqual(set(errors[20]), {"name"})
+        self.assertEqual(set(errors[30]), {"person"})
+        self.assertEqual(set(errors[40]), {"legs"})
+        self.assertEqual(errors[50], {"color": "invalid"})
+        self.assertEqual(rows[0], dict(name="pet0", person=people[0], legs=0))
+        # one query per DB-backed validator per chunk of 500 values
+        self.assertEqual(len(selects), 3 + 1)
+        # nothing is inserted while any item is invalid
+        rtn = db.pet.validate_and_bulk_insert(items)
+        self.assertFalse(rtn["success"])
+        self.assertEqual(db(db.pet).count(), 1)
+        valid = [item for k, item in enumerate(items) if k not in errors]
+        rtn = db.pet.validate_and_bulk_insert(valid)
+        self.assertEqual(rtn["errors"], {})
+        self.assertEqual(len(rtn["ids"]), len(valid))
+        self.assertEqual(db(db.pet).count(), len(valid) + 1)
+        # the one-by-one path agrees with the batch
+        validator = IS_IN_DB(db, "person.id")
+        self.assertEqual(
+            validator.validate_many([people[1], "x", 999]),
+            [validator(people[1]), validator("x"), validator(999)],
+        )
+        drop(db.pet)
+        drop(db.person)
+
+    def testExecutor(self):
+        from concurrent.futures import ProcessPoolExecutor
+
+        from pydal.validators import CRYPT, IS_STRONG
+
+        db = DAL(DEFAULT_URI, check_reserved=["all"])
+        db.define_table(
+            "account",
+            Field("name"),
+            Field("secret", "password", requires=[IS_STRONG(min=6), CRYPT()]),
+        )
+        items = [dict(name="u%s" % n, secret="Pass-%03d" % n) for n in range(200)]
+        items[7]["secret"] = "weak"
+        items[150]["secret"] = "alsoweak"
+        expected, _ = db.account.validate_many(items)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            errors, rows = db.account.validate_many(items, executor=executor)
+            self.assertEqual(errors, expected)
+            self.assertEqual(sorted(errors), [7, 150])
+            # hashed in the pool, in order
+            for k in (0, 8, 199):
+                self.assertIsNotNone(rows[k]["secret"].crypted)
+                self.assertTrue(CRYPT()(items[k]["secret"])[0] == rows[k]["secret"])
+            del items[150], items[7]
+            rtn = db.account.validate_and_bulk_insert(items, executor=executor)
+        self.assertTrue(rtn["success"])
+        row = db.account(name="u199")
+        self.assertTrue(CRYPT()("Pass-199")[0] == row.secret)
+        self.assertFalse(CRYPT()("Pass-198")[0] == row.secret)
+        drop(db.account)
 
 
 @unittest.skipIf(IS_IMAP, "TODO: IMAP test")
@@ -414,6 +414,56 @@ class TestValidators(unittest.TestCase):
             ("2", "green"),
         ]
 
+    def test_IS_IN_DB_options_cache(self):
+        from pydal.helpers.classes import ExecutionHandler
+
+        selects = []
+
+        class Recorder(ExecutionHandler):
+            def before_execute(self, command):
+                if str(command).startswith("SELECT"):
+                    selects.append(command)
+
+        db = DAL("sqlite:memory")
+        db.define_table("thing", Field("name"))
+        db.define_table("other", Field("name"))
+        db.thing.insert(name="red")
+        db._adapter.execution_handlers.append(Recorder)
+        # uncached unless asked for
+        vldtr = IS_IN_DB(db, "thing.name")
+        vldtr.options()
+        IS_IN_DB(db, "thing.name").options()
+        self.assertEqual(len(selects), 2)
+        self.assertEqual(IS_IN_DB(db, "thing.name")("red"), ("red", None))
+        self.assertEqual(len(selects), 3)
+        del selects[:]
+        vldtr = IS_IN_DB(db, "thing.name", zero=None, options_ttl=300)
+        self.assertEqual(vldtr.options(), [("red", "red")])
+        # a second validator over the same query shares the cached set
+        self.assertEqual(
+            IS_IN_DB(db, "thing.name", options_ttl=300).options(),
+            [("", ""), ("red", "red")],
+        )
+        self.assertEqual(vldtr("red"), ("red", None))
+        self.assertEqual(vldtr("blue")[1], "Value not in database")
+        self.assertEqual(len(selects), 1)
+        # writes to other tables keep it, writes to the table drop it
+        db.other.insert(name="x")
+        vldtr.options()
+        self.assertEqual(len(selects), 1)
+        db.thing.insert(name="blue")
+        self.assertEqual(vldtr("blue"), ("blue", None))
+        self.assertEqual(len(selects), 2)
+        self.assertEqual(vldtr.options(), [("blue", "blue"), ("red", "red")])
+        self.assertEqual(len(selects), 3)
+        db(db.thing.name == "blue").delete()
+        self.assertEqual(vldtr.options(), [("red", "red")])
+        # past the TTL the set is rebuilt too
+        vldtr.options_ttl = -1
+        vldtr.options()
+        vldtr.options()
+        self.assertEqual(len(selects), 6)
+
     def test_IS_NOT_IN_DB(self):
         db = DAL("sqlite:memory")
         db.define_table("person", Field("name"), Field("nickname"))
@@ -1554,3 +1604,46 @@ this is the content of the fake file
         self.assertEqual(
             validator.validate('["2025-10-12"]'), [datetime.date(2025, 10, 12)]
         )
+
+    def test_compile_validators(self):
+        from pydal.validators import ValidationError, compile_validators
+
+        calls = []
+
+        class UPPER(Validator):
+            pure = True
+
+            def validate(self, value, record_id=None):
+                calls.append(value)
+                if value == "bad":
+                    raise ValidationError("no")
+                return value.upper()
+
+        class NOISY(UPPER):
+            def validate(self, value, record_id=None):
+                calls.append(value)
+                return value
+
+        legacy = lambda value, record_id=None: (value + "!", None)
+        field = Field(
+            "f", requires=[IS_NOT_EMPTY(), UPPER(), legacy, NOISY()], map_none="A!"
+        )
+        validate = compile_validators(field)
+        for value in ("a", "b", "", "bad", None):
+            calls[:] = []
+            self.assertEqual(validate(value), field.validate(value))
+        calls[:] = []
+        validate("b")
+        validate("b")
+        validate("bad")
+        validate("bad")
+        # pure results are reused, errors and non-pure validators are not
+        self.assertEqual(calls, ["B!", "B!", "bad", "bad"])
+        self.assertEqual(compile_validators(Field("g"))("x"), ("x", None))
+        # ISO dates skip strptime but give the same results
+        self.assertEqual(IS_DATE()("2024-02-29"), (datetime.date(2024, 2, 29), None))
+        self.assertEqual(IS_DATE()("2023-02-29")[1], "Enter date as 1963-08-28")
+        self.assertEqual(
+            IS_DATETIME()("2024-02-29T12:30"),
+            (datetime.datetime(2024, 2, 29, 12, 30), None),
+        )